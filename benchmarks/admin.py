@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from benchmarks.models import BenchEvent
+
+site = admin.AdminSite(name='bench_admin')
+
+
+class BenchEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'day', 'created_at')
+    list_filter = (('day', DateRangeFilter), ('created_at', DateTimeRangeFilter))
+    show_full_result_count = False
+
+
+site.register(BenchEvent, BenchEventAdmin)
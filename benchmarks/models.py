@@ -0,0 +1,11 @@
+from django.db import models
+
+
+class BenchEvent(models.Model):
+    day = models.DateField(db_index=True)
+    day_plain = models.DateField()
+    created_at = models.DateTimeField(db_index=True)
+    created_plain = models.DateTimeField()
+
+    class Meta:
+        app_label = 'benchmarks'
@@ -0,0 +1,178 @@
+'''
+Benchmarks of the range filters on a big synthetic table.
+
+'''
+import datetime
+import json
+import platform
+import random
+import statistics
+import time
+
+import django
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.utils import timezone
+
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from benchmarks.admin import site
+from benchmarks.models import BenchEvent
+
+FIRST_DAY = datetime.date(2010, 1, 1)
+DAYS = 5 * 365
+
+DATE_PARAMS = {'drf__%s__gte': '2012-03-01', 'drf__%s__lte': '2012-03-31'}
+DATETIME_PARAMS = {'drf__%s__gte_0': '2012-03-01', 'drf__%s__gte_1': '00:00:00',
+                   'drf__%s__lte_0': '2012-03-31', 'drf__%s__lte_1': '23:59:59'}
+
+
+def generate(rows, chunk_size=50000, seed=0):
+    '''
+    Inserts ``rows`` events spread over five years, with raw SQL so millions
+    of rows don't take long.
+    '''
+    rng = random.Random(seed)
+    table = BenchEvent._meta.db_table
+    sql = 'INSERT INTO %s (day, day_plain, created_at, created_plain) VALUES (%%s, %%s, %%s, %%s)' % table
+    start = datetime.datetime(2010, 1, 1, tzinfo=timezone.utc)
+    with connection.cursor() as cursor:
+        for offset in range(0, rows, chunk_size):
+            values = []
+            for _ in range(min(chunk_size, rows - offset)):
+                moment = start + datetime.timedelta(seconds=rng.randrange(DAYS * 24 * 3600))
+                day = moment.date().isoformat()
+                moment = moment.strftime('%Y-%m-%d %H:%M:%S')
+                values.append((day, day, moment, moment))
+            cursor.executemany(sql, values)
+
+
+def params_for(params, field_path):
+    return dict((key % field_path, value) for key, value in params.items())
+
+
+def make_filter(filter_class, field_path, params):
+    field = BenchEvent._meta.get_field(field_path)
+    return filter_class(field, RequestFactory().get('/'), params_for(params, field_path),
+                        BenchEvent, site._registry[BenchEvent], field_path)
+
+
+class ParamsChangeList(object):
+    # What the filters read from the changelist when no facet is enabled.
+
+    def __init__(self, params):
+        self.params = params
+
+
+def filter_overhead(filter_class, field_path, params):
+    '''
+    Everything a filter costs on a changelist request but the queries.
+    '''
+    filter_ = make_filter(filter_class, field_path, params)
+    filter_.queryset(None, BenchEvent.objects.all())
+    filter_.choices(ParamsChangeList(dict(params_for(params, field_path), o='1', q='spam')))
+
+
+def render_changelist(client, query):
+    response = client.get('/admin/benchmarks/benchevent/', query)
+    if response.status_code != 200:
+        # A login redirect or an error page would be timed instead.
+        raise RuntimeError('The changelist answered %d' % response.status_code)
+    return response
+
+
+def get_benchmarks():
+    '''
+    Returns the ``(name, callable, loops)`` benchmarks. Each result is the
+    time of one call of ``callable``.
+    '''
+    benchmarks = []
+    for filter_class, params, field_path in ((DateRangeFilter, DATE_PARAMS, 'day'),
+                                             (DateTimeRangeFilter, DATETIME_PARAMS, 'created_at')):
+        name = filter_class.__name__
+
+        benchmarks.append(('%s.construction' % name,
+                           lambda f=filter_class, p=params, fp=field_path: make_filter(f, fp, p), 200))
+        benchmarks.append(('%s.form_validation' % name,
+                           lambda f=filter_class, p=params, fp=field_path: make_filter(f, fp, p).form.is_valid(),
+                           200))
+        benchmarks.append(('%s.overhead' % name,
+                           lambda f=filter_class, p=params, fp=field_path: filter_overhead(f, fp, p), 200))
+        filter_ = make_filter(filter_class, field_path, params)
+        benchmarks.append(('%s.queryset_compilation' % name,
+                           lambda f=filter_: str(f.queryset(None, BenchEvent.objects.all()).query), 200))
+
+    for filter_class, params, field_paths in ((DateRangeFilter, DATE_PARAMS, ('day', 'day_plain')),
+                                              (DateTimeRangeFilter, DATETIME_PARAMS,
+                                               ('created_at', 'created_plain'))):
+        for field_path in field_paths:
+            filter_ = make_filter(filter_class, field_path, params)
+            queryset = filter_.queryset(None, BenchEvent.objects.all())
+            benchmarks.append(('query.%s.count' % field_path, lambda q=queryset: q.count(), 3))
+            benchmarks.append(('query.%s.first_page' % field_path,
+                               lambda q=queryset, fp=field_path: list(q.order_by('-%s' % fp)[:100]), 3))
+
+    client = Client()
+    client.force_login(User.objects.get_or_create(username='bench', is_staff=True, is_superuser=True)[0])
+    query = dict(params_for(DATE_PARAMS, 'day'))
+    benchmarks.append(('changelist.render', lambda: render_changelist(client, query), 3))
+    return benchmarks
+
+
+def run(repeat=5, only=None):
+    results = {}
+    for name, function, loops in get_benchmarks():
+        if only and only not in name:
+            continue
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(loops):
+                function()
+            timings.append((time.perf_counter() - started) / loops)
+        results[name] = {
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'loops': loops,
+            'repeat': repeat,
+        }
+    return results
+
+
+def report(results, rows):
+    return {
+        'meta': {
+            'rows': rows,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': connection.Database.sqlite_version,
+            'date': timezone.now().isoformat(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    '''
+    Returns the ``(name, ratio)`` of the benchmarks whose median got slower
+    than ``baseline`` by more than ``threshold`` (0.2 is 20%).
+    '''
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        previous = baseline['results'].get(name)
+        if not previous or not previous['median']:
+            continue
+        ratio = result['median'] / previous['median']
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def write(data, path):
+    with open(path, 'w') as output:
+        json.dump(data, output, indent=2, sort_keys=True)
+
+
+def read(path):
+    with open(path) as input_:
+        return json.load(input_)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from benchmarks.admin import site
+
+urlpatterns = [
+    path('admin/', site.urls),
+]
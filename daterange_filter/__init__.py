@@ -0,0 +1 @@
+default_app_config = 'daterange_filter.apps.DateRangeFilterConfig'
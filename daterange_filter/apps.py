@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.core import checks
+
+
+class DateRangeFilterConfig(AppConfig):
+    name = 'daterange_filter'
+    default_auto_field = 'django.db.models.AutoField'
+
+    def ready(self):
+        from daterange_filter.indexes import check_indexes
+        checks.register(check_indexes, checks.Tags.models)
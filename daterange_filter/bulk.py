@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Bulk updates and deletes of a date range in small batches.
+
+The rows are processed in batches of primary keys, optionally inside time
+slices of the range, with one transaction per batch so no lock is held for
+long. The admin actions confirm the operation with a count instead of
+loading every object, the cascaded and the protected rows included.
+
+'''
+import logging
+
+from django.contrib import messages
+from django.contrib.admin import helpers
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.admin.options import get_content_type_for_model
+from django.contrib.auth import get_permission_codename
+from django.db import models, transaction
+from django.template.response import TemplateResponse
+from django.utils.translation import gettext as _, gettext_lazy
+
+from daterange_filter.export import get_range_filter
+from daterange_filter.ranges import to_lookups
+
+logger = logging.getLogger('daterange_filter')
+
+
+def time_slices(start, end, step):
+    '''
+    Yields the half-open ``(start, end)`` slices of ``step`` covering the
+    half-open ``[start, end)`` range.
+    '''
+    while start < end:
+        yield start, min(start + step, end)
+        start = start + step
+
+
+def pk_batches(queryset, batch_size):
+    '''
+    Yields the primary keys of ``queryset`` in lists of ``batch_size``,
+    seeking by primary key instead of using an OFFSET.
+    '''
+    queryset = queryset.order_by('pk')
+    last = None
+    while True:
+        batch = queryset if last is None else queryset.filter(pk__gt=last)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if pks:
+            yield pks
+        if len(pks) < batch_size:
+            return
+        last = pks[-1]
+
+
+def iter_batches(queryset, batch_size=1000, field_path=None, start=None, end=None, slice_size=None):
+    '''
+    Yields the primary keys of ``queryset`` in batches. With ``slice_size``
+    and a bounded ``[start, end)`` range on ``field_path`` the range is
+    walked one time slice after the other.
+    '''
+    if slice_size is None or field_path is None or start is None or end is None:
+        for pks in pk_batches(queryset, batch_size):
+            yield pks
+        return
+
+    for slice_start, slice_end in time_slices(start, end, slice_size):
+        sliced = queryset.filter(**to_lookups(field_path, slice_start, slice_end))
+        for pks in pk_batches(sliced, batch_size):
+            yield pks
+
+
+def run_batches(queryset, operation, progress=None, **kwargs):
+    '''
+    Runs ``operation`` (a callable taking a queryset and returning the number
+    of rows it changed) on every batch of ``queryset``, each one in its own
+    transaction. ``progress`` is called with ``(batches, rows)`` after each
+    batch. Returns the final ``(batches, rows)``.
+    '''
+    manager = queryset.model._base_manager.db_manager(queryset.db)
+    batches = rows = 0
+    for pks in iter_batches(queryset, **kwargs):
+        with transaction.atomic(using=queryset.db):
+            rows += operation(manager.filter(pk__in=pks))
+        batches += 1
+        logger.info('%s: %d rows processed in %d batches', queryset.model._meta.label, rows, batches)
+        if progress is not None:
+            progress(batches, rows)
+    return batches, rows
+
+
+def batched_delete(queryset, log=None, **kwargs):
+    '''
+    Deletes ``queryset`` in batches, calling ``log`` with each batch in its
+    transaction before it is deleted.
+    '''
+    label = queryset.model._meta.label
+
+    def delete(batch):
+        if log is not None:
+            log(batch)
+        return batch.delete()[1].get(label, 0)
+    return run_batches(queryset, delete, **kwargs)
+
+
+def batched_update(queryset, values, **kwargs):
+    return run_batches(queryset, lambda batch: batch.update(**values), **kwargs)
+
+
+def cascaded_querysets(queryset, seen=None):
+    '''
+    Yields ``(model, queryset)`` for the rows deleted along with ``queryset``
+    through the ``CASCADE`` foreign keys, as subqueries of it. Every model is
+    walked once.
+    '''
+    seen = seen if seen is not None else set([queryset.model])
+    for related in queryset.model._meta.related_objects:
+        if related.on_delete is not models.CASCADE or related.related_model in seen:
+            continue
+        seen.add(related.related_model)
+        cascaded = related.related_model._base_manager.using(queryset.db).filter(
+            **{'%s__in' % related.field.name: queryset})
+        yield related.related_model, cascaded
+        for item in cascaded_querysets(cascaded, seen):
+            yield item
+
+
+def get_cascaded_counts(queryset):
+    '''
+    Returns the ``(model, count)`` of the rows deleting ``queryset`` would
+    delete in other tables, counted without loading them.
+    '''
+    counts = []
+    for model, cascaded in cascaded_querysets(queryset):
+        count = cascaded.count()
+        if count:
+            counts.append((model, count))
+    return counts
+
+
+def get_protected_counts(queryset):
+    '''
+    Returns the ``(model, count)`` of the rows that keep ``queryset``, or the
+    rows deleted along with it, from being deleted through ``PROTECT``
+    foreign keys, like ``get_deleted_objects`` of the admin does.
+    '''
+    counts = []
+    deleted = [queryset] + [cascaded for model, cascaded in cascaded_querysets(queryset)]
+    for rows in deleted:
+        for related in rows.model._meta.related_objects:
+            if related.on_delete is not models.PROTECT:
+                continue
+            count = related.related_model._base_manager.using(rows.db).filter(
+                **{'%s__in' % related.field.name: rows}).count()
+            if count:
+                counts.append((related.related_model, count))
+    return counts
+
+
+def get_perms_lacking(model_admin, request, counts):
+    '''
+    Returns the verbose names of the models of ``counts`` the user can't
+    delete, like ``get_deleted_objects`` of the admin does.
+    '''
+    perms_lacking = []
+    for model, count in counts:
+        opts = model._meta
+        related_admin = model_admin.admin_site._registry.get(model)
+        if related_admin is not None:
+            allowed = related_admin.has_delete_permission(request)
+        else:
+            allowed = request.user.has_perm('%s.%s' % (opts.app_label, get_permission_codename('delete', opts)))
+        if not allowed and opts.verbose_name not in perms_lacking:
+            perms_lacking.append(opts.verbose_name)
+    return perms_lacking
+
+
+def log_deletions(model_admin, request, batch):
+    '''
+    Adds the LogEntry of every object of ``batch``, as
+    ``ModelAdmin.log_deletion`` would, in one query.
+    '''
+    content_type = get_content_type_for_model(model_admin.model)
+    LogEntry.objects.using(batch.db).bulk_create([
+        LogEntry(user_id=request.user.pk, content_type_id=content_type.pk, object_id=str(obj.pk),
+                 object_repr=str(obj)[:200], action_flag=DELETION)
+        for obj in batch
+    ])
+
+
+def get_batch_options(model_admin, request):
+    '''
+    Returns the ``iter_batches`` options of ``model_admin``: ``bulk_batch_size``
+    and ``bulk_slice_size`` (a timedelta, None to not slice the range).
+    '''
+    options = {'batch_size': getattr(model_admin, 'bulk_batch_size', 1000)}
+    filter_ = get_range_filter(request)
+    slice_size = getattr(model_admin, 'bulk_slice_size', None)
+    if filter_ is not None and slice_size is not None:
+        boundaries = filter_.get_boundaries()
+        if isinstance(boundaries, tuple):
+            options.update(field_path=filter_.field_path, start=boundaries[0], end=boundaries[1],
+                           slice_size=slice_size)
+    return options
+
+
+def confirm_and_run(model_admin, request, queryset, action, description, run, related_counts=(),
+                    perms_lacking=(), protected_counts=()):
+    '''
+    Renders a confirmation page built from a count of ``queryset`` and, once
+    confirmed, calls ``run`` (``batched_update`` like) with it and the batch
+    options. Nothing is run while ``perms_lacking`` or ``protected_counts``
+    isn't empty.
+    '''
+    opts = model_admin.model._meta
+    if request.POST.get('post') and not perms_lacking and not protected_counts:
+        batches, rows = run(queryset, **get_batch_options(model_admin, request))
+        model_admin.message_user(request, _('%(rows)d %(name)s processed in %(batches)d batches.') % {
+            'rows': rows, 'name': opts.verbose_name_plural, 'batches': batches}, messages.SUCCESS)
+        return None
+
+    filter_ = get_range_filter(request)
+    context = dict(
+        model_admin.admin_site.each_context(request),
+        title=_('Are you sure?'),
+        description=description,
+        action=action,
+        count=queryset.count(),
+        day_range=filter_.get_day_range() if filter_ is not None else None,
+        related_counts=[(model._meta.verbose_name_plural, count) for model, count in related_counts],
+        perms_lacking=perms_lacking,
+        protected_counts=[(model._meta.verbose_name_plural, count) for model, count in protected_counts],
+        opts=opts,
+        select_across=request.POST.get('select_across', '0'),
+        selected=request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+        action_checkbox_name=helpers.ACTION_CHECKBOX_NAME,
+    )
+    return TemplateResponse(request, 'daterange_filter/bulk_confirmation.html', context)
+
+
+def delete_range_in_batches(model_admin, request, queryset):
+    counts = get_cascaded_counts(queryset)
+
+    def run(queryset, **options):
+        return batched_delete(queryset, log=lambda batch: log_deletions(model_admin, request, batch), **options)
+    return confirm_and_run(model_admin, request, queryset, 'delete_range_in_batches',
+                           delete_range_in_batches.short_description, run, related_counts=counts,
+                           perms_lacking=get_perms_lacking(model_admin, request, counts),
+                           protected_counts=get_protected_counts(queryset))
+delete_range_in_batches.short_description = gettext_lazy('Delete selected rows in batches')
+delete_range_in_batches.allowed_permissions = ('delete', )
+
+
+def make_update_action(name, values, description):
+    '''
+    Returns an admin action called ``name`` setting ``values`` on the selected
+    rows in batches.
+    '''
+    def action(model_admin, request, queryset):
+        return confirm_and_run(model_admin, request, queryset, name, description,
+                               lambda queryset, **options: batched_update(queryset, values, **options))
+    action.__name__ = name
+    action.short_description = description
+    action.allowed_permissions = ('change', )
+    return action
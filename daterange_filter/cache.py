@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Helpers shared by everything the filters keep in the Django cache.
+
+'''
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+
+KEY_PREFIX = 'daterange_filter'
+
+
+def get_cache():
+    '''
+    Returns the cache configured on ``DATE_RANGE_FILTER_CACHE`` (an alias of
+    ``settings.CACHES``), ``default`` if not set.
+    '''
+    return caches[getattr(settings, 'DATE_RANGE_FILTER_CACHE', 'default')]
+
+
+def normalize_params(params):
+    '''
+    Returns the query string ``params`` as a sorted tuple, so the same filters
+    always give the same key whatever their order in the URL.
+    '''
+    items = []
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)):
+            value = tuple(str(v) for v in value)
+        else:
+            value = str(value)
+        items.append((str(key), value))
+    return tuple(sorted(items))
+
+
+def make_key(kind, *parts):
+    '''
+    Returns a cache key for ``kind`` that is safe to use on any backend.
+    '''
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return '%s:%s:%s' % (KEY_PREFIX, kind, digest)
+
+
+def make_queryset_key(kind, queryset):
+    '''
+    Returns a cache key for ``kind`` built from the SQL of ``queryset``, or
+    None if the queryset can't match any row.
+    '''
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    return make_key(kind, queryset.db, sql, params)
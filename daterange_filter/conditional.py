@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Conditional GET of the changelists filtered by a range that ended in the
+past.
+
+Such a range rarely changes, so with ``conditional_get`` set on a filter,
+``RangeConditionalMixin`` answers the changelist with an ``ETag`` and a
+``Last-Modified`` computed by a single aggregate over the filtered rows, and
+Django's ``condition`` machinery answers ``304 Not Modified`` while they
+match. The validators cover the listed rows (their count and latest
+``modified_field``, required as the count alone misses the edits), the
+query string, the user and the language; the other filters of the sidebar
+and the total of ``show_full_result_count`` aren't checked.
+
+'''
+import datetime
+import hashlib
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.utils import get_fields_from_path
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, Max
+from django.urls import path
+from django.utils import timezone
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+from daterange_filter.cache import normalize_params
+from daterange_filter.deferred import FilteringChangeListMixin
+
+
+def is_closed_past(filter_):
+    '''
+    Returns whether the range picked on ``filter_`` has an end, and it is not
+    after now.
+    '''
+    boundaries = filter_.get_boundaries()
+    if not isinstance(boundaries, tuple) or boundaries[1] is None:
+        return False
+    end = boundaries[1]
+    if isinstance(end, datetime.datetime):
+        return end <= timezone.now()
+    return end <= timezone.localdate()
+
+
+def get_validators(cl, request):
+    '''
+    Returns the ``(etag, last_modified)`` of the changelist ``cl``, or None
+    if none of its filters with ``conditional_get`` picked a closed past
+    range.
+    '''
+    for filter_ in getattr(request, 'daterange_filters', None) or []:
+        if filter_.conditional_get and is_closed_past(filter_):
+            break
+    else:
+        return None
+
+    values = cl.queryset.aggregate(count=Count('pk'), modified=Max(filter_.modified_field))
+    last_modified = values['modified']
+
+    user = getattr(request, 'user', None)
+    # The CSRF secret too: the page embeds a token of it. The total of
+    # show_full_result_count isn't, it would be counted on every revalidation.
+    parts = (cl.model._meta.label_lower, normalize_params(cl.params), get_language(), getattr(user, 'pk', None),
+             request.META.get('CSRF_COOKIE'), values['count'], last_modified)
+    etag = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    if isinstance(last_modified, datetime.date) and not isinstance(last_modified, datetime.datetime):
+        last_modified = timezone.make_aware(datetime.datetime.combine(last_modified, datetime.time.max))
+    return etag, last_modified
+
+
+class RangeConditionalMixin(object):
+    '''
+    ModelAdmin mixin answering ``304 Not Modified`` to the changelist
+    requests whose range, on a filter with ``conditional_get``, is closed
+    and past and whose rows didn't change.
+    '''
+
+    def get_urls(self):
+        # The admin sends the changelist with never_cache, which forbids
+        # keeping it to revalidate it later.
+        name = '%s_%s_changelist' % (self.model._meta.app_label, self.model._meta.model_name)
+        return [
+            path('', self.admin_site.admin_view(self.changelist_view, cacheable=True), name=name)
+            if getattr(url, 'name', None) == name else url
+            for url in super(RangeConditionalMixin, self).get_urls()
+        ]
+
+    def get_changelist(self, request, **kwargs):
+        changelist = super(RangeConditionalMixin, self).get_changelist(request, **kwargs)
+        if getattr(request, 'daterange_filter_validating', False):
+            return type('Filtering%s' % changelist.__name__, (FilteringChangeListMixin, changelist), {})
+        return changelist
+
+    def get_conditional_filters(self, request):
+        '''
+        Returns the filters with ``conditional_get`` of the list filters,
+        built from the query string alone.
+        '''
+        filters = []
+        for item in self.get_list_filter(request):
+            if not (isinstance(item, (list, tuple)) and getattr(item[1], 'conditional_get', False)):
+                continue
+            field_path, filter_class = item[0], item[1]
+            if not filter_class.modified_field:
+                raise ImproperlyConfigured(
+                    '%s.modified_field is required with conditional_get: the rows edited in the range would '
+                    'keep their ETag.' % filter_class.__name__)
+            field = get_fields_from_path(self.model, field_path)[-1]
+            filters.append(filter_class(field, request, dict(request.GET.items()), self.model, self, field_path))
+        return filters
+
+    def get_validators(self, request):
+        if request.method not in ('GET', 'HEAD') or not self.has_view_or_change_permission(request):
+            return None
+        messages = getattr(request, '_messages', None)
+        if messages is not None and len(messages):
+            # They'd be lost with a 304.
+            return None
+        try:
+            if not any(is_closed_past(filter_) for filter_ in self.get_conditional_filters(request)):
+                # Not worth building the changelist before the one rendered.
+                return None
+            request.daterange_filter_validating = True
+            return get_validators(self.get_changelist_instance(request), request)
+        except IncorrectLookupParameters:
+            return None
+        finally:
+            request.daterange_filter_validating = False
+            # The changelist rendered next adds its own filters.
+            request.daterange_filters = []
+
+    def changelist_view(self, request, extra_context=None):
+        validators = self.get_validators(request)
+        view = super(RangeConditionalMixin, self).changelist_view
+        if validators is None:
+            response = view(request, extra_context)
+            add_never_cache_headers(response)
+            return response
+
+        etag, last_modified = validators
+        response = condition(etag_func=lambda request, extra_context: etag,
+                             last_modified_func=lambda request, extra_context: last_modified)(view)(
+            request, extra_context)
+        # Kept by the browser, but revalidated every time.
+        patch_cache_control(response, private=True, no_cache=True, must_revalidate=True)
+        return response
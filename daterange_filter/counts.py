@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Strategies to count the rows of a changelist filtered by a date range.
+
+Set one of them as ``count_strategy`` on the filter and add
+``pagination.RangePaginationMixin`` to the ModelAdmin. Every strategy
+returns a ``(count, estimated)`` pair.
+
+'''
+import json
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from daterange_filter import rollup
+from daterange_filter.cache import get_cache, make_queryset_key
+
+
+class CountStrategy(object):
+
+    def count(self, queryset, filter_):
+        raise NotImplementedError
+
+
+class ExactCount(CountStrategy):
+
+    def count(self, queryset, filter_):
+        return queryset.count(), False
+
+
+class CachedCount(CountStrategy):
+    '''
+    Keeps the counts of ``strategy`` (exact by default) in the cache for
+    ``timeout`` seconds, keyed by the SQL of the counted queryset, so the
+    model, the range and every other active filter are part of the key.
+    Old entries are evicted by the cache backend (``MAX_ENTRIES``).
+    '''
+
+    def __init__(self, timeout=5 * 60, strategy=None):
+        self.timeout = timeout
+        self.strategy = strategy or ExactCount()
+
+    def count(self, queryset, filter_):
+        key = make_queryset_key('count', queryset.order_by())
+        if key is None:
+            return 0, False
+
+        cache = get_cache()
+        result = cache.get(key)
+        if result is None:
+            result = self.strategy.count(queryset, filter_)
+            cache.set(key, result, self.timeout)
+        return tuple(result)
+
+
+class EstimatedCount(CountStrategy):
+    '''
+    Returns the first estimate given by ``sources``. Each source is a
+    callable ``(queryset, filter_)`` returning a number of rows or None.
+
+    Narrow ranges, where the estimate is below ``exact_below`` rows (or where
+    there is no estimate at all), are counted exactly.
+    '''
+
+    def __init__(self, exact_below=1000, sources=None):
+        self.exact_below = exact_below
+        self.sources = sources if sources is not None else [planner_estimate]
+
+    def estimate(self, queryset, filter_):
+        for source in self.sources:
+            value = source(queryset, filter_)
+            if value is not None:
+                return value
+        return None
+
+    def count(self, queryset, filter_):
+        estimate = self.estimate(queryset, filter_)
+        if estimate is None or estimate < self.exact_below:
+            return queryset.count(), False
+        return estimate, True
+
+
+def planner_estimate(queryset, filter_):
+    '''
+    Returns the number of rows the PostgreSQL planner expects ``queryset`` to
+    return. Other databases don't give a usable estimate.
+    '''
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+        plan = cursor.fetchone()[0]
+    if not isinstance(plan, list):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def rollup_estimate(queryset, filter_):
+    '''
+    Returns the rows of the picked days according to the daily rollup. Only
+    usable when the range covers whole days and no other filter is active.
+    '''
+    day_range = filter_.get_day_range()
+    if day_range is None or filter_.has_other_filters(filter_.request.GET):
+        return None
+    return rollup.total(filter_.model, filter_.field_path, *day_range)
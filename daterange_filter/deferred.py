@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Count, histogram and extent of the range filters loaded after the page.
+
+With ``deferred_facets`` set on a filter, the changelist is rendered with a
+placeholder that the template fills from a JSON endpoint added by
+``RangeFacetsMixin``. The answers of the endpoint are cached by the active
+filters, so slow aggregates are computed once and never hold the list back.
+
+'''
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import path, reverse
+from django.utils import timezone
+
+from daterange_filter import parallel
+from daterange_filter.cache import get_cache, make_key, normalize_params
+
+
+def get_facets_key(filter_, cl):
+    return make_key('facets', filter_.model._meta.label_lower, filter_.field_path,
+                    timezone.get_current_timezone_name(), filter_.get_range(),
+                    normalize_params(filter_.get_filtering_params(cl.params)))
+
+
+def get_facets(filter_, cl):
+    '''
+    Returns the count, histogram and extent of ``filter_`` on the changelist
+    ``cl``, from the cache when possible.
+    '''
+    cache = get_cache()
+    key = get_facets_key(filter_, cl)
+    facets = cache.get(key)
+    if facets is None:
+        parallel.run_side_queries(filter_.model_admin, [filter_], ('count', 'histogram', 'extent'), cl)
+        count = filter_.side_results['count']
+        facets = filter_.build_side_facets(cl)
+        facets['count'] = {'unknown': True} if count is None else {'value': count[0], 'estimated': count[1]}
+        # The facets that ran out of time are computed again next time.
+        if not any(isinstance(facet, dict) and facet.get('unknown') for facet in facets.values()):
+            cache.set(key, facets, filter_.deferred_cache_timeout)
+    return facets
+
+
+def get_facets_url(model_admin, filter_, cl):
+    '''
+    Returns the URL of the facets of ``filter_`` keeping the filters of the
+    changelist, or None if ``model_admin`` doesn't serve them.
+    '''
+    if not isinstance(model_admin, RangeFacetsMixin):
+        return None
+    opts = model_admin.model._meta
+    name = '%s:%s_%s_daterange_facets' % (model_admin.admin_site.name, opts.app_label, opts.model_name)
+    return reverse(name, args=[filter_.field_path]) + cl.get_query_string(remove=[PAGE_VAR])
+
+
+class FilteringChangeListMixin(object):
+    '''
+    Builds the filtered queryset of the changelist without running it.
+    '''
+
+    def get_results(self, request):
+        self.result_count = self.full_result_count = None
+        self.result_list = []
+
+
+class RangeFacetsMixin(object):
+    '''
+    ModelAdmin mixin adding the ``facets/<field_path>/`` JSON view of the
+    filters with ``deferred_facets`` set.
+    '''
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('facets/<str:field_path>/', self.admin_site.admin_view(self.facets_view),
+                 name='%s_%s_daterange_facets' % info),
+        ] + super(RangeFacetsMixin, self).get_urls()
+
+    def get_changelist(self, request, **kwargs):
+        changelist = super(RangeFacetsMixin, self).get_changelist(request, **kwargs)
+        if getattr(request, 'daterange_filter_facets', False):
+            return type('Filtering%s' % changelist.__name__, (FilteringChangeListMixin, changelist), {})
+        return changelist
+
+    def facets_view(self, request, field_path):
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        request.daterange_filter_facets = True
+        cl = self.get_changelist_instance(request)
+        for filter_ in getattr(request, 'daterange_filters', None) or []:
+            if filter_.field_path == field_path and filter_.deferred_facets:
+                break
+        else:
+            raise Http404
+        facets = get_facets(filter_, cl)
+        data = dict(facets, html=render_to_string('daterange_filter/facets.html', {'i': facets}, request))
+        return JsonResponse(data, encoder=DjangoJSONEncoder)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Cached ``Min``/``Max`` extent of the filtered fields.
+
+The extent is kept in the cache until its timeout or until a saved row
+falls outside of it. Bulk operations (``update``, ``bulk_create``, raw SQL)
+don't send signals, and new rows usually land after the cached max, so the
+extent only ever skips the ranges ending before its min: the upper side is
+never trusted.
+
+'''
+from django.contrib.admin.sites import all_sites
+from django.contrib.admin.utils import NotRelationField, get_fields_from_path
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Max, Min
+from django.db.models.signals import post_delete, post_save
+
+from daterange_filter.cache import get_cache, make_key
+
+# Model owning the date column -> (model, field_path) pairs using it.
+_tracked = {}
+
+
+def extent_key(model, field_path):
+    return make_key('extent', model._meta.label_lower, field_path)
+
+
+def get_extent(model, field, field_path, timeout):
+    '''
+    Returns the ``(min, max)`` values of ``field_path`` on ``model``, both
+    None if there are no rows.
+    '''
+    track(model, field, field_path)
+    cache = get_cache()
+    key = extent_key(model, field_path)
+    extent = cache.get(key)
+    if extent is None:
+        extent = model._default_manager.aggregate(
+            drf_min=Min(field_path), drf_max=Max(field_path))
+        extent = (extent['drf_min'], extent['drf_max'])
+        cache.set(key, extent, timeout)
+    return tuple(extent)
+
+
+def clamp(start, end, extent):
+    '''
+    Returns the half-open ``[start, end)`` boundaries with ``start`` raised
+    to the min of the ``extent``, or None if they end before it. The max may
+    be stale, so ``end`` is kept as is. Open boundaries stay open.
+    '''
+    lowest = extent[0]
+    if lowest is None:
+        # Rows may have been added since the table was seen empty.
+        return start, end
+    if end is not None and end <= lowest:
+        return None
+    if start is not None:
+        start = max(start, lowest)
+    return start, end
+
+
+def track_registered(sites=None):
+    '''
+    Tracks the fields of the filters with ``use_extent`` registered on
+    ``sites`` (every admin site by default). The filters track their field
+    when built, so only the processes never building them (workers, ...)
+    need it, called from the ``ready()`` of an app after the admin modules
+    are imported.
+    '''
+    from daterange_filter.filter import registered_fields
+
+    for site in (sites if sites is not None else list(all_sites)):
+        for model, field_path in registered_fields(site, lambda filter_class: filter_class.use_extent):
+            try:
+                field = get_fields_from_path(model, field_path)[-1]
+            except (FieldDoesNotExist, NotRelationField):
+                continue
+            track(model, field, field_path)
+
+
+def track(model, field, field_path):
+    '''
+    Invalidates the extent of ``field_path`` when a row of the model owning
+    ``field`` is saved outside of it or deleted on one of its edges.
+    '''
+    owner = field.model
+    pairs = _tracked.setdefault(owner, set())
+    if (model, field_path) in pairs:
+        return
+    pairs.add((model, field_path))
+    uid = 'daterange_filter_extent_%s' % owner._meta.label_lower
+    post_save.connect(_saved, sender=owner, weak=False, dispatch_uid=uid)
+    post_delete.connect(_deleted, sender=owner, weak=False, dispatch_uid=uid)
+
+
+def _invalidate(sender, instance, outside):
+    cache = get_cache()
+    for model, field_path in _tracked.get(sender, ()):
+        key = extent_key(model, field_path)
+        extent = cache.get(key)
+        if extent is None:
+            continue
+        field = get_fields_from_path(model, field_path)[-1]
+        value = getattr(instance, field.attname)
+        try:
+            stale = value is None or outside(value, extent)
+        except TypeError:
+            # The value wasn't converted to a date yet.
+            stale = True
+        if stale:
+            cache.delete(key)
+
+
+def _saved(sender, instance, **kwargs):
+    _invalidate(sender, instance, lambda value, extent: (
+        extent[0] is None or value < extent[0] or value > extent[1]))
+
+
+def _deleted(sender, instance, **kwargs):
+    # A wider extent than the real one is still correct, it only has to be
+    # refreshed when one of its edges may be gone.
+    _invalidate(sender, instance, lambda value, extent: value in extent)
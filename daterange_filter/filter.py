@@ -5,15 +5,26 @@
 Has the filter that allows to filter by a date range.
 
 '''
-import copy
-import datetime
 import django
 from django import forms
 from django.contrib import admin
+from django.contrib.admin.views.main import (
+    ALL_VAR, ERROR_FLAG, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, TO_FIELD_VAR)
 from django.db import models
-from django.utils.translation import gettext as _
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_date
+from django.utils.translation import get_language, gettext_lazy
 from django.conf import settings
 
+from daterange_filter import (
+    deferred, exists, export, extent, histogram, instrumentation, intervals, media, parsing, presets,
+    resultcache, rollup)
+from daterange_filter.cache import get_cache, make_key, normalize_params
+from daterange_filter.pagination import decode_cursor
+from daterange_filter.ranges import (
+    compile_boundaries, is_empty, to_date, to_day_range, to_lookups)
+
 use_suit = 'DATE_RANGE_FILTER_USE_WIDGET_SUIT'
 
 if hasattr(settings, use_suit):
@@ -38,6 +49,12 @@ except ImportError:
 # Django doesn't deal well with filter params that look like queryset lookups.
 FILTER_PREFIX = 'drf__'
 
+# Returned instead of the range boundaries when nothing can match.
+EMPTY_RANGE = object()
+
+# Changelist parameters that don't change which rows are listed.
+DISPLAY_PARAMS = (ALL_VAR, ERROR_FLAG, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, TO_FIELD_VAR)
+
 
 def clean_input_prefix(input_):
     return dict((key.split(FILTER_PREFIX)[1] if key.startswith(FILTER_PREFIX) else key, val)
@@ -51,51 +68,89 @@ class DateRangeFilterAdminSplitDateTime(AdminSplitDateTime):
                            '', rendered_widgets[1])
 
 
+class DateRangeFilterSplitDateTimeField(parsing.DateTimeField):
+    '''
+    DateTimeField that accepts the ``[date, time]`` pair posted by a split
+    widget. A missing time means the start of the day.
+    '''
+    def to_python(self, value):
+        if isinstance(value, (list, tuple)):
+            if len(value) != 2:
+                raise forms.ValidationError(self.error_messages['invalid'], code='invalid')
+            value = ' '.join(part.strip() for part in value if part and part.strip())
+        return super(DateRangeFilterSplitDateTimeField, self).to_python(value)
+
+
+# The form classes by form class, field name and widgets, see get_form_class.
+_form_classes = {}
+
+
+def get_form_class(form_class, field_name):
+    """
+    Return the subclass of ``form_class`` declaring the range fields of
+    ``field_name``, generated once per widget backend.
+    """
+    key = (form_class, field_name, AdminDateWidget, AdminSplitDateTime)
+    generated = _form_classes.get(key)
+    if generated is None:
+        generated = _form_classes[key] = type(form_class)(
+            form_class.__name__, (form_class,), dict(form_class.get_fields(field_name), field_name=field_name))
+    return generated
+
+
 class DateRangeFilterBaseForm(forms.Form):
+    # Set on the classes generated by get_form_class.
+    field_name = None
+
+    def __new__(cls, *args, **kwargs):
+        field_name = kwargs.get('field_name')
+        if field_name is not None and cls.field_name is None:
+            cls = get_form_class(cls, field_name)
+        return super(DateRangeFilterBaseForm, cls).__new__(cls)
+
     def __init__(self, request, *args, **kwargs):
+        kwargs.pop('field_name', None)
         super(DateRangeFilterBaseForm, self).__init__(*args, **kwargs)
         self.request = request
 
+    @classmethod
+    def get_fields(cls, field_name):
+        return {}
+
     @property
     def media(self):
-        try:
-            if getattr(self.request, 'daterange_filter_media_included'):
-                return forms.Media()
-        except AttributeError:
-            setattr(self.request, 'daterange_filter_media_included', True)
-
-            js = ["calendar.js", "admin/DateTimeShortcuts.js"]
-            css = ['widgets.css']
+        js = ["calendar.js", "admin/DateTimeShortcuts.js"]
+        css = ['widgets.css']
 
-            return forms.Media(
-                js=["admin/js/%s" % path for path in js],
-                css={'all': ["admin/css/%s" % path for path in css]}
-            )
+        # Rendered once per request, see media.py.
+        return media.claim(self.request, forms.Media(
+            js=["admin/js/%s" % path for path in js],
+            css={'all': ["admin/css/%s" % path for path in css]}
+        ))
 
 
 class DateRangeForm(DateRangeFilterBaseForm):
 
-    def __init__(self, *args, **kwargs):
-        field_name = kwargs.pop('field_name')
-        super(DateRangeForm, self).__init__(*args, **kwargs)
-
-        self.fields['%s%s__gte' % (FILTER_PREFIX, field_name)] = forms.DateField(
-            label='',
-            widget=AdminDateWidget(
-                attrs={'placeholder': _('From date')}
+    @classmethod
+    def get_fields(cls, field_name):
+        return {
+            '%s%s__gte' % (FILTER_PREFIX, field_name): parsing.DateField(
+                label='',
+                widget=AdminDateWidget(
+                    attrs={'placeholder': gettext_lazy('From date')}
+                ),
+                localize=True,
+                required=False
             ),
-            localize=True,
-            required=False
-        )
-
-        self.fields['%s%s__lte' % (FILTER_PREFIX, field_name)] = forms.DateField(
-            label='',
-            widget=AdminDateWidget(
-                attrs={'placeholder': _('To date')}
+            '%s%s__lte' % (FILTER_PREFIX, field_name): parsing.DateField(
+                label='',
+                widget=AdminDateWidget(
+                    attrs={'placeholder': gettext_lazy('To date')}
+                ),
+                localize=True,
+                required=False,
             ),
-            localize=True,
-            required=False,
-        )
+        }
 
     # Django 1.4 can't handle media inheritance well. We have to do it manually.
     if django.VERSION < (1, 5):
@@ -106,27 +161,26 @@ class DateRangeForm(DateRangeFilterBaseForm):
 
 class DateTimeRangeForm(DateRangeFilterBaseForm):
 
-    def __init__(self, *args, **kwargs):
-        field_name = kwargs.pop('field_name')
-        super(DateTimeRangeForm, self).__init__(*args, **kwargs)
-
-        self.fields['%s%s__gte' % (FILTER_PREFIX, field_name)] = forms.DateTimeField(
-            label='',
-            widget=DateRangeFilterAdminSplitDateTime(
-                attrs={'placeholder': _('From date')}
+    @classmethod
+    def get_fields(cls, field_name):
+        return {
+            '%s%s__gte' % (FILTER_PREFIX, field_name): DateRangeFilterSplitDateTimeField(
+                label='',
+                widget=DateRangeFilterAdminSplitDateTime(
+                    attrs={'placeholder': gettext_lazy('From date')}
+                ),
+                localize=True,
+                required=False
             ),
-            localize=True,
-            required=False
-        )
-
-        self.fields['%s%s__lte' % (FILTER_PREFIX, field_name)] = forms.DateTimeField(
-            label='',
-            widget=DateRangeFilterAdminSplitDateTime(
-                attrs={'placeholder': _('To date')},
+            '%s%s__lte' % (FILTER_PREFIX, field_name): DateRangeFilterSplitDateTimeField(
+                label='',
+                widget=DateRangeFilterAdminSplitDateTime(
+                    attrs={'placeholder': gettext_lazy('To date')},
+                ),
+                localize=True,
+                required=False
             ),
-            localize=True,
-            required=False
-        )
+        }
 
     # Django 1.4 can't handle media inheritance well. We have to do it manually.
     if django.VERSION < (1, 5):
@@ -135,85 +189,584 @@ class DateTimeRangeForm(DateRangeFilterBaseForm):
             return super(DateTimeRangeForm, self).media
 
 
-class DateRangeFilter(admin.filters.FieldListFilter):
+class DateRangeFilterBase(admin.filters.FieldListFilter):
     template = 'daterange_filter/filter.html'
 
+    # Render a day/week/month histogram of the changelist under the form.
+    histogram = False
+    histogram_cache_timeout = 5 * 60
+
+    # Read the histogram from the daily rollup (see rollup.py) when no other
+    # filter is active.
+    use_rollup = False
+
+    # Keep the Min/Max of the field cached to skip ranges out of the data and
+    # show it as a hint under the form.
+    use_extent = False
+    extent_cache_timeout = 60 * 60
+
+    # A resultcache.ResultCache keeping the count and the pages of the
+    # changelist. The ModelAdmin has to use pagination.RangePaginationMixin.
+    result_cache = None
+
+    # Relative ranges rendered as quick links, as (token, label) pairs (see
+    # presets.DEFAULT_PRESETS). Any valid token is accepted when set.
+    presets = ()
+
+    # Render the count, histogram and extent from a JSON endpoint once the
+    # page is loaded. The ModelAdmin has to use deferred.RangeFacetsMixin.
+    deferred_facets = False
+    deferred_cache_timeout = 60
+
+    # Accept several ranges of days as comma separated ``first..last`` lists:
+    # ``drf__<field>__include`` for the days to include and
+    # ``drf__<field>__exclude`` for the days to exclude (see intervals.py).
+    multi_range = False
+
+    # Filter the fields reached through to-many relations with an EXISTS
+    # subquery on the related table instead of a join (see exists.py).
+    exists_subquery = True
+
+    # Paginate the changelist by (field_path, pk) instead of OFFSET and/or
+    # count it with a counts.CountStrategy. The ModelAdmin has to use
+    # pagination.RangePaginationMixin.
+    keyset_pagination = False
+    keyset_exact_count = True
+    count_strategy = None
+
+    # A shards.ShardMap of the database aliases holding the rows by ranges of
+    # the field. The ModelAdmin has to use shards.RangeShardsMixin.
+    shards = None
+
+    # Answer the changelist with 304 Not Modified while the rows of a range
+    # that ended in the past don't change, validated by their count and the
+    # latest ``modified_field``, required (see conditional.py). The ModelAdmin
+    # has to use conditional.RangeConditionalMixin.
+    conditional_get = False
+    modified_field = None
+
+    # Keep the rendered form cached by range, locale and other filters.
+    cache_fragment = False
+    fragment_cache_timeout = 5 * 60
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.model = model
+        self.model_admin = model_admin
+        self.request = request
+        self.lookup_kwarg_cursor = '%s%s__after' % (FILTER_PREFIX, field_path)
+        self.lookup_kwarg_preset = '%s%s__range' % (FILTER_PREFIX, field_path)
+        self.lookup_kwarg_include = '%s%s__include' % (FILTER_PREFIX, field_path)
+        self.lookup_kwarg_exclude = '%s%s__exclude' % (FILTER_PREFIX, field_path)
+        super(DateRangeFilterBase, self).__init__(
+            field, request, params, model, model_admin, field_path)
+        with instrumentation.timed(self, 'get_form'):
+            self.form = self.get_form(request)
+        self.valid = None
+
+        self.cursor = None
+        self.count_result = None
+        # Results of the side queries run by parallel.py, None if unknown.
+        self.side_results = {}
+        # The saves of this process invalidate the cached extents and results
+        # from now on (see extent.track_registered for the other processes).
+        if self.use_extent:
+            extent.track(model, field, field_path)
+        if self.result_cache is not None:
+            resultcache.track(model, field)
+        if self.keyset_pagination:
+            self.cursor = decode_cursor(self.used_parameters.get(self.lookup_kwarg_cursor), field, model)
+        if self.keyset_pagination or self.count_strategy is not None or self.result_cache is not None:
+            request.daterange_filter_paginated = self
+        if self.shards is not None:
+            request.daterange_filter_sharded = self
+
+        if request is not None:
+            # Let the ModelAdmin views and actions find the range filters.
+            filters = getattr(request, 'daterange_filters', None)
+            if not isinstance(filters, list):
+                filters = request.daterange_filters = []
+            filters.append(self)
+
+    def get_extra_parameters(self):
+        """
+        Return the parameters used by the filter besides the form fields.
+        """
+        parameters = []
+        if self.keyset_pagination:
+            parameters.append(self.lookup_kwarg_cursor)
+        if self.presets:
+            parameters.append(self.lookup_kwarg_preset)
+        if self.multi_range:
+            parameters.extend([self.lookup_kwarg_include, self.lookup_kwarg_exclude])
+        return parameters
+
+    def get_query_string(self, cl, new_params):
+        """
+        Return the changelist query string with ``new_params`` replacing the
+        range and the page currently selected.
+        """
+        remove = [param for param in self.expected_parameters() if param not in new_params]
+        return cl.get_query_string(new_params, remove + [PAGE_VAR])
+
+    def get_form(self, request):
+        raise NotImplementedError
+
+    @property
+    def media(self):
+        """
+        Return the CSS and JS of the filter not rendered yet on the request.
+        """
+        return media.claim(self.request, media.get_media())
+
+    def get_fragment_key(self, choice):
+        """
+        Return the cache key of the form rendered with ``choice``, or None if
+        it isn't cached.
+        """
+        if not self.cache_fragment:
+            return None
+        return make_key('fragment', self.model._meta.label_lower, self.field_path, get_language(),
+                        normalize_params(self.used_parameters), normalize_params((choice or {}).get('get_query', {})))
+
+    def get_range_params(self, start, end):
+        """
+        Return the query string parameters that select the days between
+        ``start`` and ``end``, both included.
+        """
+        raise NotImplementedError
+
+    def is_valid(self):
+        """
+        Return whether the form is valid. The form is validated only once.
+        """
+        if self.valid is None:
+            with instrumentation.timed(self, 'is_valid'):
+                self.valid = self.form.is_valid()
+        return self.valid
+
+    def get_facets(self, cl):
+        """
+        Return the extra data rendered under the form.
+        """
+        # Rendered by the timed tag of the template.
+        self.changelist = cl
+        with instrumentation.timed(self, 'facets'):
+            return self.build_facets(cl)
+
+    def build_facets(self, cl):
+        facets = {}
+        if self.presets:
+            token = self.used_parameters.get(self.lookup_kwarg_preset)
+            facets['presets'] = [{
+                'token': preset,
+                'label': label,
+                'selected': preset == token,
+                'query_string': self.get_query_string(cl, {self.lookup_kwarg_preset: preset}),
+            } for preset, label in self.presets]
+        if self.keyset_pagination:
+            facets['keyset'] = self.get_keyset_links(cl)
+        export_links = export.get_export_links(self.model_admin, cl)
+        if export_links:
+            facets['export'] = export_links
+
+        deferred_url = deferred.get_facets_url(self.model_admin, self, cl) if self.deferred_facets else None
+        if deferred_url is not None:
+            facets['deferred'] = {'url': deferred_url}
+            return facets
+        facets.update(self.build_side_facets(cl))
+        if self.count_result is not None:
+            facets['count'] = {'value': self.count_result[0], 'estimated': self.count_result[1]}
+        return facets
+
+    def build_side_facets(self, cl):
+        """
+        Return the histogram and the extent facets, ``{'unknown': True}`` for
+        the ones whose side query ran out of time.
+        """
+        facets = {}
+        if self.histogram:
+            histogram = self.get_histogram(cl)
+            facets['histogram'] = {'unknown': True} if histogram is None else histogram
+        if self.use_extent:
+            extent_ = self.get_extent()
+            if extent_ is None:
+                facets['extent'] = {'unknown': True}
+            elif extent_[0] is not None:
+                facets['extent'] = {'min': to_date(extent_[0]), 'max': to_date(extent_[1])}
+        return facets
+
+    def get_side_query(self, name, cl=None):
+        """
+        Return the callable running the side query ``name`` of the filter:
+        ``'extent'``, or on the changelist ``cl`` ``'histogram'`` or
+        ``'count'``. Return None if the filter doesn't use it.
+        """
+        if name == 'extent' and self.use_extent:
+            return lambda: extent.get_extent(self.model, self.field, self.field_path, self.extent_cache_timeout)
+        if name == 'histogram' and self.histogram and cl is not None:
+            return lambda: self.get_histogram_buckets(cl)
+        if name == 'count' and cl is not None:
+            return lambda: self.get_count(cl)
+        return None
+
+    def get_count(self, cl):
+        """
+        Return the ``(count, estimated)`` rows of the changelist ``cl``.
+        """
+        if self.shards is not None:
+            return self.shards.count(cl.queryset, self.get_shard_aliases()), False
+        if self.count_strategy is not None:
+            return self.count_strategy.count(cl.queryset, self)
+        return cl.queryset.count(), False
+
+    def count(self, queryset):
+        """
+        Count ``queryset`` with the ``count_strategy`` of the filter.
+        """
+        self.count_result = self.count_strategy.count(queryset, self)
+        return self.count_result[0]
+
+    def get_keyset_links(self, cl):
+        """
+        Return the query strings of the first and the next keyset pages.
+        """
+        links = {}
+        if self.cursor is not None:
+            links['first'] = cl.get_query_string(remove=[self.lookup_kwarg_cursor, PAGE_VAR])
+        next_cursor = getattr(getattr(cl, 'paginator', None), 'next_cursor', None)
+        if next_cursor is not None:
+            links['next'] = cl.get_query_string({self.lookup_kwarg_cursor: next_cursor}, [PAGE_VAR])
+        return links
+
+    def get_histogram_buckets(self, cl):
+        """
+        Return the ``(start, end, count)`` buckets of the histogram of the
+        changelist queryset, cached by the active filters for
+        ``histogram_cache_timeout`` seconds.
+        """
+        cache = get_cache()
+        key = make_key('histogram', self.model._meta.label_lower, self.field_path,
+                       timezone.get_current_timezone_name(), self.get_range(),
+                       normalize_params(self.get_filtering_params(cl.params)))
+        buckets = cache.get(key)
+        if buckets is None:
+            first, last = [to_date(value) for value in (self.get_range() or (None, None))]
+            days = None
+            if self.use_rollup and not self.has_other_filters(cl.params):
+                day_range = self.get_day_range()
+                if day_range is not None and rollup.is_built(self.model, self.field_path):
+                    days = rollup.daily_counts(self.model, self.field_path, *day_range)
+            if days is None:
+                days = histogram.daily_counts(cl.queryset, self.field, self.field_path)
+            buckets = histogram.build_histogram(days, first, last)[1]
+            cache.set(key, buckets, self.histogram_cache_timeout)
+        return buckets
+
+    def get_histogram(self, cl):
+        """
+        Return the bars of the histogram of the changelist queryset, or None
+        if its side query ran out of time.
+        """
+        if 'histogram' in self.side_results:
+            buckets = self.side_results['histogram']
+            if buckets is None:
+                return None
+        else:
+            buckets = self.get_histogram_buckets(cl)
+
+        highest = max([count for start, end, count in buckets] or [0])
+        return [{
+            'start': start,
+            'end': end,
+            'count': count,
+            'percent': count * 100 // highest,
+            'query_string': self.get_query_string(cl, self.get_range_params(start, end)),
+        } for start, end, count in buckets]
+
+    def get_range(self):
+        """
+        Return the ``(since, upto)`` values picked on the form or the days of
+        the picked preset, both of them included, or None if the form or the
+        preset are invalid.
+        """
+        token = self.used_parameters.get(self.lookup_kwarg_preset) if self.presets else None
+        if token:
+            return presets.resolve(token)
+        if not self.is_valid():
+            return None
+        cleaned_data = self.form.cleaned_data
+        return (cleaned_data.get(self.lookup_kwarg_since) or None,
+                cleaned_data.get(self.lookup_kwarg_upto) or None)
+
+    def get_day_range(self):
+        """
+        Return the ``(first, last)`` days picked on the form, or None if the
+        form is invalid or the range doesn't cover whole days.
+        """
+        range_ = self.get_range()
+        if range_ is None or self.uses_intervals():
+            return None
+        return to_day_range(*range_)
+
+    def uses_intervals(self):
+        return self.multi_range and any(
+            self.used_parameters.get(param) for param in (self.lookup_kwarg_include, self.lookup_kwarg_exclude))
+
+    def parse_intervals(self, value):
+        """
+        Return the half-open intervals of the comma separated ``first..last``
+        days of ``value``. Any of both days can be left out, a single day
+        stands for itself and blank items are skipped. Raise ValueError if a
+        day is invalid or there is none.
+        """
+        result = []
+        for part in value.split(','):
+            if not part.strip():
+                # A stray comma, not an interval of every day.
+                continue
+            first, separator, last = part.strip().partition('..')
+            if not separator:
+                last = first
+            days = []
+            for day in (first.strip(), last.strip()):
+                if day and parse_date(day) is None:
+                    raise ValueError('Invalid day %r' % day)
+                days.append(parse_date(day) if day else None)
+            result.append(compile_boundaries(self.field, *days))
+        if not result:
+            raise ValueError('No day in %r' % value)
+        return intervals.normalize(result)
+
+    def get_intervals(self):
+        """
+        Return the normalized half-open intervals picked with the include and
+        exclude parameters, within the range picked on the form, or None if
+        none is picked. Raise ValueError if they are invalid.
+        """
+        if not self.uses_intervals():
+            return None
+        range_ = self.get_range()
+        if range_ is None:
+            raise ValueError('Invalid range')
+        include = self.used_parameters.get(self.lookup_kwarg_include)
+        exclude = self.used_parameters.get(self.lookup_kwarg_exclude)
+        picked = intervals.subtract(self.parse_intervals(include) if include else intervals.EVERYTHING,
+                                    self.parse_intervals(exclude) if exclude else [])
+        picked = intervals.intersect(picked, [compile_boundaries(self.field, *range_)])
+        extent_ = self.get_extent() if self.use_extent and picked else None
+        if extent_ is not None and extent_[0] is not None:
+            # Only the min is trusted, see extent.py.
+            picked = intervals.intersect(picked, [(extent_[0], None)])
+        return picked
+
+    def get_filtering_params(self, params):
+        """
+        Return the changelist ``params`` that filter its rows, without the
+        ones only picking how they are displayed (page, ordering, cursor...).
+        """
+        return dict((key, value) for key, value in params.items()
+                    if key not in DISPLAY_PARAMS and key != self.lookup_kwarg_cursor)
+
+    def has_other_filters(self, params):
+        """
+        Return whether the changelist ``params`` filter by something else than
+        this filter.
+        """
+        own_params = self.expected_parameters()
+        return any(value not in ('', None) for key, value in params.items()
+                   if key not in own_params and key not in DISPLAY_PARAMS)
+
+    def get_extent(self):
+        """
+        Return the ``(min, max)`` values of the field, or None if its side
+        query ran out of time (see parallel.py).
+        """
+        if 'extent' in self.side_results:
+            return self.side_results['extent']
+        return extent.get_extent(self.model, self.field, self.field_path, self.extent_cache_timeout)
+
+    def get_boundaries(self):
+        """
+        Return the half-open ``(start, end)`` boundaries of the picked range,
+        None if the form is invalid or EMPTY_RANGE if it can't match any row.
+
+        With several intervals picked, return the smallest range covering all
+        of them.
+        """
+        try:
+            picked = self.get_intervals()
+        except ValueError:
+            return None
+        if picked is not None:
+            return intervals.hull(picked) or EMPTY_RANGE
+
+        range_ = self.get_range()
+        if range_ is None:
+            return None
+        start, end = compile_boundaries(self.field, *range_)
+        if is_empty(start, end):
+            return EMPTY_RANGE
+        extent_ = self.get_extent() if self.use_extent and (start is not None or end is not None) else None
+        if extent_ is not None:
+            boundaries = extent.clamp(start, end, extent_)
+            if boundaries is None:
+                return EMPTY_RANGE
+            start, end = boundaries
+        return start, end
+
+    def get_shard_aliases(self):
+        """
+        Return the aliases of the shards holding the rows of the picked range.
+        """
+        boundaries = self.get_boundaries()
+        if boundaries is EMPTY_RANGE:
+            return []
+        return self.shards.prune(*(boundaries or (None, None)))
+
+    def get_filter_params(self):
+        """
+        Return the half-open lookups for the picked range, None if the form is
+        invalid or EMPTY_RANGE if it can't match any row.
+        """
+        boundaries = self.get_boundaries()
+        if boundaries is None or boundaries is EMPTY_RANGE:
+            return boundaries
+        return to_lookups(self.field_path, *boundaries)
+
+    @cached_property
+    def related_lookup(self):
+        """
+        Return the ``(related_model, lookup)`` of the EXISTS subquery, or None
+        if the field isn't reached through a to-many relation.
+        """
+        if not self.exists_subquery:
+            return None
+        return exists.get_related_lookup(self.model, self.field_path)
+
+    @property
+    def uses_exists(self):
+        return self.related_lookup is not None
+
+    def queryset(self, request, queryset):
+        with instrumentation.timed(self, 'queryset') as data:
+            queryset = self.filter_queryset(queryset)
+            if instrumentation.is_enabled():
+                data['sql'] = instrumentation.get_sql(queryset)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        boundaries = self.get_boundaries()
+        if boundaries is None:
+            return queryset
+        if boundaries is EMPTY_RANGE:
+            return queryset.none()
+        picked = self.get_intervals()
+        if self.uses_exists:
+            if picked is None:
+                if boundaries == (None, None):
+                    return queryset
+                picked = [boundaries]
+            related_model, lookup = self.related_lookup
+            return exists.filter_exists(queryset, self.field_path, related_model, lookup,
+                                        intervals.to_q(self.field.name, picked))
+        if picked is not None and len(picked) > 1:
+            return queryset.filter(intervals.to_q(self.field_path, picked))
+        return queryset.filter(**to_lookups(self.field_path, *boundaries))
+
+
+class DateRangeFilter(DateRangeFilterBase):
+
     def __init__(self, field, request, params, model, model_admin, field_path):
         self.lookup_kwarg_since = '%s%s__gte' % (FILTER_PREFIX, field_path)
         self.lookup_kwarg_upto = '%s%s__lte' % (FILTER_PREFIX, field_path)
         super(DateRangeFilter, self).__init__(
             field, request, params, model, model_admin, field_path)
-        self.form = self.get_form(request)
+        self.own_parameters = frozenset([
+            self.lookup_kwarg_since, self.lookup_kwarg_upto, self.lookup_kwarg_cursor, self.lookup_kwarg_preset,
+            self.lookup_kwarg_include, self.lookup_kwarg_exclude, PAGE_VAR])
 
     def choices(self, cl):
         """
         Pop the original parameters, and return the date filter & other filter
         parameters.
         """
-        hidden_params = copy.deepcopy(cl.params)
-        hidden_params.pop(self.lookup_kwarg_since, None)
-        hidden_params.pop(self.lookup_kwarg_upto, None)
-        return ({
-            'get_query': hidden_params,
-        }, )
+        # The values are strings, a shallow copy leaves cl.params untouched.
+        own_params = self.own_parameters
+        choice = self.get_facets(cl)
+        choice['get_query'] = dict((key, value) for key, value in cl.params.items() if key not in own_params)
+        return (choice, )
 
     def expected_parameters(self):
-        return [self.lookup_kwarg_since, self.lookup_kwarg_upto]
+        return [self.lookup_kwarg_since, self.lookup_kwarg_upto] + self.get_extra_parameters()
 
     def get_form(self, request):
         return DateRangeForm(request, data=self.used_parameters,
                              field_name=self.field_path)
 
-    def queryset(self, request, queryset):
-        if self.form.is_valid():
-            # get no null params
-            filter_params = clean_input_prefix(dict(filter(lambda x: bool(x[1]), self.form.cleaned_data.items())))
-
-            # filter by upto included
-            lookup_upto = self.lookup_kwarg_upto.replace(FILTER_PREFIX, '')
-            if filter_params.get(lookup_upto) is not None:
-                lookup_kwarg_upto_value = filter_params.pop(lookup_upto)
-                filter_params['%s__lt' % self.field_path] = lookup_kwarg_upto_value + datetime.timedelta(days=1)
-            return queryset.filter(**filter_params)
-        else:
-            return queryset
+    def get_range_params(self, start, end):
+        return {
+            self.lookup_kwarg_since: start.isoformat(),
+            self.lookup_kwarg_upto: end.isoformat(),
+        }
 
 
-class DateTimeRangeFilter(admin.filters.FieldListFilter):
-    template = 'daterange_filter/filter.html'
+class DateTimeRangeFilter(DateRangeFilterBase):
 
     def __init__(self, field, request, params, model, model_admin, field_path):
-        self.lookup_kwarg_since_0 = '%s%s__gte_0' % (FILTER_PREFIX, field_path)
-        self.lookup_kwarg_since_1 = '%s%s__gte_1' % (FILTER_PREFIX, field_path)
-        self.lookup_kwarg_upto_0 = '%s%s__lte_0' % (FILTER_PREFIX, field_path)
-        self.lookup_kwarg_upto_1 = '%s%s__lte_1' % (FILTER_PREFIX, field_path)
+        self.lookup_kwarg_since = '%s%s__gte' % (FILTER_PREFIX, field_path)
+        self.lookup_kwarg_upto = '%s%s__lte' % (FILTER_PREFIX, field_path)
+        self.lookup_kwarg_since_0 = '%s_0' % self.lookup_kwarg_since
+        self.lookup_kwarg_since_1 = '%s_1' % self.lookup_kwarg_since
+        self.lookup_kwarg_upto_0 = '%s_0' % self.lookup_kwarg_upto
+        self.lookup_kwarg_upto_1 = '%s_1' % self.lookup_kwarg_upto
 
         super(DateTimeRangeFilter, self).__init__(
             field, request, params, model, model_admin, field_path)
-        self.form = self.get_form(request)
 
     def choices(self, cl):
-        return []
+        facets = self.get_facets(cl)
+        return (facets, ) if facets else []
 
     def expected_parameters(self):
         return [self.lookup_kwarg_since_0, self.lookup_kwarg_since_1,
-                self.lookup_kwarg_upto_0, self.lookup_kwarg_upto_1]
+                self.lookup_kwarg_upto_0, self.lookup_kwarg_upto_1] + self.get_extra_parameters()
 
     def get_form(self, request):
         return DateTimeRangeForm(request, data=self.used_parameters, field_name=self.field_path)
 
+    def get_range_params(self, start, end):
+        return {
+            self.lookup_kwarg_since_0: start.isoformat(),
+            self.lookup_kwarg_since_1: '00:00:00',
+            self.lookup_kwarg_upto_0: end.isoformat(),
+            self.lookup_kwarg_upto_1: '23:59:59',
+        }
+
     def queryset(self, request, queryset):
         if not self.form.data:
             # not display errors when page is loaded for the first time
+            self.is_valid()
             for key in self.form.errors:
                 self.form.errors[key] = ''
 
-        if self.form.is_valid():
-            # get no null params
-            filter_params = clean_input_prefix(dict(filter(lambda x: bool(x[1]), self.form.cleaned_data.items())))
-            return queryset.filter(**filter_params)
-        else:
-            return queryset
+        return super(DateTimeRangeFilter, self).queryset(request, queryset)
+
+
+def registered_fields(site=None, predicate=None):
+    """
+    Returns the ``(model, field_path)`` pairs registered on the ``site``
+    ModelAdmins (``admin.site`` by default) with one of the range filters,
+    only those whose filter class passes ``predicate`` when given.
+    """
+    site = site or admin.site
+    pairs = []
+    for model, model_admin in site._registry.items():
+        for item in model_admin.list_filter:
+            if (isinstance(item, (list, tuple)) and isinstance(item[1], type) and
+                    issubclass(item[1], DateRangeFilterBase) and (predicate is None or predicate(item[1]))):
+                if (model, item[0]) not in pairs:
+                    pairs.append((model, item[0]))
+    return pairs
 
 
 # register the filters
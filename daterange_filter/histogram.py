@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Per day/week/month counts of a queryset, computed from a single GROUP BY.
+
+'''
+import datetime
+
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+from daterange_filter.ranges import is_datetime_field
+
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+
+# The widest span (in days) still shown with a bar per day/week.
+MAX_DAY_SPAN = 31
+MAX_WEEK_SPAN = 26 * 7
+
+
+def get_bucket_kind(first, last):
+    '''
+    Returns the bucket size that keeps the histogram readable for the days
+    between ``first`` and ``last``.
+    '''
+    span = (last - first).days + 1
+    if span <= MAX_DAY_SPAN:
+        return DAY
+    if span <= MAX_WEEK_SPAN:
+        return WEEK
+    return MONTH
+
+
+def bucket_start(day, kind):
+    if kind == WEEK:
+        return day - datetime.timedelta(days=day.weekday())
+    if kind == MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def bucket_end(start, kind):
+    '''
+    Returns the last day (included) of the bucket starting on ``start``.
+    '''
+    if kind == WEEK:
+        return start + datetime.timedelta(days=6)
+    if kind == MONTH:
+        next_month = (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        return next_month - datetime.timedelta(days=1)
+    return start
+
+
+def daily_counts(queryset, field, field_path):
+    '''
+    Returns a list of ``(day, count)`` for ``queryset`` ordered by day.
+
+    Datetime columns are bucketed on the local date of the active timezone.
+    '''
+    if is_datetime_field(field):
+        day = TruncDate(field_path)
+    else:
+        day = F(field_path)
+    rows = (queryset.order_by()
+            .annotate(drf_day=day)
+            .values('drf_day')
+            .annotate(drf_count=Count('pk'))
+            .order_by('drf_day')
+            .values_list('drf_day', 'drf_count'))
+    return [(day, count) for day, count in rows if day is not None]
+
+
+def rollup(days, kind):
+    '''
+    Sums the ``(day, count)`` pairs of ``days`` into buckets of ``kind``.
+    Returns a list of ``(start, end, count)`` ordered by date.
+    '''
+    buckets = []
+    for day, count in days:
+        start = bucket_start(day, kind)
+        if buckets and buckets[-1][0] == start:
+            buckets[-1][2] += count
+        else:
+            buckets.append([start, bucket_end(start, kind), count])
+    return [tuple(bucket) for bucket in buckets]
+
+
+def build_histogram(days, first=None, last=None):
+    '''
+    Returns ``(kind, buckets)`` for the daily counts in ``days``. The bucket
+    size is chosen from ``first``/``last`` (the picked range), falling back
+    to the days that actually have rows.
+    '''
+    if not days:
+        return DAY, []
+    first = first or days[0][0]
+    last = last or days[-1][0]
+    kind = get_bucket_kind(first, last)
+    return kind, rollup(days, kind)
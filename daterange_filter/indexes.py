@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Finds the fields filtered with the range filters that have no index the
+database can use for the range, and builds the migrations adding them.
+
+A field counts as indexed when it is the leading column of an index or a
+unique constraint, or follows only the fields filtered by equality on the
+same ModelAdmin: a btree index on ``(name, day)`` can't serve a range on
+``day`` alone, but serves it along with a ``name`` filter.
+
+The migrations are only written for the apps of the project: those
+installed in the Python library (Django's contrib apps, third-party
+packages) have to be named explicitly.
+
+'''
+import os
+import sysconfig
+
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.admin.sites import all_sites
+from django.contrib.admin.utils import NotRelationField, get_fields_from_path
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.migrations import AddIndex, Migration
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from daterange_filter.filter import registered_fields
+
+
+def index_columns(model):
+    '''
+    Returns the names of the fields of every index and unique constraint of
+    ``model``, in their order.
+    '''
+    opts = model._meta
+    columns = []
+    for field in opts.local_fields:
+        if field.primary_key or field.unique or field.db_index:
+            columns.append((field.name,))
+    for index in opts.indexes:
+        if index.fields and not index.condition:
+            columns.append(tuple(name.lstrip('-') for name in index.fields))
+    for constraint in opts.constraints:
+        if isinstance(constraint, models.UniqueConstraint) and constraint.fields and not constraint.condition:
+            columns.append(tuple(constraint.fields))
+    for fields in tuple(opts.index_together) + tuple(opts.unique_together):
+        if fields:
+            columns.append(tuple(fields))
+    return columns
+
+
+def is_indexed(field, co_filters=()):
+    '''
+    Returns whether ``field`` leads an index of its model, or only follows
+    fields of ``co_filters``, the fields filtered by equality along with it.
+    '''
+    for columns in index_columns(field.model):
+        if field.name in columns and set(columns[:columns.index(field.name)]) <= set(co_filters):
+            return True
+    return False
+
+
+def get_co_filters(model_admin, field):
+    '''
+    Returns the names of the fields of the model of ``field`` filtered by
+    equality on the same ModelAdmin, to put in front of a composite index.
+    '''
+    co_filters = []
+    if field.model is not model_admin.model._meta.concrete_model:
+        return co_filters
+    for item in model_admin.list_filter:
+        if not isinstance(item, str):
+            continue
+        try:
+            other = field.model._meta.get_field(item)
+        except FieldDoesNotExist:
+            continue
+        if other.concrete and not other.many_to_many and not isinstance(other, models.DateField):
+            co_filters.append(other.name)
+    return co_filters
+
+
+def missing_indexes(sites=None):
+    '''
+    Returns ``(model, field_path, field, co_filters)`` for every field used
+    with the range filters on ``sites`` (every admin site by default) without
+    a usable index. ``field`` is the filtered field, at the end of
+    ``field_path``.
+    '''
+    if sites is None:
+        sites = list(all_sites) or [admin.site]
+    missing = []
+    seen = set()
+    for site in sites:
+        for model, field_path in registered_fields(site):
+            try:
+                field = get_fields_from_path(model, field_path)[-1]
+            except (FieldDoesNotExist, NotRelationField):
+                continue
+            owner = field.model._meta
+            if not owner.managed or owner.proxy or not field.concrete:
+                continue
+            co_filters = get_co_filters(site._registry[model], field)
+            if is_indexed(field, co_filters) or (field.model, field.name) in seen:
+                continue
+            seen.add((field.model, field.name))
+            missing.append((model, field_path, field, co_filters))
+    return missing
+
+
+def check_indexes(app_configs=None, **kwargs):
+    errors = []
+    for model, field_path, field, co_filters in missing_indexes():
+        if app_configs is not None and apps.get_app_config(field.model._meta.app_label) not in app_configs:
+            continue
+        errors.append(checks.Warning(
+            "'%s' is filtered with a date range filter on %s but has no index." % (
+                field_path, model._meta.label),
+            hint="Add db_index=True to %s.%s, or run 'manage.py daterange_indexes' to generate a migration." % (
+                field.model._meta.label, field.name),
+            obj=field,
+            id='daterange_filter.W001',
+        ))
+    return errors
+
+
+def get_index(field, co_filters=()):
+    '''
+    Returns the ``models.Index`` on ``field``, after the equality
+    ``co_filters`` when given.
+    '''
+    index = models.Index(fields=list(co_filters) + [field.name], name='')
+    index.set_name_with_model(field.model)
+    return index
+
+
+def is_project_app(app_config):
+    '''
+    Returns whether ``app_config`` is an app of the project, not installed in
+    the Python library.
+    '''
+    libraries = set(sysconfig.get_paths()[name] for name in ('stdlib', 'purelib', 'platlib'))
+    path = os.path.realpath(app_config.path)
+    for library in libraries:
+        library = os.path.realpath(library)
+        if path == library or path.startswith(library + os.sep):
+            return False
+    return True
+
+
+def get_operations(missing, composite=False):
+    '''
+    Returns the AddIndex operations creating the ``missing`` indexes, by app
+    label.
+    '''
+    operations = {}
+    for model, field_path, field, co_filters in missing:
+        index = get_index(field, co_filters if composite else ())
+        operations.setdefault(field.model._meta.app_label, []).append(
+            AddIndex(field.model._meta.model_name, index))
+    return operations
+
+
+def get_migration(app_label, operations, loader=None, name='daterange_indexes'):
+    '''
+    Returns the MigrationWriter of a migration of ``app_label`` running
+    ``operations`` after its latest migrations.
+    '''
+    loader = loader or MigrationLoader(None, ignore_no_migrations=True)
+    leaves = loader.graph.leaf_nodes(app_label)
+    number = 1
+    if leaves:
+        number = max(MigrationAutodetector.parse_number(leaf[1]) or 0 for leaf in leaves) + 1
+    migration = Migration('%04d_%s' % (number, name), app_label)
+    migration.dependencies = leaves
+    migration.operations = operations
+    return MigrationWriter(migration)
+
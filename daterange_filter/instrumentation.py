@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Timings of the work done by the range filters on every request.
+
+The ``timing`` signal is sent after each phase (``get_form``, ``is_valid``,
+``queryset`` and ``render``) with the filter, the phase, its ``duration`` in
+seconds and phase specific data: the generated ``sql`` for ``queryset`` and
+the ``rows`` listed on the page and the ``result_count`` of the changelist
+for ``render``. Nothing is measured when the signal has no receivers.
+
+The adapters below are receivers ready to be connected, for instance from
+``AppConfig.ready``::
+
+    LoggingAdapter().connect()
+    StatsdAdapter(statsd.StatsClient()).connect()
+
+'''
+import logging
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.core.exceptions import EmptyResultSet
+from django.dispatch import Signal
+
+timing = Signal()
+
+Measure = namedtuple('Measure', 'model field_path phase duration data')
+
+
+def is_enabled():
+    return timing.has_listeners()
+
+
+@contextmanager
+def timed(filter_, phase):
+    '''
+    Times the enclosed block and sends it as ``phase`` of ``filter_``. The
+    yielded dict receives the data sent along with the duration.
+    '''
+    if not is_enabled():
+        yield {}
+        return
+    data = {}
+    started = time.perf_counter()
+    yield data
+    duration = time.perf_counter() - started
+    timing.send(sender=filter_.__class__, filter=filter_, phase=phase, duration=duration, **data)
+
+
+def get_sql(queryset):
+    try:
+        return str(queryset.query)
+    except EmptyResultSet:
+        return None
+
+
+class Adapter(object):
+
+    def connect(self):
+        timing.connect(self, weak=False, dispatch_uid=id(self))
+        return self
+
+    def disconnect(self):
+        timing.disconnect(dispatch_uid=id(self))
+
+    def __enter__(self):
+        return self.connect()
+
+    def __exit__(self, *exc_info):
+        self.disconnect()
+
+    def __call__(self, sender, filter, phase, duration, signal=None, **data):
+        self.record(Measure(filter.model._meta.label_lower, filter.field_path, phase, duration, data))
+
+    def record(self, measure):
+        raise NotImplementedError
+
+
+class Collector(Adapter):
+    '''
+    Keeps the measures in memory, mainly for tests::
+
+        with Collector() as collector:
+            client.get(changelist_url)
+        collector.phases()
+    '''
+
+    def __init__(self):
+        self.measures = []
+
+    def record(self, measure):
+        self.measures.append(measure)
+
+    def phases(self):
+        return [measure.phase for measure in self.measures]
+
+    def get(self, phase):
+        return [measure for measure in self.measures if measure.phase == phase]
+
+
+class LoggingAdapter(Adapter):
+    '''
+    Logs every measure on ``logger`` (``daterange_filter`` by default).
+    '''
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger('daterange_filter')
+        self.level = level
+
+    def record(self, measure):
+        self.logger.log(self.level, '%s.%s %s: %.3fms', measure.model, measure.field_path, measure.phase,
+                        measure.duration * 1000, extra={'daterange_filter': measure._asdict()})
+
+
+class StatsdAdapter(Adapter):
+    '''
+    Sends the durations as timers, and the rows as gauges, to a StatsD like
+    ``client`` (anything with ``timing(stat, milliseconds)`` and
+    ``gauge(stat, value)``).
+    '''
+
+    def __init__(self, client, prefix='daterange_filter'):
+        self.client = client
+        self.prefix = prefix
+
+    def record(self, measure):
+        stat = '%s.%s.%s' % (self.prefix, measure.model, measure.field_path)
+        self.client.timing('%s.%s' % (stat, measure.phase), measure.duration * 1000)
+        for key in ('rows', 'result_count'):
+            if measure.data.get(key) is not None:
+                self.client.gauge('%s.%s' % (stat, key), measure.data[key])
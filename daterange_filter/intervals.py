@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Algebra of sets of half-open ``[start, end)`` intervals.
+
+A set is a list of ``(start, end)`` pairs where None stands for an open
+boundary. Normalized sets are sorted, without empty intervals and without
+overlapping or adjacent ones, so ``[(1, 3), (3, 5)]`` becomes ``[(1, 5)]``.
+Every function here returns a normalized set.
+
+'''
+from django.db.models import Q
+
+# The set of every value.
+EVERYTHING = [(None, None)]
+
+
+def _start_key(interval):
+    # None (open start) sorts first.
+    start = interval[0]
+    return (start is not None, start)
+
+
+def _is_empty(start, end):
+    return start is not None and end is not None and start >= end
+
+
+def _max_end(a, b):
+    if a is None or b is None:
+        return None
+    return max(a, b)
+
+
+def normalize(intervals):
+    '''
+    Returns the sorted ``intervals`` with the empty ones dropped and the
+    overlapping or adjacent ones merged.
+    '''
+    merged = []
+    for start, end in sorted((i for i in intervals if not _is_empty(*i)), key=_start_key):
+        if merged:
+            last_start, last_end = merged[-1]
+            if last_end is None or start is None or start <= last_end:
+                merged[-1] = (last_start, _max_end(last_end, end))
+                continue
+        merged.append((start, end))
+    return merged
+
+
+def union(*sets):
+    return normalize([interval for intervals in sets for interval in intervals])
+
+
+def intersect(a, b):
+    '''
+    Returns the intervals both in ``a`` and in ``b``.
+    '''
+    result = []
+    for a_start, a_end in normalize(a):
+        for b_start, b_end in normalize(b):
+            start = b_start if a_start is None else a_start if b_start is None else max(a_start, b_start)
+            end = b_end if a_end is None else a_end if b_end is None else min(a_end, b_end)
+            if not _is_empty(start, end):
+                result.append((start, end))
+    return normalize(result)
+
+
+def complement(intervals):
+    '''
+    Returns the intervals of every value not in ``intervals``.
+    '''
+    result = []
+    previous = None
+    for start, end in normalize(intervals):
+        if start is not None:
+            result.append((previous, start))
+        if end is None:
+            return normalize(result)
+        previous = end
+    result.append((previous, None))
+    return normalize(result)
+
+
+def subtract(intervals, exclusions):
+    '''
+    Returns ``intervals`` without the values in ``exclusions``.
+    '''
+    if not exclusions:
+        return normalize(intervals)
+    return intersect(intervals, complement(exclusions))
+
+
+def hull(intervals):
+    '''
+    Returns the smallest ``(start, end)`` interval covering ``intervals``,
+    or None if the set is empty.
+    '''
+    intervals = normalize(intervals)
+    if not intervals:
+        return None
+    return intervals[0][0], intervals[-1][1]
+
+
+def to_q(field_path, intervals):
+    '''
+    Returns the Q object matching the values of ``field_path`` in the
+    ``intervals``: one range predicate per normalized interval, OR'd. The set
+    must not be empty.
+    '''
+    q = None
+    for start, end in normalize(intervals):
+        lookups = {}
+        if start is not None:
+            lookups['%s__gte' % field_path] = start
+        if end is not None:
+            lookups['%s__lt' % field_path] = end
+        q = Q(**lookups) if q is None else q | Q(**lookups)
+    if q is None:
+        raise ValueError('An empty set of intervals matches nothing.')
+    return q
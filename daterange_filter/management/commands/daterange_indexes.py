@@ -0,0 +1,52 @@
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from daterange_filter import indexes
+
+
+class Command(BaseCommand):
+    help = 'Generates the migrations adding the missing indexes of the fields filtered with the date range filters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('app_label', nargs='*',
+                            help='Only generate the migrations of the given apps. The apps installed outside '
+                                 'of the project are only generated when given.')
+        parser.add_argument('--composite', action='store_true',
+                            help='Put the fields filtered by equality on the same ModelAdmin in front of the index.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Print the migrations instead of writing them.')
+
+    def handle(self, *args, **options):
+        operations = indexes.get_operations(indexes.missing_indexes(), options['composite'])
+        if options['app_label']:
+            operations = dict((app_label, app_operations) for app_label, app_operations in operations.items()
+                              if app_label in options['app_label'])
+        for app_label in sorted(operations):
+            if app_label not in options['app_label'] and not indexes.is_project_app(apps.get_app_config(app_label)):
+                del operations[app_label]
+                self.stdout.write('Skipped %s, installed outside of the project: name it to generate its '
+                                  'migration anyway.' % app_label)
+        if not operations:
+            self.stdout.write('No missing indexes.')
+            return
+
+        for app_label, app_operations in sorted(operations.items()):
+            writer = indexes.get_migration(app_label, app_operations)
+            if options['dry_run']:
+                self.stdout.write('%s:' % writer.path)
+                self.stdout.write(writer.as_string())
+            else:
+                self.write(writer)
+            for operation in app_operations:
+                self.stdout.write('Add models.Index(fields=%r, name=%r) to the Meta.indexes of %s.%s.' % (
+                    operation.index.fields, operation.index.name, app_label, operation.model_name))
+
+    def write(self, writer):
+        directory = os.path.dirname(writer.path)
+        if not os.path.isdir(directory):
+            raise CommandError('%s has no migrations directory (%s).' % (writer.migration.app_label, directory))
+        with open(writer.path, 'w', encoding='utf-8') as output:
+            output.write(writer.as_string())
+        self.stdout.write('Created %s' % writer.path)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Static assets of the range filters and the media already rendered on a
+request.
+
+The CSS and JS of the filters are static files whose URLs carry a digest of
+their content, so browsers can keep them until they change. The filters and
+their forms declare their media, and the registry of the request renders
+every file once however many filters the changelist has.
+
+'''
+import hashlib
+import os
+import weakref
+
+from django import forms
+from django.templatetags.static import static
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+
+CSS = ['daterange_filter/filter.css']
+JS = ['daterange_filter/filter.js']
+
+_versions = {}
+
+# The registries by request, dropped with the request.
+_registries = weakref.WeakKeyDictionary()
+
+
+def versioned(path):
+    '''
+    Returns the URL of the static ``path`` with the digest of its content
+    appended.
+    '''
+    version = _versions.get(path)
+    if version is None:
+        with open(os.path.join(STATIC_DIR, path), 'rb') as asset:
+            version = _versions[path] = hashlib.md5(asset.read()).hexdigest()[:12]
+    # Appended to the URL, the storage would quote it.
+    return '%s?v=%s' % (static(path), version)
+
+
+def get_media():
+    '''
+    Returns the media of the filters themselves.
+    '''
+    return forms.Media(css={'all': [versioned(path) for path in CSS]}, js=[versioned(path) for path in JS])
+
+
+class MediaRegistry(object):
+    '''
+    The CSS and JS files rendered so far on a request.
+    '''
+
+    def __init__(self):
+        self.css = set()
+        self.js = set()
+
+    def claim(self, media):
+        '''
+        Returns the part of ``media`` not rendered yet, and takes it as
+        rendered.
+        '''
+        css = {}
+        for medium, paths in media._css.items():
+            paths = [path for path in paths if (medium, path) not in self.css]
+            if paths:
+                css[medium] = paths
+                self.css.update((medium, path) for path in paths)
+        js = [path for path in media._js if path not in self.js]
+        self.js.update(js)
+        return forms.Media(css=css, js=js)
+
+
+def get_registry(request):
+    '''
+    Returns the MediaRegistry of ``request``, or None without a request.
+    '''
+    try:
+        registry = _registries.get(request)
+        if registry is None:
+            registry = _registries[request] = MediaRegistry()
+    except TypeError:
+        # None or anything that can't be weakly referenced.
+        return None
+    return registry
+
+
+def claim(request, media):
+    '''
+    Returns the part of ``media`` not rendered yet on ``request``.
+    '''
+    registry = get_registry(request)
+    return media if registry is None else registry.claim(media)
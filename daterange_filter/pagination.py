@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Pagination for changelists filtered by a date range.
+
+With the keyset (seek) pagination pages are ordered by ``(field_path, pk)``,
+newest first unless the changelist is sorted by the field, and continue from
+the last row of the previous page instead of using an ``OFFSET``. The rows
+without a value come last, whatever the direction. The changelists sorted by
+anything else are paginated as usual. The count of the rows can be delegated
+to the ``count_strategy`` of the filter, and the pages kept in its
+``result_cache``.
+
+'''
+from django.core.paginator import Page, Paginator, PageNotAnInteger, EmptyPage
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+CURSOR_SEPARATOR = '|'
+
+
+def keyset_ordering(field_path, descending=True):
+    if descending:
+        return (F(field_path).desc(nulls_last=True), '-pk')
+    return (F(field_path).asc(nulls_last=True), 'pk')
+
+
+def get_keyset_direction(queryset, field_path):
+    '''
+    Returns whether the keyset pages of ``queryset`` go in descending order,
+    or None if it is sorted by something else than ``field_path`` and the
+    primary key.
+    '''
+    fields = [item for item in queryset.query.order_by
+              if not (isinstance(item, str) and item.lstrip('-') in ('pk', queryset.model._meta.pk.name))]
+    if not fields:
+        return True
+    if len(fields) == 1 and isinstance(fields[0], str) and fields[0].lstrip('-') == field_path:
+        return fields[0].startswith('-')
+    return None
+
+
+def encode_cursor(value, pk):
+    # Rows without a value have an empty one.
+    return '%s%s%s' % (value.isoformat() if value is not None else '', CURSOR_SEPARATOR, pk)
+
+
+def decode_cursor(cursor, field, model):
+    '''
+    Returns the ``(value, pk)`` pair encoded on ``cursor`` or None if it
+    can't be decoded.
+    '''
+    if not cursor:
+        return None
+    value, separator, pk = cursor.rpartition(CURSOR_SEPARATOR)
+    if not separator:
+        return None
+    try:
+        value = field.to_python(value) if value else None
+        pk = model._meta.pk.to_python(pk)
+    except Exception:
+        return None
+    if pk is None:
+        return None
+    return value, pk
+
+
+def seek(queryset, field_path, cursor, descending=True):
+    '''
+    Returns the rows of ``queryset`` after ``cursor`` in keyset order.
+
+    The redundant ``field <= value`` (``>=`` ascending) keeps the predicate a
+    range scan on the index of the date column. The rows without a value
+    come after all the others.
+    '''
+    if cursor is None:
+        return queryset
+    value, pk = cursor
+    lookup = 'lt' if descending else 'gt'
+    if value is None:
+        return queryset.filter(**{'%s__isnull' % field_path: True, 'pk__%s' % lookup: pk})
+    after = Q(**{'%s__%se' % (field_path, lookup): value}) & (
+        Q(**{'%s__%s' % (field_path, lookup): value}) | Q(**{field_path: value, 'pk__%s' % lookup: pk}))
+    return queryset.filter(after | Q(**{'%s__isnull' % field_path: True}))
+
+
+class KeysetPage(Page):
+
+    def __init__(self, object_list, number, paginator, next_cursor=None):
+        super(KeysetPage, self).__init__(object_list, number, paginator)
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class KeysetPaginator(Paginator):
+    '''
+    Paginator that returns the ``per_page`` rows after ``cursor``, whatever
+    the page number is.
+
+    With ``exact_count`` set to False the number of rows of the range is
+    never counted: ``count`` is only enough for the admin to paginate. The
+    pages are only reached through the cursors, so there is a single page
+    number.
+    '''
+
+    def __init__(self, object_list, per_page, field_path, cursor=None, exact_count=True,
+                 orphans=0, allow_empty_first_page=True, counter=None, descending=True):
+        object_list = object_list.order_by(*keyset_ordering(field_path, descending))
+        super(KeysetPaginator, self).__init__(object_list, per_page, 0, allow_empty_first_page)
+        self.field_path = field_path
+        self.cursor = cursor
+        self.descending = descending
+        self.exact_count = exact_count
+        self.counter = counter
+        self.next_cursor = None
+
+    @cached_property
+    def rows(self):
+        queryset = seek(self.object_list, self.field_path, self.cursor, self.descending)
+        queryset = queryset.annotate(drf_keyset_value=F(self.field_path))
+        return list(queryset[:self.per_page + 1])
+
+    @cached_property
+    def count(self):
+        if self.exact_count:
+            if self.counter is not None:
+                return self.counter(self.object_list)
+            return super(KeysetPaginator, self).count
+        if self.cursor is None and len(self.rows) <= self.per_page:
+            return len(self.rows)
+        # Only has to tell the admin there is more than one page.
+        return self.per_page + 1
+
+    @cached_property
+    def num_pages(self):
+        # The admin doesn't render page links then.
+        return 1
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        rows = self.rows[:self.per_page]
+        if len(self.rows) > self.per_page:
+            self.next_cursor = encode_cursor(rows[-1].drf_keyset_value, rows[-1].pk)
+        return KeysetPage(rows, number, self, self.next_cursor)
+
+
+class CountingPaginator(Paginator):
+    '''
+    Paginator that delegates the count to ``counter``.
+    '''
+
+    def __init__(self, object_list, per_page, counter, orphans=0, allow_empty_first_page=True):
+        super(CountingPaginator, self).__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.counter = counter
+
+    @cached_property
+    def count(self):
+        return self.counter(self.object_list)
+
+
+class RangePaginationMixin(object):
+    '''
+    ModelAdmin mixin that paginates with the keyset pagination, the count
+    strategy and the result cache of the list filter that enabled them.
+    '''
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        filter_ = getattr(request, 'daterange_filter_paginated', None)
+        if filter_ is None:
+            return super(RangePaginationMixin, self).get_paginator(
+                request, queryset, per_page, orphans, allow_empty_first_page)
+
+        counter = filter_.count if filter_.count_strategy is not None else None
+        descending = get_keyset_direction(queryset, filter_.field_path) if filter_.keyset_pagination else None
+        if descending is not None:
+            return KeysetPaginator(queryset, per_page, filter_.field_path, filter_.cursor,
+                                   filter_.keyset_exact_count, orphans, allow_empty_first_page, counter, descending)
+        if filter_.result_cache is not None:
+            return filter_.result_cache.get_paginator(queryset, per_page, filter_, counter, orphans,
+                                                      allow_empty_first_page)
+        if counter is None:
+            return super(RangePaginationMixin, self).get_paginator(
+                request, queryset, per_page, orphans, allow_empty_first_page)
+        return CountingPaginator(queryset, per_page, counter, orphans, allow_empty_first_page)
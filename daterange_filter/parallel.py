@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Concurrent side queries of the range filters.
+
+The extents, the histograms and the counts of the filters of a changelist
+are independent reads. ``SideQueries`` runs them on the thread pool shared
+by the whole process, every worker on its own database connections, so the
+page waits for the slowest of them instead of their sum. The ones not done
+within the timeout are unknown (None) and the facets are rendered without
+them. The count of the pages, which the changelist can't do without, is
+always waited for. The late ones still hold their worker until they end, so the pool, of
+``DATE_RANGE_FILTER_SIDE_QUERIES_THREADS`` threads (8 by default), bounds
+the queries running at once whatever the number of requests.
+
+'''
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone, translation
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    '''
+    Returns the thread pool of the side queries of the process, created on
+    first use.
+    '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DATE_RANGE_FILTER_SIDE_QUERIES_THREADS', 8),
+                thread_name_prefix='daterange_filter')
+        return _executor
+
+
+def _call(function, tz, language):
+    # Workers don't inherit the timezone and the language of the request.
+    try:
+        with timezone.override(tz), translation.override(language):
+            return function()
+    finally:
+        # The connections of a thread are its own.
+        connections.close_all()
+
+
+class SideQueries(object):
+    '''
+    Callables run at most ``max_workers`` at a time on the shared pool, for
+    at most ``timeout`` seconds, but those added with ``wait`` which are
+    always waited for. With a single worker they are run one after another
+    on the calling thread, without timeout.
+    '''
+
+    def __init__(self, max_workers=1, timeout=None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.queries = []
+        self.waited = set()
+
+    def add(self, key, function, wait=False):
+        self.queries.append((key, function))
+        if wait:
+            self.waited.add(key)
+
+    def run(self):
+        '''
+        Returns the results by key, None for the queries that didn't finish
+        in time. The exceptions of the queries are raised.
+        '''
+        if (self.max_workers or 1) < 2 or not self.queries:
+            return dict((key, function()) for key, function in self.queries)
+
+        executor = get_executor()
+        tz, language = timezone.get_current_timezone(), translation.get_language()
+        deadline = None if self.timeout is None else time.time() + self.timeout
+        pending = list(self.queries)
+        futures = {}
+        running = set()
+        while pending or running:
+            while pending and len(running) < self.max_workers:
+                key, function = pending.pop(0)
+                future = executor.submit(_call, function, tz, language)
+                futures[future] = key
+                running.add(future)
+            timeout = None if deadline is None else max(deadline - time.time(), 0)
+            done, running = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+
+        results = dict((key, None) for key, function in pending)
+        for future, key in futures.items():
+            if key in self.waited:
+                continue
+            # The queued ones are dropped, the late ones end in the background.
+            if future.cancel() or not future.done():
+                results[key] = None
+            else:
+                results[key] = future.result()
+        for key, function in pending:
+            if key in self.waited:
+                results[key] = function()
+        for future, key in futures.items():
+            if key in self.waited:
+                results[key] = future.result()
+        return results
+
+
+def run_side_queries(model_admin, filters, names, cl=None, extra=None):
+    '''
+    Runs the side queries ``names`` of ``filters`` together and keeps their
+    results on the filters (see ``DateRangeFilterBase.get_side_query``), on
+    the pool configured on ``model_admin`` by ``RangeParallelMixin``.
+
+    The callables of ``extra`` are run in the same batch, but waited for
+    whatever the timeout; their results are returned by key.
+    '''
+    extra = extra or {}
+    queries = SideQueries(getattr(model_admin, 'side_queries_max_workers', 1),
+                          getattr(model_admin, 'side_queries_timeout', None))
+    for key, function in extra.items():
+        queries.add(key, function, wait=True)
+    for filter_ in filters:
+        for name in names:
+            function = filter_.get_side_query(name, cl)
+            if function is not None and name not in filter_.side_results:
+                queries.add((filter_, name), function)
+
+    extra_results = {}
+    for key, result in queries.run().items():
+        if key in extra:
+            extra_results[key] = result
+        else:
+            filter_, name = key
+            filter_.side_results[name] = result
+    return extra_results
+
+
+def get_range_filters(filter_specs):
+    return [spec for spec in filter_specs if hasattr(spec, 'get_side_query')]
+
+
+def is_picked(filter_):
+    '''
+    Returns whether a range is picked on ``filter_``: its queryset is then
+    clamped with its extent.
+    '''
+    if filter_.uses_intervals():
+        return True
+    range_ = filter_.get_range()
+    return range_ is not None and (range_[0] is not None or range_[1] is not None)
+
+
+class ParallelChangeListMixin(object):
+    '''
+    Runs the extents the picked ranges are clamped with together before
+    filtering. Everything else, the other extents, the histograms and the
+    count of the pages, runs in a single batch once filtered.
+    '''
+
+    def get_filters(self, request):
+        result = super(ParallelChangeListMixin, self).get_filters(request)
+        filters = [filter_ for filter_ in get_range_filters(result[0]) if is_picked(filter_)]
+        run_side_queries(self.model_admin, filters, ('extent',))
+        return result
+
+    def get_results(self, request):
+        # The deferred facets are loaded by their own view.
+        deferred = hasattr(self.model_admin, 'facets_view')
+        filters = [filter_ for filter_ in get_range_filters(self.filter_specs)
+                   if not (deferred and filter_.deferred_facets)]
+        # Counted here and handed to get_results by RangeParallelMixin.get_paginator.
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        # Paginators may reorder their object_list.
+        paginator.daterange_filter_queryset = self.queryset
+        run_side_queries(self.model_admin, filters, ('extent', 'histogram'), self,
+                         extra={'pages': lambda: paginator.count})
+        request.daterange_filter_paginator = paginator
+        try:
+            super(ParallelChangeListMixin, self).get_results(request)
+        finally:
+            request.daterange_filter_paginator = None
+
+
+class RangeParallelMixin(object):
+    '''
+    ModelAdmin mixin running the side queries of the range filters, and of
+    their deferred facets, on ``side_queries_max_workers`` threads for at
+    most ``side_queries_timeout`` seconds.
+    '''
+    side_queries_max_workers = 4
+    side_queries_timeout = 5
+
+    def get_changelist(self, request, **kwargs):
+        changelist = super(RangeParallelMixin, self).get_changelist(request, **kwargs)
+        return type('Parallel%s' % changelist.__name__, (ParallelChangeListMixin, changelist), {})
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator = getattr(request, 'daterange_filter_paginator', None)
+        if (paginator is not None and paginator.daterange_filter_queryset is queryset and
+                paginator.per_page == per_page):
+            # Already counted with the side queries.
+            return paginator
+        return super(RangeParallelMixin, self).get_paginator(
+            request, queryset, per_page, orphans, allow_empty_first_page)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Faster parsing of the values posted to the range forms.
+
+Django tries every localized input format with ``strptime`` until one
+matches. Here the formats of the active locale are compiled once to the
+regular expressions ``strptime`` itself uses (built with a ``TimeRE`` of
+our own per locale, not the cache of ``strptime``), so the formats that
+can't match are skipped with a single regex match, and ISO-8601 values are
+built without ``strptime`` at all. The result, and the values rejected, are
+the same as with Django's fields. Without ``_strptime.TimeRE`` every format
+is tried with plain ``strptime``.
+
+'''
+import datetime
+import locale
+import re
+
+from django import forms
+from django.utils.translation import get_language
+
+try:
+    import _strptime
+except ImportError:
+    _strptime = None
+
+# ISO formats built without strptime.
+ISO_FORMATS = {
+    '%Y-%m-%d': re.compile(r'^([0-9]{4})-([0-9]{2})-([0-9]{2})$'),
+    '%Y-%m-%d %H:%M:%S': re.compile(r'^([0-9]{4})-([0-9]{2})-([0-9]{2}) ([0-9]{2}):([0-9]{2}):([0-9]{2})$'),
+    '%Y-%m-%d %H:%M': re.compile(r'^([0-9]{4})-([0-9]{2})-([0-9]{2}) ([0-9]{2}):([0-9]{2})$'),
+}
+
+_compiled = {}
+_time_res = {}
+
+
+def get_time_re(locale_key):
+    '''
+    Returns the ``_strptime.TimeRE`` of the locale ``locale_key``, or None
+    if this Python has none.
+    '''
+    if _strptime is None:
+        return None
+    time_re = _time_res.get(locale_key)
+    if time_re is None:
+        try:
+            time_re = _time_res[locale_key] = _strptime.TimeRE()
+        except AttributeError:
+            # A private API: parse with plain strptime without it.
+            return None
+    return time_re
+
+
+def _compile(format, locale_key):
+    time_re = get_time_re(locale_key)
+    if time_re is None:
+        return None
+    try:
+        return time_re.compile(format)
+    except Exception:
+        # Let strptime report it.
+        return None
+
+
+def get_parsers(formats):
+    '''
+    Returns the ``(format, regex)`` pairs of ``formats``, compiled once per
+    active language (the localized formats depend on it) and locale.
+    '''
+    formats = tuple(formats)
+    # The locale the month and day names of strptime come from.
+    locale_key = locale.getlocale(locale.LC_TIME)
+    key = (get_language(), locale_key, formats)
+    parsers = _compiled.get(key)
+    if parsers is None:
+        parsers = _compiled[key] = tuple((format, _compile(format, locale_key)) for format in formats)
+    return parsers
+
+
+def parse(value, formats):
+    '''
+    Returns the datetime of the first of ``formats`` parsing ``value``, or
+    None if none of them does.
+    '''
+    for format, regex in get_parsers(formats):
+        try:
+            if format in ISO_FORMATS:
+                match = ISO_FORMATS[format].match(value)
+                if match is not None:
+                    return datetime.datetime(*[int(part) for part in match.groups()])
+            if regex is not None and regex.match(value) is None:
+                continue
+            return datetime.datetime.strptime(value, format)
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+class ParsingFieldMixin(forms.fields.BaseTemporalField):
+    '''
+    Replaces the ``strptime`` loop of the temporal fields. Put it after the
+    field class: ``class Field(forms.DateField, ParsingFieldMixin)``.
+    '''
+
+    def to_python(self, value):
+        result = parse(value.strip(), self.input_formats)
+        if result is None:
+            raise forms.ValidationError(self.error_messages['invalid'], code='invalid')
+        if isinstance(self, forms.DateTimeField):
+            return result
+        if isinstance(self, forms.DateField):
+            return result.date()
+        return result.time()
+
+
+class DateField(forms.DateField, ParsingFieldMixin):
+    pass
+
+
+class DateTimeField(forms.DateTimeField, ParsingFieldMixin):
+    pass
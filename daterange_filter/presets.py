@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Relative ranges, like ``last_7_days`` or ``this_month``, resolved to whole
+days of the active timezone.
+
+Supported tokens are ``today``, ``yesterday``, ``last_<n>_<unit>s`` (the last
+n days/weeks/months/years, today included), ``this_<unit>`` (from the start
+of the current week/month/year to today) and ``previous_<unit>`` (the whole
+previous week/month/year).
+
+'''
+import datetime
+import re
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+UNITS = ('day', 'week', 'month', 'year')
+
+TOKEN_RE = re.compile(r'^(?:last_(?P<count>[1-9]\d{0,3})_(?P<last>%s)s|this_(?P<this>%s)|previous_(?P<previous>%s))$'
+                      % ('|'.join(UNITS), '|'.join(UNITS[1:]), '|'.join(UNITS)))
+
+DEFAULT_PRESETS = (
+    ('today', _('Today')),
+    ('yesterday', _('Yesterday')),
+    ('last_7_days', _('Last 7 days')),
+    ('last_30_days', _('Last 30 days')),
+    ('this_month', _('Month to date')),
+    ('previous_month', _('Previous month')),
+)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    year = day.year + month // 12
+    month = month % 12 + 1
+    last_day = (datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)).day
+    return datetime.date(year, month, min(day.day, last_day))
+
+
+def period_start(day, unit):
+    if unit == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if unit == 'month':
+        return day.replace(day=1)
+    if unit == 'year':
+        return day.replace(month=1, day=1)
+    return day
+
+
+def shift(day, unit, count):
+    if unit == 'day':
+        return day + datetime.timedelta(days=count)
+    if unit == 'week':
+        return day + datetime.timedelta(weeks=count)
+    if unit == 'month':
+        return add_months(day, count)
+    return add_months(day, count * 12)
+
+
+def resolve(token, today=None):
+    '''
+    Returns the ``(first, last)`` days, both included, of the relative range
+    ``token``, or None if the token isn't valid.
+    '''
+    if today is None:
+        today = timezone.localdate()
+
+    if token == 'today':
+        return today, today
+    if token == 'yesterday':
+        yesterday = today - datetime.timedelta(days=1)
+        return yesterday, yesterday
+
+    match = TOKEN_RE.match(token or '')
+    if match is None:
+        return None
+    if match.group('last'):
+        first = shift(today, match.group('last'), -int(match.group('count')))
+        return first + datetime.timedelta(days=1), today
+    if match.group('this'):
+        return period_start(today, match.group('this')), today
+    unit = match.group('previous')
+    first = period_start(shift(today, unit, -1), unit)
+    return first, period_start(today, unit) - datetime.timedelta(days=1)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Compiles the values picked on the range filters into index friendly lookups.
+
+Every range is turned into a half-open ``field >= start AND field < end``
+pair whose boundaries have the same type as the filtered column, so the
+database can use a plain btree index on it.
+
+'''
+import datetime
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+try:
+    import pytz
+except ImportError:
+    pytz = None
+
+
+def start_of_day(day, tz=None):
+    '''
+    Returns the first instant of ``day`` in ``tz`` (the active timezone by
+    default).
+
+    On DST days the local midnight may not exist or may happen twice. In the
+    first case the instant the clocks jump forward is returned, in the second
+    one the earliest of both midnights.
+    '''
+    naive = datetime.datetime.combine(day, datetime.time.min)
+    if not settings.USE_TZ:
+        return naive
+
+    if tz is None:
+        tz = timezone.get_current_timezone()
+
+    if pytz is not None and hasattr(tz, 'localize'):
+        try:
+            return tz.localize(naive, is_dst=None)
+        except pytz.AmbiguousTimeError:
+            return tz.localize(naive, is_dst=True)
+        except pytz.NonExistentTimeError:
+            return tz.normalize(tz.localize(naive, is_dst=False))
+
+    # zoneinfo like timezones: fold=0 maps a missing time to the instant
+    # of the transition and an ambiguous one to its first occurrence.
+    return naive.replace(tzinfo=tz).astimezone(tz)
+
+
+def next_boundary(value):
+    '''
+    Returns the exclusive upper boundary for an inclusive ``value``.
+
+    Dates move to the next day. Datetimes entered with a second resolution
+    (the widgets don't allow anything finer) move to the next second, so the
+    whole second picked by the user is included.
+    '''
+    if isinstance(value, datetime.datetime):
+        if value.microsecond:
+            return value + datetime.timedelta(microseconds=1)
+        return value + datetime.timedelta(seconds=1)
+    return value + datetime.timedelta(days=1)
+
+
+def is_datetime_field(field):
+    return isinstance(field, models.DateTimeField)
+
+
+def to_field_value(value, field, tz=None):
+    '''
+    Converts ``value`` to the type stored by ``field``, so the comparison
+    doesn't need any cast on the column.
+    '''
+    if value is None:
+        return None
+
+    if is_datetime_field(field):
+        if not isinstance(value, datetime.datetime):
+            return start_of_day(value, tz)
+        if settings.USE_TZ and timezone.is_naive(value):
+            return timezone.make_aware(value, tz or timezone.get_current_timezone())
+        if not settings.USE_TZ and timezone.is_aware(value):
+            return timezone.make_naive(value, tz or timezone.get_current_timezone())
+        return value
+
+    if isinstance(field, models.DateField):
+        return to_date(value, tz)
+    return value
+
+
+def to_date(value, tz=None):
+    '''
+    Returns the local date of ``value``. Dates are returned as they are.
+    '''
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        if settings.USE_TZ and timezone.is_aware(value):
+            value = timezone.localtime(value, tz)
+        return value.date()
+    return value
+
+
+def compile_range(field, field_path, since=None, upto=None, tz=None):
+    '''
+    Returns the lookups (as a dict usable on ``queryset.filter``) that select
+    the rows of ``field_path`` between ``since`` and ``upto``, both included.
+
+    ``field`` is the model field at the end of ``field_path``. The result
+    always uses ``__gte`` and ``__lt``.
+    '''
+    return to_lookups(field_path, *compile_boundaries(field, since, upto, tz))
+
+
+def to_lookups(field_path, start=None, end=None):
+    '''
+    Returns the lookups for the half-open ``[start, end)`` boundaries.
+    '''
+    lookups = {}
+    if start is not None:
+        lookups['%s__gte' % field_path] = start
+    if end is not None:
+        lookups['%s__lt' % field_path] = end
+    return lookups
+
+
+def is_empty(start=None, end=None):
+    '''
+    Returns whether the half-open ``[start, end)`` range can't match anything.
+    '''
+    return start is not None and end is not None and start >= end
+
+
+def compile_boundaries(field, since=None, upto=None, tz=None):
+    '''
+    Returns the ``(start, end)`` half-open boundaries for the inclusive
+    ``since``/``upto`` values. Missing values stay ``None``.
+    '''
+    start = end = None
+    if since is not None:
+        start = to_field_value(since, field, tz)
+    if upto is not None:
+        if is_datetime_field(field) and not isinstance(upto, datetime.datetime):
+            # A whole day on a datetime column: up to the next local midnight.
+            end = to_field_value(upto + datetime.timedelta(days=1), field, tz)
+        else:
+            end = next_boundary(to_field_value(upto, field, tz))
+    return start, end
+
+
+def to_day_range(since=None, upto=None, tz=None):
+    '''
+    Returns the ``(first, last)`` days covered by ``since``/``upto``, both
+    included, or None if the datetimes don't start/end on a local day
+    boundary.
+    '''
+    if isinstance(since, datetime.datetime):
+        if _local_time(since, tz) != datetime.time.min:
+            return None
+    if isinstance(upto, datetime.datetime):
+        if _local_time(upto, tz) not in (datetime.time(23, 59, 59), datetime.time.max):
+            return None
+    return to_date(since, tz), to_date(upto, tz)
+
+
+def _local_time(value, tz=None):
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value, tz)
+    return value.time()
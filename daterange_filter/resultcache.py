@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Cache of the changelist pages of a range filter.
+
+The range stays a plain range query the index of the date column serves.
+What is kept in the shared cache (see cache.py) is the count of the filtered
+changelist and the primary keys of the pages read, keyed by their SQL, so
+the model, the range, every other active filter, the ordering and the page
+are part of the key, and by the versions of the data they were read from.
+
+The model owning the filtered field is versioned by day (UTC) of the field:
+the saves and deletes of its rows, in any process tracking them, replace
+the versions of the days the row was and is in, so only the entries of the
+ranges covering them are dropped. The open ranges, those over ``max_days``
+days and the other models (the filtered one, when the field is reached
+through a relation) use a version of the whole model, replaced by every
+save. Bulk operations (``update``, raw SQL) don't send signals: their
+changes show after the timeout, or call ``bump`` after them.
+
+'''
+import datetime
+import uuid
+
+from django.contrib.admin.sites import all_sites
+from django.contrib.admin.utils import NotRelationField, get_fields_from_path
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from daterange_filter.cache import get_cache, make_key, make_queryset_key
+from daterange_filter.ranges import to_date
+
+# Model -> fields versioned by day.
+_tracked = {}
+
+
+def version_key(model, field=None, day=None):
+    '''
+    Returns the key of the version of ``model``, or of its rows with ``day``
+    in ``field``.
+    '''
+    if field is None:
+        return make_key('result_version', model._meta.label_lower)
+    return make_key('result_version', model._meta.label_lower, field.attname, day.isoformat())
+
+
+def to_day(field, value):
+    '''
+    Returns the UTC day of ``value`` in ``field``, None if it has none.
+    '''
+    try:
+        value = field.to_python(value)
+    except ValidationError:
+        return None
+    if not isinstance(value, datetime.date):
+        return None
+    return to_date(value, timezone.utc)
+
+
+def get_days(start, end, max_days):
+    '''
+    Returns the UTC days of the half-open ``[start, end)`` range, None if it
+    is open or longer than ``max_days`` days.
+    '''
+    if start is None or end is None:
+        return None
+    # The day of ``end`` may not be in the range: one version more is harmless.
+    first, last = to_date(start, timezone.utc), to_date(end, timezone.utc)
+    if (last - first).days >= max_days:
+        return None
+    return [first + datetime.timedelta(days=days) for days in range((last - first).days + 1)]
+
+
+def _replace(keys):
+    get_cache().set_many(dict((key, uuid.uuid4().hex) for key in keys), None)
+
+
+def bump(model, field=None, days=()):
+    '''
+    Replaces the version of ``model`` and of its ``days`` of ``field``,
+    dropping the entries read from them.
+    '''
+    _replace([version_key(model)] + [version_key(model, field, day) for day in days])
+
+
+def get_versions(keys):
+    '''
+    Returns the current versions of ``keys``, made up for those without one
+    yet.
+    '''
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A new version, never an evicted one: its old entries stay dropped.
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def _loaded(sender, instance, **kwargs):
+    # The values of the row when read: their days are replaced too once it moves.
+    instance._daterange_filter_values = dict(
+        (field.attname, instance.__dict__[field.attname])
+        for field in _tracked.get(sender, ()) if field.attname in instance.__dict__)
+
+
+def _changed(sender, instance, **kwargs):
+    loaded = getattr(instance, '_daterange_filter_values', {})
+    keys = [version_key(sender)]
+    for field in _tracked.get(sender, ()):
+        values = [loaded.get(field.attname), instance.__dict__.get(field.attname)]
+        days = set(to_day(field, value) for value in values if value is not None)
+        keys.extend(version_key(sender, field, day) for day in days if day is not None)
+    _replace(keys)
+    _loaded(sender, instance)
+
+
+def _connect(model):
+    if model not in _tracked:
+        _tracked[model] = set()
+        uid = 'daterange_filter_result_%s' % model._meta.label_lower
+        post_init.connect(_loaded, sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(_changed, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(_changed, sender=model, weak=False, dispatch_uid=uid)
+    return _tracked[model]
+
+
+def track(model, field=None):
+    '''
+    Replaces the version of ``model`` on the saves and deletes of its rows,
+    and the versions of the days of ``field`` on those of the model owning
+    it.
+    '''
+    _connect(model)
+    if field is not None:
+        _connect(field.model).add(field)
+
+
+def track_registered(sites=None):
+    '''
+    Tracks the models of the filters with a ``result_cache`` registered on
+    ``sites`` (every admin site by default). The filters track their models
+    when built, so only the processes never building them (workers, ...)
+    need it, called from the ``ready()`` of an app after the admin modules
+    are imported.
+    '''
+    from daterange_filter.filter import registered_fields
+
+    for site in (sites if sites is not None else list(all_sites)):
+        for model, field_path in registered_fields(site, lambda filter_class: filter_class.result_cache is not None):
+            try:
+                field = get_fields_from_path(model, field_path)[-1]
+            except (FieldDoesNotExist, NotRelationField):
+                continue
+            track(model, field)
+
+
+class ResultCache(object):
+    '''
+    Set an instance as ``result_cache`` on a filter and add
+    ``pagination.RangePaginationMixin`` to the ModelAdmin. Entries are kept
+    for ``timeout`` seconds at most. The ranges over ``max_days`` days are
+    versioned by model instead of by day.
+    '''
+
+    def __init__(self, timeout=5 * 60, max_days=31):
+        self.timeout = timeout
+        self.max_days = max_days
+
+    def get_version_keys(self, filter_):
+        '''
+        Returns the keys of the versions the entries of ``filter_`` are read
+        from.
+        '''
+        field = filter_.field
+        keys = [version_key(filter_.model)] if filter_.model is not field.model else []
+        boundaries = filter_.get_boundaries()
+        days = get_days(*boundaries, max_days=self.max_days) if isinstance(boundaries, tuple) else None
+        if days is None:
+            keys.append(version_key(field.model))
+        else:
+            keys.extend(version_key(field.model, field, day) for day in days)
+        return keys
+
+    def get_or_set(self, kind, queryset, version_keys, function):
+        '''
+        Returns the value of ``kind`` cached for ``queryset`` at the current
+        versions of ``version_keys``, calling ``function`` on a miss.
+        '''
+        key = make_queryset_key(kind, queryset)
+        if key is None:
+            return function()
+        key = make_key(kind, key, get_versions(version_keys))
+        cache = get_cache()
+        value = cache.get(key)
+        if value is None:
+            value = function()
+            cache.set(key, value, self.timeout)
+        return value
+
+    def get_paginator(self, queryset, per_page, filter_, counter=None, orphans=0, allow_empty_first_page=True):
+        track(filter_.model, filter_.field)
+        return CachedPaginator(queryset, per_page, self, self.get_version_keys(filter_), counter, orphans,
+                               allow_empty_first_page)
+
+
+class CachedPaginator(Paginator):
+    '''
+    Paginator reading its count and the primary keys of its pages from
+    ``result_cache``. The rows of a page are then read by primary key, still
+    within the filtered queryset.
+    '''
+
+    def __init__(self, object_list, per_page, result_cache, version_keys, counter=None, orphans=0,
+                 allow_empty_first_page=True):
+        super(CachedPaginator, self).__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.result_cache = result_cache
+        self.version_keys = version_keys
+        self.counter = counter
+
+    @cached_property
+    def count(self):
+        counter = self.counter or (lambda queryset: queryset.count())
+        return self.result_cache.get_or_set('result_count', self.object_list.order_by(), self.version_keys,
+                                            lambda: counter(self.object_list))
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        sliced = self.object_list[bottom:top]
+        pks = self.result_cache.get_or_set('result_page', sliced.values('pk'), self.version_keys,
+                                           lambda: list(sliced.values_list('pk', flat=True)))
+        rows = dict((row.pk, row) for row in self.object_list.filter(pk__in=pks)) if pks else {}
+        return self._get_page([rows[pk] for pk in pks if pk in rows], number, self)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Optional app (``daterange_filter.rollup`` in INSTALLED_APPS) building and
+reading the per day rollup (models.DailyCount) of the fields used with the
+range filters.
+
+Days are local to the timezone active while the rollup is built. A field
+counts as built only once a full refresh recorded its models.Build: the
+incremental refreshes only cover the last days.
+
+'''
+import datetime
+
+from django.contrib.admin.utils import get_fields_from_path
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from daterange_filter import histogram
+from daterange_filter.ranges import compile_range
+
+default_app_config = 'daterange_filter.rollup.apps.RollupConfig'
+
+
+def is_installed():
+    # Not imported at the top: the apps submodule would shadow it.
+    from django.apps import apps
+
+    return apps.is_installed('daterange_filter.rollup')
+
+
+def refresh(model, field_path, since=None):
+    '''
+    Recomputes the counts of ``model`` per day of ``field_path`` from the day
+    ``since`` on (everything if None). Returns the number of days stored.
+
+    Raises ValueError when refreshing from ``since`` a field never fully
+    built: the days before would be missing.
+    '''
+    from daterange_filter.rollup.models import Build, DailyCount
+
+    if since is not None and not is_built(model, field_path):
+        raise ValueError('%s.%s was never fully built.' % (model._meta.label_lower, field_path))
+
+    field = get_fields_from_path(model, field_path)[-1]
+    queryset = model._default_manager.all()
+    stored = DailyCount.objects.filter(model=model._meta.label_lower, field=field_path)
+    if since is not None:
+        queryset = queryset.filter(**compile_range(field, field_path, since=since))
+        stored = stored.filter(day__gte=since)
+
+    days = histogram.daily_counts(queryset, field, field_path)
+    with transaction.atomic(using=stored.db):
+        stored.delete()
+        DailyCount.objects.using(stored.db).bulk_create([
+            DailyCount(model=model._meta.label_lower, field=field_path, day=day, count=count)
+            for day, count in days
+        ])
+        if since is None:
+            Build.objects.using(stored.db).update_or_create(
+                model=model._meta.label_lower, field=field_path, defaults={'built_at': timezone.now()})
+    return len(days)
+
+
+def recent_days(days):
+    '''
+    Returns the first of the last ``days`` local days, today included.
+    '''
+    return timezone.localdate() - datetime.timedelta(days=days - 1)
+
+
+def _stored(model, field_path, first=None, last=None):
+    from daterange_filter.rollup.models import DailyCount
+
+    stored = DailyCount.objects.filter(model=model._meta.label_lower, field=field_path)
+    if first is not None:
+        stored = stored.filter(day__gte=first)
+    if last is not None:
+        stored = stored.filter(day__lte=last)
+    return stored
+
+
+def is_built(model, field_path):
+    '''
+    Returns whether a full refresh of ``field_path`` was recorded. Always
+    False when the app isn't installed.
+    '''
+    if not is_installed():
+        return False
+    from daterange_filter.rollup.models import Build
+
+    return Build.objects.filter(model=model._meta.label_lower, field=field_path).exists()
+
+
+def daily_counts(model, field_path, first=None, last=None):
+    '''
+    Returns the ``(day, count)`` pairs stored for the days between ``first``
+    and ``last`` (both included, None for no limit) ordered by day.
+    '''
+    return list(_stored(model, field_path, first, last).order_by('day').values_list('day', 'count'))
+
+
+def total(model, field_path, first=None, last=None):
+    '''
+    Returns the number of rows stored for the days between ``first`` and
+    ``last``, or None if the rollup was never built for that field.
+    '''
+    if not is_built(model, field_path):
+        return None
+    return _stored(model, field_path, first, last).aggregate(total=Sum('count'))['total'] or 0
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class RollupConfig(AppConfig):
+    name = 'daterange_filter.rollup'
+    label = 'daterange_rollup'
+    verbose_name = 'Date range rollup'
+    default_auto_field = 'django.db.models.AutoField'
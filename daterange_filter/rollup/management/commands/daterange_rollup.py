@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from daterange_filter import rollup
+from daterange_filter.filter import registered_fields
+
+
+class Command(BaseCommand):
+    help = 'Builds the per day counts of the fields filtered with the date range filters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7,
+                            help='Refresh only the last DAYS days (7 by default).')
+        parser.add_argument('--full', action='store_true',
+                            help='Rebuild every day from scratch.')
+        parser.add_argument('--model', action='append', dest='models', default=[],
+                            help='Only build the given app_label.model_name (can be repeated).')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1.')
+
+        since = None if options['full'] else rollup.recent_days(options['days'])
+        models = [model.lower() for model in options['models']]
+        fields = [(model, field_path) for model, field_path in registered_fields()
+                  if not models or model._meta.label_lower in models]
+        if since is not None:
+            # Only the last days would be counted, and then taken for the whole rollup.
+            missing = ['%s.%s' % (model._meta.label_lower, field_path) for model, field_path in fields
+                       if not rollup.is_built(model, field_path)]
+            if missing:
+                raise CommandError('Never fully built: %s. Run with --full first.' % ', '.join(missing))
+
+        for model, field_path in fields:
+            days = rollup.refresh(model, field_path, since)
+            self.stdout.write('%s.%s: %d days' % (model._meta.label_lower, field_path, days))
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Rollup of the rows per day of the fields filtered by date range.
+
+Only used if ``daterange_filter.rollup`` is in INSTALLED_APPS and the
+``daterange_rollup`` management command is run.
+
+'''
+from django.db import models
+
+
+class DailyCount(models.Model):
+    model = models.CharField(max_length=100)
+    field = models.CharField(max_length=255)
+    day = models.DateField()
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = (('model', 'field', 'day'), )
+
+    def __str__(self):
+        return '%s.%s %s: %s' % (self.model, self.field, self.day, self.count)
+
+
+class Build(models.Model):
+    '''
+    Marks the fields whose every day was counted by a full refresh.
+    '''
+    model = models.CharField(max_length=100)
+    field = models.CharField(max_length=255)
+    built_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = (('model', 'field'), )
+
+    def __str__(self):
+        return '%s.%s built at %s' % (self.model, self.field, self.built_at)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Changelists of rows split by ranges of their date across database aliases.
+
+A ``ShardMap`` tells which alias holds which half-open range of values of the
+filtered field. Only the aliases overlapping the picked range are queried,
+concurrently on a thread pool: the counts are summed and the pages merged in
+the order of the changelist.
+
+'''
+import functools
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F
+from django.db.models.expressions import OrderBy
+from django.utils.functional import cached_property
+
+from daterange_filter import intervals
+
+
+class Shard(object):
+
+    def __init__(self, alias, start=None, end=None):
+        self.alias = alias
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return '<Shard %s [%s, %s)>' % (self.alias, self.start, self.end)
+
+
+class ShardMap(object):
+    '''
+    The ``shards`` of a field, a list of Shard, queried with at most
+    ``max_workers`` threads.
+    '''
+
+    def __init__(self, shards, max_workers=None):
+        self.shards = list(shards)
+        self.max_workers = max_workers
+
+    def alias_for(self, value):
+        '''
+        Returns the alias holding ``value``, for instance for a router.
+        '''
+        for shard in self.shards:
+            if (shard.start is None or shard.start <= value) and (shard.end is None or value < shard.end):
+                return shard.alias
+        return None
+
+    def prune(self, start=None, end=None):
+        '''
+        Returns the aliases of the shards overlapping ``[start, end)``.
+        '''
+        aliases = []
+        for shard in self.shards:
+            if intervals.intersect([(shard.start, shard.end)], [(start, end)]) and shard.alias not in aliases:
+                aliases.append(shard.alias)
+        return aliases
+
+    def run(self, function, queryset, aliases):
+        '''
+        Returns the results of ``function`` called on ``queryset`` on every
+        alias of ``aliases``, in the same order.
+        '''
+        if len(aliases) < 2:
+            return [function(queryset.using(alias)) for alias in aliases]
+
+        def call(alias):
+            try:
+                return function(queryset.using(alias))
+            finally:
+                # Every thread has its own connections.
+                connections[alias].close()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(aliases)) as executor:
+            return list(executor.map(call, aliases))
+
+    def count(self, queryset, aliases):
+        return sum(self.run(lambda shard: shard.count(), queryset, aliases))
+
+    def merge(self, queryset, aliases, limit=None):
+        '''
+        Returns the first ``limit`` rows (all of them if None) of ``queryset``
+        on ``aliases``, in the order of ``queryset``.
+        '''
+        rows = self.run(lambda shard: list(shard[:limit] if limit is not None else shard), queryset, aliases)
+        merged = heapq.merge(*rows, key=get_sort_key(queryset))
+        return list(itertools.islice(merged, limit))
+
+
+def _compare(a, b):
+    # None sorts first, like on SQLite.
+    if a == b:
+        return 0
+    if a is None:
+        return -1
+    if b is None:
+        return 1
+    return -1 if a < b else 1
+
+
+def get_sort_key(queryset):
+    '''
+    Returns the key sorting model instances in the order of ``queryset``.
+    '''
+    ordering = list(queryset.query.order_by or queryset.query.get_meta().ordering)
+    fields = []
+    for item in ordering:
+        if isinstance(item, OrderBy) and isinstance(item.expression, F):
+            fields.append((item.expression.name, item.descending))
+        elif isinstance(item, F):
+            fields.append((item.name, False))
+        elif isinstance(item, str) and item != '?':
+            fields.append((item.lstrip('-'), item.startswith('-')))
+        else:
+            raise ValueError('Sharded changelists can\'t be ordered by %r.' % (item,))
+
+    def get_value(instance, name):
+        for part in name.split('__'):
+            if instance is None:
+                return None
+            instance = getattr(instance, part)
+        return instance
+
+    def compare(a, b):
+        for name, descending in fields:
+            result = _compare(get_value(a, name), get_value(b, name))
+            if result:
+                return -result if descending else result
+        return 0
+
+    return functools.cmp_to_key(compare)
+
+
+class ShardedPaginator(Paginator):
+    '''
+    Paginator counting and reading the rows of ``object_list`` on the
+    ``aliases`` of ``shard_map``.
+    '''
+
+    def __init__(self, object_list, per_page, shard_map, aliases, orphans=0, allow_empty_first_page=True):
+        super(ShardedPaginator, self).__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.shard_map = shard_map
+        self.aliases = aliases
+
+    @cached_property
+    def count(self):
+        return self.shard_map.count(self.object_list, self.aliases)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        rows = self.shard_map.merge(self.object_list, self.aliases, top)[bottom:top]
+        return self._get_page(rows, number, self)
+
+    def all(self):
+        return self.shard_map.merge(self.object_list, self.aliases)
+
+
+class ShardedChangeListMixin(object):
+
+    def get_results(self, request):
+        filter_ = getattr(request, 'daterange_filter_sharded', None)
+        full_count = filter_ is not None and self.model_admin.show_full_result_count
+        root_queryset = self.root_queryset
+        if full_count:
+            # The admin would only count the rows of the default alias.
+            self.root_queryset = root_queryset.none()
+        try:
+            super(ShardedChangeListMixin, self).get_results(request)
+        finally:
+            self.root_queryset = root_queryset
+        if full_count:
+            self.full_result_count = filter_.shards.count(root_queryset, filter_.shards.prune())
+        if isinstance(self.paginator, ShardedPaginator) and not isinstance(self.result_list, list):
+            # Every row fits on the page: the admin took the queryset itself.
+            self.result_list = self.paginator.all()
+
+
+class RangeShardsMixin(object):
+    '''
+    ModelAdmin mixin reading the changelist from the shards of the list
+    filter that has ``shards`` set.
+    '''
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        filter_ = getattr(request, 'daterange_filter_sharded', None)
+        if filter_ is None:
+            return super(RangeShardsMixin, self).get_paginator(
+                request, queryset, per_page, orphans, allow_empty_first_page)
+        return ShardedPaginator(queryset, per_page, filter_.shards, filter_.get_shard_aliases(),
+                                orphans, allow_empty_first_page)
+
+    def get_changelist(self, request, **kwargs):
+        changelist = super(RangeShardsMixin, self).get_changelist(request, **kwargs)
+        return type('Sharded%s' % changelist.__name__, (ShardedChangeListMixin, changelist), {})
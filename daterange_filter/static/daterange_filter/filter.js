@@ -0,0 +1,15 @@
+// reset button after submitting dates does not work, so
+// here is the solution which implements the fix.
+django.jQuery(document).ready(function(){
+    django.jQuery("#resetBtn").click(function(){
+        var gte = django.jQuery("input[id^=id_drf__][id$=gte]")[0].defaultValue = "";
+        var lte = django.jQuery("input[id^=id_drf__][id$=lte]")[0].defaultValue = "";
+    });
+    // fill the facets rendered after the page
+    django.jQuery(".daterange-deferred").each(function(){
+        var placeholder = django.jQuery(this).removeClass("daterange-deferred");
+        django.jQuery.getJSON(placeholder.data("url"), function(data){
+            placeholder.html(data.html);
+        });
+    });
+});
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+
+'''
+Template tags of the range filters.
+
+'''
+from django import template
+
+from daterange_filter import instrumentation
+from daterange_filter.cache import get_cache
+
+register = template.Library()
+
+
+class TimedNode(template.Node):
+
+    def __init__(self, nodelist, spec):
+        self.nodelist = nodelist
+        self.spec = spec
+
+    def render(self, context):
+        spec = self.spec.resolve(context)
+        with instrumentation.timed(spec, 'render') as data:
+            output = self.nodelist.render(context)
+            changelist = getattr(spec, 'changelist', None)
+            if changelist is not None and instrumentation.is_enabled():
+                data['rows'] = len(changelist.result_list)
+                data['result_count'] = changelist.result_count
+        return output
+
+
+@register.tag
+def timed(parser, token):
+    '''
+    Renders its content, sending its rendering time (see instrumentation.py)
+    for the filter ``spec``::
+
+        {% timed spec %}...{% endtimed %}
+    '''
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError("'%s' takes the filter as only argument" % bits[0])
+    nodelist = parser.parse(('endtimed',))
+    parser.delete_first_token()
+    return TimedNode(nodelist, parser.compile_filter(bits[1]))
+
+
+class CachedFragmentNode(template.Node):
+
+    def __init__(self, nodelist, spec, choice):
+        self.nodelist = nodelist
+        self.spec = spec
+        self.choice = choice
+
+    def render(self, context):
+        spec = self.spec.resolve(context)
+        key = spec.get_fragment_key(self.choice.resolve(context))
+        if key is None:
+            return self.nodelist.render(context)
+        cache = get_cache()
+        output = cache.get(key)
+        if output is None:
+            output = self.nodelist.render(context)
+            cache.set(key, output, spec.fragment_cache_timeout)
+        return output
+
+
+@register.tag
+def cachedfragment(parser, token):
+    '''
+    Renders its content once per cache key of the filter ``spec`` (see
+    ``DateRangeFilterBase.get_fragment_key``) rendered with ``choice``::
+
+        {% cachedfragment spec choice %}...{% endcachedfragment %}
+    '''
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError("'%s' takes the filter and its choice as arguments" % bits[0])
+    nodelist = parser.parse(('endcachedfragment',))
+    parser.delete_first_token()
+    return CachedFragmentNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
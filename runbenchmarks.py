@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+import argparse
+import sys
+from django.conf import settings
+
+
+settings.configure(
+    USE_TZ=True,
+    DEBUG=False,
+    SECRET_KEY='daterange_filter',
+    DATABASES={
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    },
+    INSTALLED_APPS=[
+        'django.contrib.auth',
+        'django.contrib.contenttypes',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'django.contrib.staticfiles',
+        'django.contrib.admin',
+        'daterange_filter',
+        'benchmarks',
+    ],
+    MIDDLEWARE=[
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    ],
+    TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    }],
+    ROOT_URLCONF='benchmarks.urls',
+    STATIC_URL='/static/',
+    ALLOWED_HOSTS=['testserver'],
+)
+
+import django
+django.setup()
+
+from django.core.management import call_command
+
+from benchmarks import suite
+
+parser = argparse.ArgumentParser(description='Benchmarks the date range filters.')
+parser.add_argument('--rows', type=int, default=1000000, help='Rows of the synthetic table (1000000).')
+parser.add_argument('--repeat', type=int, default=5, help='Runs of every benchmark (5).')
+parser.add_argument('--only', help='Only run the benchmarks whose name contains ONLY.')
+parser.add_argument('--output', default='benchmark-results.json', help='Where to write the results.')
+parser.add_argument('--compare', help='Results of a previous run to compare with.')
+parser.add_argument('--threshold', type=float, default=0.2,
+                    help='Fail when a median is slower than the compared one by more than this (0.2).')
+args = parser.parse_args()
+
+call_command('migrate', run_syncdb=True, verbosity=0)
+suite.generate(args.rows)
+
+results = suite.report(suite.run(args.repeat, args.only), args.rows)
+suite.write(results, args.output)
+for name, result in sorted(results['results'].items()):
+    print('%-45s %12.3f ms' % (name, result['median'] * 1000))
+
+if args.compare:
+    regressions = suite.compare(results, suite.read(args.compare), args.threshold)
+    for name, ratio in regressions:
+        print('REGRESSION %s: %.0f%% slower' % (name, (ratio - 1) * 100))
+    sys.exit(1 if regressions else 0)
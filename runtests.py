@@ -6,7 +6,56 @@ import pytest
 from django.conf import settings
 
 
-settings.configure(USE_TZ=True)
+settings.configure(
+    USE_TZ=True,
+    SECRET_KEY='daterange_filter',
+    DATABASES={
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+        # Shards of tests/test_shards.py.
+        'shard_1': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+        'shard_2': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    },
+    INSTALLED_APPS=[
+        'django.contrib.auth',
+        'django.contrib.contenttypes',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'django.contrib.staticfiles',
+        'django.contrib.admin',
+        'daterange_filter',
+        'daterange_filter.rollup',
+        'tests',
+    ],
+    MIDDLEWARE=[
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'django.middleware.csrf.CsrfViewMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    ],
+    TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    }],
+    ROOT_URLCONF='tests.urls',
+    STATIC_URL='/static/',
+)
 
 try:
     import django
@@ -16,6 +65,13 @@ except AttributeError:
 else:
     setup()
 
+from django.db import connections
+from django.test.utils import setup_test_environment
+
+setup_test_environment()
+for connection in connections.all():
+    connection.creation.create_test_db(verbosity=0)
+
 args = ['-rsxX', '--tb=native', '--cov', 'daterange_filter', '--cov-config', '.coveragerc',
         '--cov-report', 'html', '--cov-report', 'term-missing'] + sys.argv[1:]
 
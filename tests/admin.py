@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from daterange_filter.bulk import delete_range_in_batches, make_update_action
+from daterange_filter.export import RangeExportMixin, export_as_csv, export_as_ndjson
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from tests.models import Event
+
+site = admin.AdminSite(name='test_admin')
+
+
+class EventAdmin(RangeExportMixin, admin.ModelAdmin):
+    list_display = ('name', 'day', 'created_at')
+    list_filter = ('name', ('day', DateRangeFilter), ('created_at', DateTimeRangeFilter))
+    actions = [export_as_csv, export_as_ndjson, delete_range_in_batches,
+               make_update_action('archive_range', {'name': 'archived'}, 'Archive selected rows')]
+    bulk_batch_size = 2
+    export_fields = ('id', 'name', 'day', 'created_at')
+
+
+site.register(Event, EventAdmin)
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class Event(models.Model):
+    name = models.CharField(max_length=50, blank=True)
+    day = models.DateField(db_index=True)
+    created_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class Ticket(models.Model):
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10)
+    sold_at = models.DateTimeField()
+
+    class Meta:
+        app_label = 'tests'
+
+
+class Refund(models.Model):
+    ticket = models.ForeignKey(Ticket, on_delete=models.PROTECT)
+
+    class Meta:
+        app_label = 'tests'
@@ -0,0 +1,151 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mock import patch
+
+from daterange_filter import bulk
+from tests import BaseTest
+from tests.admin import EventAdmin
+from tests.models import Event, Refund, Ticket
+
+
+class TimeSlicesTest(BaseTest):
+
+    def test_slices(self):
+        self.assertEqual(list(bulk.time_slices(date(2015, 1, 1), date(2015, 1, 6), timedelta(days=2))), [
+            (date(2015, 1, 1), date(2015, 1, 3)), (date(2015, 1, 3), date(2015, 1, 5)),
+            (date(2015, 1, 5), date(2015, 1, 6))])
+
+
+class BatchesTest(TestCase):
+
+    def setUp(self):
+        self.events = [Event.objects.create(day=date(2015, 1, day), created_at=timezone.now())
+                       for day in (1, 1, 2, 3, 3, 3, 4)]
+
+    def test_pk_batches(self):
+        self.assertEqual(list(bulk.pk_batches(Event.objects.all(), 3)),
+                         [[e.pk for e in self.events[:3]], [e.pk for e in self.events[3:6]], [self.events[6].pk]])
+
+    def test_time_sliced_batches(self):
+        batches = list(bulk.iter_batches(Event.objects.all(), batch_size=2, field_path='day', start=date(2015, 1, 1),
+                                         end=date(2015, 1, 4), slice_size=timedelta(days=2)))
+        self.assertEqual(batches, [[e.pk for e in self.events[:2]], [self.events[2].pk],
+                                   [e.pk for e in self.events[3:5]], [self.events[5].pk]])
+
+    def test_batched_delete_commits_per_batch(self):
+        progress = []
+        with CaptureQueriesContext(connection) as queries:
+            result = bulk.batched_delete(Event.objects.filter(day__lte=date(2015, 1, 3)), batch_size=4,
+                                         progress=lambda *args: progress.append(args))
+
+        self.assertEqual(result, (2, 6))
+        self.assertEqual(progress, [(1, 4), (2, 6)])
+        self.assertEqual(list(Event.objects.values_list('day', flat=True)), [date(2015, 1, 4)])
+        self.assertEqual(len([q for q in queries.captured_queries if q['sql'].startswith('SAVEPOINT')]), 2)
+
+    def test_batched_delete_logs_each_batch(self):
+        logged = []
+        bulk.batched_delete(Event.objects.filter(day=date(2015, 1, 3)), batch_size=2,
+                            log=lambda batch: logged.append(sorted(batch.values_list('pk', flat=True))))
+        self.assertEqual(logged, [[e.pk for e in self.events[3:5]], [self.events[5].pk]])
+
+    def test_cascaded_counts(self):
+        for event in self.events[:3]:
+            Ticket.objects.create(event=event, kind='vip', sold_at=timezone.now())
+        with self.assertNumQueries(1):
+            self.assertEqual(bulk.get_cascaded_counts(Event.objects.filter(day=date(2015, 1, 1))), [(Ticket, 2)])
+        self.assertEqual(bulk.get_cascaded_counts(Event.objects.filter(day=date(2015, 1, 3))), [])
+
+    def test_protected_counts(self):
+        tickets = [Ticket.objects.create(event=event, kind='vip', sold_at=timezone.now()) for event in self.events[:3]]
+        Refund.objects.create(ticket=tickets[0])
+        Refund.objects.create(ticket=tickets[1])
+        self.assertEqual(bulk.get_protected_counts(Event.objects.filter(day=date(2015, 1, 1))), [(Refund, 2)])
+        self.assertEqual(bulk.get_protected_counts(Event.objects.filter(day=date(2015, 1, 2))), [])
+
+    def test_batched_update(self):
+        self.assertEqual(bulk.batched_update(Event.objects.filter(day=date(2015, 1, 3)), {'name': 'spam'},
+                                             batch_size=2), (2, 3))
+        self.assertEqual(Event.objects.filter(name='spam').count(), 3)
+
+
+class BulkActionTest(TestCase):
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        for day in (1, 2, 3, 4):
+            Event.objects.create(day=date(2015, 1, day), created_at=tz.localize(datetime(2015, 1, day, 12)))
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        self.url = '/admin/tests/event/?drf__day__gte=2015-01-02'
+
+    def post(self, action, **extra):
+        data = {'action': action, 'select_across': '1', 'index': '0', '_selected_action': ['1']}
+        data.update(extra)
+        return self.client.post(self.url, data)
+
+    def test_confirmation_is_built_from_a_count(self):
+        with patch.object(Event, '__init__', side_effect=AssertionError('No object should be loaded')):
+            response = self.post('delete_range_in_batches')
+
+        self.assertContains(response, '3 events will be processed in batches')
+        self.assertEqual(Event.objects.count(), 4)
+
+    def test_confirmed_delete(self):
+        response = self.post('delete_range_in_batches', post='yes')
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(Event.objects.values_list('day', flat=True)), [date(2015, 1, 1)])
+        entries = LogEntry.objects.filter(user=self.user, action_flag=DELETION)
+        self.assertEqual(entries.count(), 3)
+        self.assertEqual(entries[0].object_repr, 'Event object (%s)' % entries[0].object_id)
+
+    def test_cascaded_delete_needs_the_related_permission(self):
+        Ticket.objects.create(event=Event.objects.get(day=date(2015, 1, 3)), kind='vip', sold_at=timezone.now())
+        staff = User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True)
+        staff.user_permissions.set(Permission.objects.filter(codename__in=['view_event', 'delete_event']))
+        self.client.force_login(staff)
+
+        response = self.post('delete_range_in_batches')
+        self.assertContains(response, "doesn't have permission to delete the following types of objects")
+        self.assertContains(response, '<li>ticket</li>', html=True)
+        response = self.post('delete_range_in_batches', post='yes')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Event.objects.count(), 4)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+        staff.user_permissions.add(Permission.objects.get(codename='delete_ticket'))
+        response = self.post('delete_range_in_batches')
+        self.assertContains(response, 'Tickets: 1')
+        self.post('delete_range_in_batches', post='yes')
+        self.assertEqual(Event.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 0)
+
+    def test_protected_rows_are_not_deleted(self):
+        ticket = Ticket.objects.create(event=Event.objects.get(day=date(2015, 1, 3)), kind='vip',
+                                       sold_at=timezone.now())
+        Refund.objects.create(ticket=ticket)
+
+        response = self.post('delete_range_in_batches')
+        self.assertContains(response, 'would require deleting the following protected related objects')
+        self.assertContains(response, '<li>Refunds: 1</li>', html=True)
+        response = self.post('delete_range_in_batches', post='yes')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Event.objects.count(), 4)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_confirmed_update_in_time_slices(self):
+        self.url += '&drf__day__lte=2015-01-03'
+        with patch.object(EventAdmin, 'bulk_slice_size', timedelta(days=1), create=True):
+            with patch('daterange_filter.bulk.run_batches', wraps=bulk.run_batches) as run_batches:
+                self.post('archive_range', post='yes')
+
+        self.assertEqual(run_batches.call_args[1]['slice_size'], timedelta(days=1))
+        self.assertEqual(run_batches.call_args[1]['end'], date(2015, 1, 4))
+        self.assertEqual(Event.objects.filter(name='archived').count(), 2)
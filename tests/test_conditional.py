@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+from mock import patch
+
+from daterange_filter.conditional import RangeConditionalMixin
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from tests.models import Event
+
+
+class ConditionalDateRangeFilter(DateRangeFilter):
+    conditional_get = True
+    modified_field = 'updated_at'
+
+
+class ConditionalDateTimeRangeFilter(DateTimeRangeFilter):
+    conditional_get = True
+    modified_field = 'updated_at'
+
+
+class EventAdmin(RangeConditionalMixin, admin.ModelAdmin):
+    list_filter = ('name', ('day', ConditionalDateRangeFilter), ('created_at', ConditionalDateTimeRangeFilter))
+
+
+site = admin.AdminSite(name='conditional_admin')
+site.register(Event, EventAdmin)
+
+urlpatterns = [
+    path('admin/', site.urls),
+]
+
+URL = '/admin/tests/event/'
+
+
+@override_settings(ROOT_URLCONF='tests.test_conditional')
+class ConditionalGetTest(TestCase):
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        self.updated_at = tz.localize(datetime(2015, 2, 1, 12))
+        for day in (1, 2, 3, 9):
+            Event.objects.create(name='day %s' % day, day=date(2015, 1, day), updated_at=self.updated_at,
+                                 created_at=tz.localize(datetime(2015, 1, day, 12)))
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.user)
+        # Gets the CSRF cookie the pages are rendered with.
+        self.client.get(URL)
+        self.params = {'drf__day__gte': '2015-01-02', 'drf__day__lte': '2015-01-05'}
+
+    def get(self, params, **headers):
+        return self.client.get(URL, params, **headers)
+
+    def revalidate(self, response, params=None):
+        return self.get(params or self.params, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_past_range_has_validators(self):
+        response = self.get(self.params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'])
+        self.assertEqual(response['Last-Modified'], 'Sun, 01 Feb 2015 18:00:00 GMT')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotIn('no-store', response['Cache-Control'])
+
+    def test_not_modified(self):
+        response = self.get(self.params)
+
+        self.assertEqual(self.revalidate(response).status_code, 304)
+        self.assertEqual(self.get(self.params, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_not_modified_skips_the_changelist_queries(self):
+        response = self.get(self.params)
+
+        with self.assertNumQueries(3):  # Session, user and the aggregate.
+            self.revalidate(response)
+
+    def test_rows_out_of_the_range(self):
+        response = self.get(self.params)
+        Event.objects.create(day=date(2015, 1, 20), created_at=timezone.now(), updated_at=self.updated_at)
+
+        self.assertEqual(self.revalidate(response).status_code, 304)
+
+    def test_modified_rows(self):
+        response = self.get(self.params)
+        Event.objects.filter(day=date(2015, 1, 3)).update(updated_at=self.updated_at + timedelta(seconds=1))
+
+        self.assertEqual(self.revalidate(response).status_code, 200)
+
+    def test_added_and_deleted_rows(self):
+        response = self.get(self.params)
+        Event.objects.create(day=date(2015, 1, 4), created_at=timezone.now(), updated_at=self.updated_at)
+        self.assertEqual(self.revalidate(response).status_code, 200)
+
+        response = self.get(self.params)
+        Event.objects.filter(day=date(2015, 1, 4)).delete()
+        self.assertEqual(self.revalidate(response).status_code, 200)
+
+    def test_other_params(self):
+        response = self.get(self.params)
+
+        self.assertEqual(self.revalidate(response, dict(self.params, o='-1')).status_code, 200)
+        self.assertEqual(self.revalidate(response, dict(self.params, name='day 2')).status_code, 200)
+
+    def test_other_user(self):
+        response = self.get(self.params)
+        self.client.force_login(User.objects.create_superuser('other', 'other@example.com', 'password'))
+
+        self.assertEqual(self.revalidate(response).status_code, 200)
+
+    def test_ranges_not_closed_or_not_past(self):
+        today = timezone.localdate()
+        for params in ({}, {'drf__day__gte': '2015-01-02'}, {'drf__day__lte': today.isoformat()},
+                       {'drf__day__lte': 'spam'}):
+            response = self.get(params)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('ETag'), params)
+            self.assertIn('no-store', response['Cache-Control'])
+
+    def test_past_datetime_range(self):
+        params = {'drf__created_at__gte_0': '2015-01-01', 'drf__created_at__gte_1': '00:00:00',
+                  'drf__created_at__lte_0': '2015-01-05', 'drf__created_at__lte_1': '23:59:59'}
+        response = self.get(params)
+
+        self.assertTrue(response['ETag'])
+        self.assertEqual(self.revalidate(response, params).status_code, 304)
+        Event.objects.filter(day=date(2015, 1, 2)).update(updated_at=self.updated_at + timedelta(seconds=1))
+        self.assertEqual(self.revalidate(response, params).status_code, 200)
+
+    def test_modified_field_is_required(self):
+        with patch.object(ConditionalDateTimeRangeFilter, 'modified_field', None):
+            self.assertRaises(ImproperlyConfigured, self.get, self.params)
+
+    def test_changelist_built_once_without_a_past_range(self):
+        with patch.object(EventAdmin, 'get_changelist_instance', autospec=True,
+                          side_effect=admin.ModelAdmin.get_changelist_instance) as get_changelist_instance:
+            self.get({'drf__day__gte': '2015-01-02'})
+        self.assertEqual(get_changelist_instance.call_count, 1)
+
+        with patch.object(EventAdmin, 'get_changelist_instance', autospec=True,
+                          side_effect=admin.ModelAdmin.get_changelist_instance) as get_changelist_instance:
+            self.get(self.params)
+        self.assertEqual(get_changelist_instance.call_count, 2)
+
+    def test_pending_messages(self):
+        response = self.get(self.params)
+        with patch('django.contrib.messages.storage.fallback.FallbackStorage.__len__', return_value=1):
+            self.assertEqual(self.revalidate(response).status_code, 200)
+
+    def test_permission(self):
+        response = self.get(self.params)
+        self.user.is_superuser = False
+        self.user.save()
+
+        self.assertEqual(self.revalidate(response).status_code, 403)
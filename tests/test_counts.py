@@ -0,0 +1,83 @@
+from datetime import date, datetime
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from mock import Mock
+
+from daterange_filter.counts import CachedCount, EstimatedCount, ExactCount, planner_estimate
+from daterange_filter.filter import DateRangeFilter
+from daterange_filter.pagination import CountingPaginator, RangePaginationMixin
+from tests.models import Event
+
+
+class EstimatedDateRangeFilter(DateRangeFilter):
+    count_strategy = EstimatedCount(exact_below=10, sources=[lambda queryset, filter_: 1000])
+
+
+class CachedDateRangeFilter(DateRangeFilter):
+    count_strategy = CachedCount()
+
+
+class EventAdmin(RangePaginationMixin, admin.ModelAdmin):
+    list_filter = (('day', CachedDateRangeFilter), )
+    show_full_result_count = False
+
+
+class EstimatedEventAdmin(EventAdmin):
+    list_filter = (('day', EstimatedDateRangeFilter), )
+
+
+class CountStrategyTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for day in (1, 2, 2, 3):
+            Event.objects.create(day=date(2015, 1, day), created_at=datetime(2015, 1, day, tzinfo=timezone.utc))
+
+    def get_changelist(self, model_admin_class, params):
+        request = RequestFactory().get('/', params)
+        request.user = Mock()
+        return model_admin_class(Event, admin.site).get_changelist_instance(request)
+
+    def test_exact(self):
+        self.assertEqual(ExactCount().count(Event.objects.filter(day=date(2015, 1, 2)), None), (2, False))
+
+    def test_cached_by_queryset(self):
+        strategy = CachedCount()
+        self.assertEqual(strategy.count(Event.objects.filter(day=date(2015, 1, 2)), None), (2, False))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(strategy.count(Event.objects.filter(day=date(2015, 1, 2)), None), (2, False))
+            self.assertEqual(strategy.count(Event.objects.none(), None), (0, False))
+        with self.assertNumQueries(1):
+            self.assertEqual(strategy.count(Event.objects.filter(day=date(2015, 1, 3)), None), (1, False))
+
+    def test_estimated(self):
+        strategy = EstimatedCount(exact_below=10, sources=[lambda queryset, filter_: None,
+                                                           lambda queryset, filter_: 5000])
+        with self.assertNumQueries(0):
+            self.assertEqual(strategy.count(Event.objects.all(), None), (5000, True))
+
+    def test_estimated_narrow_ranges_are_exact(self):
+        strategy = EstimatedCount(exact_below=10, sources=[lambda queryset, filter_: 5])
+        self.assertEqual(strategy.count(Event.objects.all(), None), (4, False))
+
+    def test_planner_estimate_needs_postgresql(self):
+        self.assertEqual(planner_estimate(Event.objects.all(), None), None)
+
+    def test_changelist_uses_the_strategy_of_the_filter(self):
+        cl = self.get_changelist(EventAdmin, {'drf__day__gte': '2015-01-02'})
+
+        self.assertIsInstance(cl.paginator, CountingPaginator)
+        self.assertEqual(cl.result_count, 3)
+        self.assertEqual(cl.filter_specs[0].choices(cl)[0]['count'], {'value': 3, 'estimated': False})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_changelist(EventAdmin, {'drf__day__gte': '2015-01-02'}).result_count, 3)
+
+    def test_changelist_shows_estimated_counts(self):
+        cl = self.get_changelist(EstimatedEventAdmin, {'drf__day__gte': '2015-01-02'})
+
+        self.assertEqual(cl.result_count, 1000)
+        self.assertEqual(cl.filter_specs[0].choices(cl)[0]['count'], {'value': 1000, 'estimated': True})
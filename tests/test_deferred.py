@@ -0,0 +1,88 @@
+from datetime import date, datetime
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils import timezone
+
+from daterange_filter.deferred import RangeFacetsMixin
+from daterange_filter.filter import DateRangeFilter
+from tests.models import Event
+
+
+class DeferredDateRangeFilter(DateRangeFilter):
+    deferred_facets = True
+    histogram = True
+    use_extent = True
+
+
+class EventAdmin(RangeFacetsMixin, admin.ModelAdmin):
+    list_filter = ('name', ('day', DeferredDateRangeFilter))
+
+
+class InlineEventAdmin(admin.ModelAdmin):
+    list_filter = (('day', DeferredDateRangeFilter),)
+
+
+site = admin.AdminSite(name='deferred_admin')
+site.register(Event, EventAdmin)
+inline_site = admin.AdminSite(name='inline_admin')
+inline_site.register(Event, InlineEventAdmin)
+
+urlpatterns = [
+    path('deferred/', site.urls),
+    path('inline/', inline_site.urls),
+]
+
+
+@override_settings(ROOT_URLCONF='tests.test_deferred')
+class DeferredFacetsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tz = timezone.get_current_timezone()
+        for day in (1, 2, 2, 3, 9):
+            Event.objects.create(name='day %s' % day, day=date(2015, 1, day),
+                                 created_at=tz.localize(datetime(2015, 1, day, 12)))
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.params = {'drf__day__gte': '2015-01-02', 'drf__day__lte': '2015-01-09'}
+
+    def test_changelist_renders_a_placeholder(self):
+        response = self.client.get('/deferred/tests/event/', dict(self.params, p='0'))
+        self.assertContains(response, 'class="daterange-deferred" data-url="/deferred/tests/event/facets/day/?')
+        self.assertContains(response, 'drf__day__gte=2015-01-02')
+        self.assertNotContains(response, '<ul class="daterange-histogram">')
+        self.assertNotContains(response, 'daterange-extent')
+
+    def test_facets_view(self):
+        response = self.client.get('/deferred/tests/event/facets/day/', self.params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], {'value': 4, 'estimated': False})
+        self.assertEqual(data['extent'], {'min': '2015-01-01', 'max': '2015-01-09'})
+        self.assertEqual([(bar['start'], bar['count']) for bar in data['histogram']],
+                         [('2015-01-02', 2), ('2015-01-03', 1), ('2015-01-09', 1)])
+        self.assertIn('<ul class="daterange-histogram">', data['html'])
+        self.assertIn('4 results', data['html'])
+
+    def test_facets_are_cached_by_range(self):
+        self.client.get('/deferred/tests/event/facets/day/', self.params)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/deferred/tests/event/facets/day/', dict(self.params, p='3'))
+        self.assertEqual(response.json()['count']['value'], 4)
+        self.assertFalse([query for query in queries.captured_queries if 'tests_event' in query['sql']])
+
+        response = self.client.get('/deferred/tests/event/facets/day/', dict(self.params, name='day 2'))
+        self.assertEqual(response.json()['count']['value'], 2)
+
+    def test_unknown_filter(self):
+        self.assertEqual(self.client.get('/deferred/tests/event/facets/created_at/').status_code, 404)
+
+    def test_inline_without_the_mixin(self):
+        response = self.client.get('/inline/tests/event/', self.params)
+        self.assertNotContains(response, 'class="daterange-deferred"')
+        self.assertContains(response, '<ul class="daterange-histogram">')
@@ -0,0 +1,102 @@
+from datetime import date, datetime
+
+from django.contrib import admin
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from mock import Mock
+
+from daterange_filter import exists
+from daterange_filter.filter import DateTimeRangeFilter
+from tests.models import Event, Ticket
+
+
+class JoinDateTimeRangeFilter(DateTimeRangeFilter):
+    exists_subquery = False
+
+
+class MultiDateTimeRangeFilter(DateTimeRangeFilter):
+    multi_range = True
+
+
+class EventAdmin(exists.RangeExistsMixin, admin.ModelAdmin):
+    list_filter = (('ticket__sold_at', DateTimeRangeFilter), 'ticket__kind')
+
+
+class JoinEventAdmin(admin.ModelAdmin):
+    list_filter = (('ticket__sold_at', JoinDateTimeRangeFilter),)
+
+
+class RelatedLookupTest(TestCase):
+
+    def test_multi_valued_paths(self):
+        self.assertEqual(exists.get_related_lookup(Event, 'ticket__sold_at'), (Ticket, 'event'))
+        self.assertEqual(exists.get_related_lookup(Event, 'ticket__event__ticket__sold_at'),
+                         (Ticket, 'event__ticket__event'))
+
+    def test_single_valued_paths(self):
+        self.assertEqual(exists.get_related_lookup(Event, 'day'), None)
+        self.assertEqual(exists.get_related_lookup(Ticket, 'event__day'), None)
+
+
+class ExistsFilterTest(TestCase):
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        self.events = [Event.objects.create(name='event %s' % i, day=date(2015, 1, 1),
+                                            created_at=timezone.now()) for i in range(3)]
+        for event, days in zip(self.events, ((1, 2, 2, 3), (5,), ())):
+            for day in days:
+                Ticket.objects.create(event=event, kind='adult', sold_at=tz.localize(datetime(2015, 1, day, 12)))
+        self.params = {'drf__ticket__sold_at__gte_0': '2015-01-01', 'drf__ticket__sold_at__gte_1': '00:00:00',
+                       'drf__ticket__sold_at__lte_0': '2015-01-05', 'drf__ticket__sold_at__lte_1': '23:59:59'}
+
+    def make_filter(self, params, filter_class=DateTimeRangeFilter):
+        return filter_class(Ticket._meta.get_field('sold_at'), None, dict(params), Event, None, 'ticket__sold_at')
+
+    def test_same_rows_as_the_join(self):
+        join = self.make_filter(self.params, JoinDateTimeRangeFilter).queryset(None, Event.objects.all())
+        subquery = self.make_filter(self.params).queryset(None, Event.objects.all())
+
+        self.assertEqual(len(join), 5)
+        self.assertEqual(sorted(event.pk for event in subquery), [self.events[0].pk, self.events[1].pk])
+        self.assertEqual(set(join), set(subquery))
+
+    def test_sql_shape(self):
+        sql = str(self.make_filter(self.params).queryset(None, Event.objects.all()).query)
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertIn('FROM "tests_ticket" U0 WHERE (U0."sold_at" >=', sql)
+        self.assertIn('U0."event_id" = ("tests_event"."id")', sql)
+
+    def test_no_range_doesnt_filter(self):
+        filter_ = self.make_filter({})
+        self.assertTrue(filter_.uses_exists)
+        self.assertEqual(filter_.queryset(None, Event.objects.all()).count(), 3)
+
+    def test_several_intervals(self):
+        filter_ = self.make_filter({'drf__ticket__sold_at__include': '2015-01-01,2015-01-05'},
+                                   MultiDateTimeRangeFilter)
+        self.assertEqual(sorted(event.pk for event in filter_.queryset(None, Event.objects.all())),
+                         [self.events[0].pk, self.events[1].pk])
+        filter_ = self.make_filter({'drf__ticket__sold_at__include': '2015-01-02..2015-01-04'},
+                                   MultiDateTimeRangeFilter)
+        self.assertEqual([event.pk for event in filter_.queryset(None, Event.objects.all())], [self.events[0].pk])
+
+    def test_changelist_without_distinct(self):
+        request = RequestFactory().get('/', self.params)
+        request.user = Mock()
+        changelist = EventAdmin(Event, admin.site).get_changelist_instance(request)
+        self.assertFalse(changelist.queryset.query.distinct)
+        self.assertEqual(changelist.result_count, 2)
+
+        changelist = JoinEventAdmin(Event, admin.site).get_changelist_instance(request)
+        self.assertTrue(changelist.queryset.query.distinct)
+        self.assertEqual(changelist.result_count, 2)
+
+    def test_changelist_keeps_distinct_of_other_filters(self):
+        request = RequestFactory().get('/', dict(self.params, ticket__kind='adult'))
+        request.user = Mock()
+        changelist = EventAdmin(Event, admin.site).get_changelist_instance(request)
+        self.assertTrue(changelist.queryset.query.distinct)
+        self.assertEqual(changelist.result_count, 2)
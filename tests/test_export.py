@@ -0,0 +1,93 @@
+import json
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from daterange_filter import export
+from tests.models import Event
+
+
+class IterChunksTest(TestCase):
+
+    def setUp(self):
+        start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+        self.events = [Event.objects.create(name='event %s' % i, day=date(2015, 1, 1),
+                                            created_at=start + timedelta(hours=i // 3))
+                       for i in range(10)]
+
+    def test_every_row_once_in_keyset_order(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(export.iter_chunks(Event.objects.all(), 'created_at', ['id'], chunk_size=3))
+
+        self.assertEqual([row['id'] for row in rows], [event.pk for event in self.events])
+        self.assertEqual(len(queries.captured_queries), 4)
+        self.assertFalse([query for query in queries.captured_queries if 'OFFSET' in query['sql']])
+
+    def test_rows_without_value(self):
+        for event in self.events[:4]:
+            event.updated_at = event.created_at
+            event.save()
+        rows = list(export.iter_chunks(Event.objects.all(), 'updated_at', ['id'], chunk_size=3))
+
+        self.assertEqual([row['id'] for row in rows], [event.pk for event in self.events])
+
+    def test_response_is_streamed(self):
+        response = export.export_response(Event.objects.filter(pk__in=[self.events[0].pk, self.events[1].pk]),
+                                          'created_at', 'ndjson', fields=['name', 'day'])
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'name': 'event 0', 'day': '2015-01-01'}, {'name': 'event 1', 'day': '2015-01-01'}])
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, export.export_response, Event.objects.all(), 'day', 'xml')
+
+
+class ExportAdminTest(TestCase):
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        for day in (1, 2, 3):
+            Event.objects.create(name='day %s' % day, day=date(2015, 1, day),
+                                 created_at=tz.localize(datetime(2015, 1, day, 12)))
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.url = '/admin/tests/event/'
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_export_view_streams_the_filtered_range(self):
+        response = self.client.get(self.url + 'export/csv/', {'drf__day__gte': '2015-01-02'})
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="event_2015-01-02.csv"')
+        self.assertEqual(self.content(response).splitlines()[1:], [
+            '2,day 2,2015-01-02,2015-01-02 18:00:00+00:00', '3,day 3,2015-01-03,2015-01-03 18:00:00+00:00'])
+
+    def test_export_view_runs_no_changelist_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.content(self.client.get(self.url + 'export/csv/', {'drf__day__gte': '2015-01-02'}))
+
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'COUNT(' in query['sql'] or query['sql'].endswith('LIMIT 100')])
+
+    def test_export_view_unknown_format(self):
+        self.assertEqual(self.client.get(self.url + 'export/xml/').status_code, 404)
+
+    def test_changelist_links_the_exports(self):
+        response = self.client.get(self.url, {'drf__day__gte': '2015-01-02'})
+        self.assertContains(response, '/admin/tests/event/export/csv/?drf__day__gte=2015-01-02')
+        self.assertContains(response, '/admin/tests/event/export/ndjson/?drf__day__gte=2015-01-02')
+
+    def test_action(self):
+        response = self.client.post(self.url + '?drf__day__lte=2015-01-02', {
+            'action': 'export_as_ndjson', 'select_across': '1', 'index': '0',
+            '_selected_action': [event.pk for event in Event.objects.all()],
+        })
+        self.assertEqual([json.loads(line)['name'] for line in self.content(response).splitlines()],
+                         ['day 1', 'day 2'])
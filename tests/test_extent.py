@@ -0,0 +1,137 @@
+from datetime import date, datetime
+
+from django.contrib.admin.sites import all_sites
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from mock import Mock, patch
+
+from daterange_filter import extent
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from tests import BaseTest
+from tests.models import Event
+
+
+class ExtentDateRangeFilter(DateRangeFilter):
+    use_extent = True
+
+
+class ExtentDateTimeRangeFilter(DateTimeRangeFilter):
+    use_extent = True
+
+
+class ClampTest(BaseTest):
+    extent = (date(2015, 1, 10), date(2015, 1, 20))
+
+    def test_empty_table(self):
+        # Rows may have been added since.
+        self.assertEqual(extent.clamp(date(2015, 1, 1), None, (None, None)), (date(2015, 1, 1), None))
+
+    def test_before_the_data(self):
+        self.assertEqual(extent.clamp(None, date(2015, 1, 10), self.extent), None)
+        self.assertEqual(extent.clamp(date(2014, 1, 1), date(2015, 1, 9), self.extent), None)
+
+    def test_max_is_not_trusted(self):
+        self.assertEqual(extent.clamp(date(2015, 1, 21), None, self.extent), (date(2015, 1, 21), None))
+        self.assertEqual(extent.clamp(date(2000, 1, 1), date(2100, 1, 1), self.extent),
+                         (date(2015, 1, 10), date(2100, 1, 1)))
+        self.assertEqual(extent.clamp(date(2015, 1, 12), None, self.extent), (date(2015, 1, 12), None))
+
+
+class ExtentFilterTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for day in (10, 15, 20):
+            Event.objects.create(day=date(2015, 1, day), created_at=datetime(2015, 1, day, 12, tzinfo=timezone.utc))
+
+    def make_filter(self, params, field_path='day', filter_class=ExtentDateRangeFilter):
+        return filter_class(Event._meta.get_field(field_path), None, params, Event, None, field_path)
+
+    def test_range_before_the_data_skips_the_database(self):
+        self.make_filter({}).get_extent()
+
+        with self.assertNumQueries(0):
+            queryset = self.make_filter({'drf__day__lte': '2015-01-09'}).queryset(None, Event.objects.all())
+            self.assertEqual(list(queryset), [])
+
+    def test_rows_added_without_signals_after_the_max(self):
+        self.make_filter({}).get_extent()
+        Event.objects.bulk_create([Event(day=date(2015, 2, 10), created_at=timezone.now())])
+
+        queryset = self.make_filter({'drf__day__gte': '2015-02-01'}).queryset(None, Event.objects.all())
+        self.assertEqual(queryset.count(), 1)
+        queryset = self.make_filter({'drf__day__gte': '2015-01-01', 'drf__day__lte': '2015-12-31'}).queryset(
+            None, Event.objects.all())
+        self.assertEqual(queryset.count(), 4)
+
+    def test_intervals_keep_the_rows_after_the_max(self):
+        class MultiRangeFilter(ExtentDateRangeFilter):
+            multi_range = True
+
+        self.make_filter({}).get_extent()
+        Event.objects.bulk_create([Event(day=date(2015, 2, 10), created_at=timezone.now())])
+        filter_ = self.make_filter({'drf__day__include': '2015-01-01..2015-01-12,2015-02-01..'},
+                                   filter_class=MultiRangeFilter)
+        self.assertEqual(filter_.queryset(None, Event.objects.all()).count(), 2)
+
+    def test_inverted_range_skips_the_database(self):
+        filter_ = DateRangeFilter(Event._meta.get_field('day'), None,
+                                  {'drf__day__gte': '2015-01-20', 'drf__day__lte': '2015-01-10'}, Event, None, 'day')
+        with self.assertNumQueries(0):
+            self.assertEqual(list(filter_.queryset(None, Event.objects.all())), [])
+
+    def test_over_wide_range_is_clamped(self):
+        filter_ = self.make_filter({'drf__day__gte': '2000-01-01', 'drf__day__lte': '2015-01-15'})
+
+        self.assertEqual(filter_.get_filter_params(), {'day__gte': date(2015, 1, 10), 'day__lt': date(2015, 1, 16)})
+        self.assertEqual(filter_.queryset(None, Event.objects.all()).count(), 2)
+
+    def test_datetime_field(self):
+        filter_ = self.make_filter({'drf__created_at__gte_0': '2015-01-20', 'drf__created_at__gte_1': '13:00:00'},
+                                   'created_at', ExtentDateTimeRangeFilter)
+        self.assertEqual(list(filter_.queryset(None, Event.objects.all())), [])
+
+    def test_save_outside_the_extent_invalidates_it(self):
+        self.assertEqual(self.make_filter({}).get_extent(), (date(2015, 1, 10), date(2015, 1, 20)))
+
+        Event.objects.create(day=date(2015, 1, 12), created_at=timezone.now())
+        with self.assertNumQueries(0):
+            self.make_filter({}).get_extent()
+
+        Event.objects.create(day=date(2015, 2, 1), created_at=timezone.now())
+        self.assertEqual(self.make_filter({}).get_extent(), (date(2015, 1, 10), date(2015, 2, 1)))
+
+    def test_delete_on_an_edge_invalidates_it(self):
+        self.make_filter({}).get_extent()
+
+        Event.objects.get(day=date(2015, 1, 15)).delete()
+        with self.assertNumQueries(0):
+            self.make_filter({}).get_extent()
+
+        Event.objects.get(day=date(2015, 1, 10)).delete()
+        self.assertEqual(self.make_filter({}).get_extent(), (date(2015, 1, 20), date(2015, 1, 20)))
+
+    def test_built_filters_are_tracked(self):
+        with patch('daterange_filter.extent._tracked', {}):
+            self.make_filter({})
+            self.assertEqual(extent._tracked, {Event: {(Event, 'day')}})
+
+    def test_track_registered(self):
+        from django.contrib import admin
+
+        class ExtentAdmin(admin.ModelAdmin):
+            list_filter = (('day', ExtentDateRangeFilter),)
+
+        site = admin.AdminSite(name='extent_admin')
+        site.register(Event, ExtentAdmin)
+        self.addCleanup(all_sites.discard, site)
+        with patch('daterange_filter.extent._tracked', {}):
+            extent.track_registered([site])
+            self.assertEqual(extent._tracked, {Event: {(Event, 'day')}})
+
+    def test_extent_hint(self):
+        cl = Mock()
+        cl.params = {}
+        choice = self.make_filter({}, 'created_at', ExtentDateTimeRangeFilter).choices(cl)[0]
+        self.assertEqual(choice['extent'], {'min': date(2015, 1, 10), 'max': date(2015, 1, 20)})
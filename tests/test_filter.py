@@ -4,9 +4,10 @@ from django.utils import timezone
 from mock import Mock, call, ANY, patch
 from django import forms
 from django.contrib.admin.widgets import AdminDateWidget
+from django.utils import translation
 from django.utils.translation import ugettext as _
 from daterange_filter.filter import DateRangeFilterBaseForm, DateRangeForm, DateTimeRangeForm, \
-    DateRangeFilterAdminSplitDateTime, DateRangeFilter, DateTimeRangeFilter, clean_input_prefix
+    DateRangeFilterAdminSplitDateTime, DateRangeFilter, DateTimeRangeFilter, clean_input_prefix, get_form_class
 from tests import BaseTest
 
 
@@ -123,6 +124,41 @@ class DateTimeRangeFormTest(BaseTest):
         self.assertEquals(str(form_2.media), '')
 
 
+class FormClassTest(BaseTest):
+
+    def test_generated_once_per_field(self):
+        self.assertIs(type(DateRangeForm(Mock(), field_name='spam')), get_form_class(DateRangeForm, 'spam'))
+        self.assertIs(type(DateRangeForm(Mock(), field_name='spam')), type(DateRangeForm(Mock(), field_name='spam')))
+        self.assertIsNot(type(DateRangeForm(Mock(), field_name='spam')), type(DateRangeForm(Mock(), field_name='ham')))
+        self.assertIsNot(get_form_class(DateRangeForm, 'spam'), get_form_class(DateTimeRangeForm, 'spam'))
+
+    def test_generated_class_is_a_subclass(self):
+        form = DateTimeRangeForm(Mock(), field_name='spam')
+
+        self.assertIsInstance(form, DateTimeRangeForm)
+        self.assertEqual(type(form).__name__, 'DateTimeRangeForm')
+
+    def test_forms_dont_share_fields(self):
+        form_1 = DateRangeForm(Mock(), field_name='spam')
+        form_2 = DateRangeForm(Mock(), field_name='spam')
+
+        self.assertIsNot(form_1.fields['drf__spam__gte'], form_2.fields['drf__spam__gte'])
+        self.assertIsNot(form_1.fields['drf__spam__gte'].widget, form_2.fields['drf__spam__gte'].widget)
+
+    def test_placeholders_follow_the_active_language(self):
+        with translation.override('fr'):
+            form = DateRangeForm(Mock(), field_name='spam')
+            self.assertEqual(str(form.fields['drf__spam__gte'].widget.attrs['placeholder']), _('From date'))
+
+    def test_generated_per_widget_backend(self):
+        admin_form = DateRangeForm(Mock(), field_name='spam')
+        with patch('daterange_filter.filter.AdminDateWidget', forms.DateInput):
+            form = DateRangeForm(Mock(), field_name='spam')
+
+        self.assertIsNot(type(form), type(admin_form))
+        self.assertIs(type(form.fields['drf__spam__gte'].widget), forms.DateInput)
+
+
 class DateRangeFilterTest(BaseTest):
     def setUp(self):
         self.request = Mock()
@@ -134,12 +170,19 @@ class DateRangeFilterTest(BaseTest):
     def test_form_uses_request(self):
         self.assertEqual(self.filter_.form.request, self.request)
 
-    def test_choices_is_empty(self):
-        self.assertEqual(self.filter_.choices(Mock()), [])
+    def test_choices_only_keep_the_other_params(self):
+        self.assertEqual(self.filter_.choices(Mock(params={})), ({'get_query': {}}, ))
 
     def test_expected_params(self):
         self.assertItemsEqual(self.filter_.expected_parameters(), ['drf__egg__lte', 'drf__egg__gte'])
 
+    def test_choices_hide_own_params_without_changing_the_changelist(self):
+        cl = Mock(params={'drf__egg__gte': '2015-01-01', 'drf__egg__after': 'x', 'p': '2', 'name': 'spam'})
+        params = dict(cl.params)
+
+        self.assertEqual(self.filter_.choices(cl)[0]['get_query'], {'name': 'spam'})
+        self.assertEqual(cl.params, params)
+
     @patch('daterange_filter.filter.DateRangeForm')
     def test_get_form(self, DateRangeForm):
         self.filter_.get_form(self.request)
@@ -246,7 +289,7 @@ class DateTimeRangeFilterTest(BaseTest):
         return_value = filter_.queryset(self.request, queryset)
 
         self.assertEqual(return_value, queryset.filter.return_value)
-        self.assertEqual(data_end, queryset.filter.call_args_list[0][1]['ham__lte'])
+        self.assertEqual(data_end + timedelta(seconds=1), queryset.filter.call_args_list[0][1]['ham__lt'])
 
     def test_return_raw_queryset_if_form_is_invalid(self):
         queryset = Mock()
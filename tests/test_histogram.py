@@ -0,0 +1,102 @@
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from mock import Mock
+
+from daterange_filter import histogram
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from tests import BaseTest
+from tests.models import Event
+
+
+class BucketTest(BaseTest):
+
+    def test_bucket_kind_adapts_to_span(self):
+        self.assertEqual(histogram.get_bucket_kind(date(2015, 1, 1), date(2015, 1, 31)), histogram.DAY)
+        self.assertEqual(histogram.get_bucket_kind(date(2015, 1, 1), date(2015, 3, 1)), histogram.WEEK)
+        self.assertEqual(histogram.get_bucket_kind(date(2015, 1, 1), date(2016, 1, 1)), histogram.MONTH)
+
+    def test_bucket_boundaries(self):
+        self.assertEqual(histogram.bucket_start(date(2015, 1, 8), histogram.WEEK), date(2015, 1, 5))
+        self.assertEqual(histogram.bucket_end(date(2015, 1, 5), histogram.WEEK), date(2015, 1, 11))
+        self.assertEqual(histogram.bucket_start(date(2015, 2, 17), histogram.MONTH), date(2015, 2, 1))
+        self.assertEqual(histogram.bucket_end(date(2015, 2, 1), histogram.MONTH), date(2015, 2, 28))
+        self.assertEqual(histogram.bucket_end(date(2015, 12, 1), histogram.MONTH), date(2015, 12, 31))
+
+    def test_rollup(self):
+        days = [(date(2015, 1, 1), 1), (date(2015, 1, 20), 2), (date(2015, 1, 31), 3), (date(2015, 3, 2), 4)]
+        self.assertEqual(histogram.rollup(days, histogram.MONTH), [
+            (date(2015, 1, 1), date(2015, 1, 31), 6),
+            (date(2015, 3, 1), date(2015, 3, 31), 4),
+        ])
+
+
+class HistogramFilterTest(TestCase):
+
+    class HistogramDateRangeFilter(DateRangeFilter):
+        histogram = True
+
+    class HistogramDateTimeRangeFilter(DateTimeRangeFilter):
+        histogram = True
+
+    def setUp(self):
+        cache.clear()
+        tz = timezone.get_current_timezone()
+        for day, hours in ((1, (1, 23)), (2, (12,)), (20, (5, 6, 7))):
+            for hour in hours:
+                Event.objects.create(day=date(2015, 1, day),
+                                     created_at=tz.localize(datetime(2015, 1, day, hour)))
+
+    def make_changelist(self, params):
+        cl = Mock()
+        cl.params = params
+        cl.queryset = Event.objects.all()
+        cl.get_query_string.side_effect = lambda new_params, remove=None: sorted(new_params.items())
+        return cl
+
+    def test_histogram_is_opt_in(self):
+        filter_ = DateRangeFilter(Event._meta.get_field('day'), None, {}, Event, None, 'day')
+        self.assertNotIn('histogram', filter_.choices(self.make_changelist({}))[0])
+
+    def test_daily_histogram_from_one_query(self):
+        field = Event._meta.get_field('created_at')
+        filter_ = self.HistogramDateRangeFilter(field, None, {}, Event, None, 'created_at')
+
+        with self.assertNumQueries(1):
+            bars = filter_.choices(self.make_changelist({}))[0]['histogram']
+
+        self.assertEqual([(bar['start'], bar['count'], bar['percent']) for bar in bars], [
+            (date(2015, 1, 1), 2, 66), (date(2015, 1, 2), 1, 33), (date(2015, 1, 20), 3, 100),
+        ])
+        self.assertEqual(bars[0]['query_string'], [('drf__created_at__gte', '2015-01-01'),
+                                                   ('drf__created_at__lte', '2015-01-01')])
+
+    def test_bucket_size_follows_picked_range(self):
+        params = {'drf__day__gte': '2015-01-01', 'drf__day__lte': '2015-03-31'}
+        filter_ = self.HistogramDateRangeFilter(Event._meta.get_field('day'), None, dict(params), Event, None, 'day')
+
+        bars = filter_.choices(self.make_changelist(params))[0]['histogram']
+
+        self.assertEqual([(bar['start'], bar['end'], bar['count']) for bar in bars], [
+            (date(2014, 12, 29), date(2015, 1, 4), 3), (date(2015, 1, 19), date(2015, 1, 25), 3),
+        ])
+
+    def test_histogram_is_cached_by_active_filters(self):
+        field = Event._meta.get_field('created_at')
+        filter_ = self.HistogramDateTimeRangeFilter(field, None, {}, Event, None, 'created_at')
+
+        filter_.choices(self.make_changelist({'name': 'spam'}))
+        with self.assertNumQueries(0):
+            filter_.choices(self.make_changelist({'name': 'spam'}))
+        with self.assertNumQueries(1):
+            filter_.choices(self.make_changelist({'name': 'ham'}))
+
+    def test_display_params_share_the_cached_histogram(self):
+        field = Event._meta.get_field('created_at')
+        filter_ = self.HistogramDateTimeRangeFilter(field, None, {}, Event, None, 'created_at')
+
+        filter_.choices(self.make_changelist({'name': 'spam'}))
+        with self.assertNumQueries(0):
+            filter_.choices(self.make_changelist({'name': 'spam', 'p': '2', 'o': '-1', '_popup': '1'}))
@@ -0,0 +1,140 @@
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.admin.sites import all_sites
+from django.contrib.auth.models import User
+from django.core import checks
+from django.core.management import call_command
+from django.db import connection, models
+from django.db.migrations.state import ProjectState
+from django.test import TestCase, TransactionTestCase
+from io import StringIO
+from mock import patch
+
+from daterange_filter import indexes
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from tests.admin import site as tests_site
+from tests.models import Event, Ticket
+
+
+class TicketAdmin(admin.ModelAdmin):
+    list_filter = ('kind', ('sold_at', DateTimeRangeFilter), ('event__day', DateRangeFilter))
+
+
+class EventAdmin(admin.ModelAdmin):
+    list_filter = (('ticket__sold_at', DateTimeRangeFilter), ('day', DateRangeFilter))
+
+
+def make_site():
+    site = admin.AdminSite(name='indexes_admin')
+    site.register(Ticket, TicketAdmin)
+    site.register(Event, EventAdmin)
+    return site
+
+
+def forget_sites():
+    for site in list(all_sites):
+        if site is not tests_site:
+            all_sites.discard(site)
+
+
+class MissingIndexesTest(TestCase):
+
+    def setUp(self):
+        forget_sites()
+
+    def tearDown(self):
+        forget_sites()
+
+    def test_indexed_fields(self):
+        self.assertEqual(indexes.missing_indexes([tests_site]), [])
+        self.assertTrue(indexes.is_indexed(Event._meta.get_field('day')))
+        self.assertFalse(indexes.is_indexed(Ticket._meta.get_field('sold_at')))
+
+    def test_direct_and_related_paths(self):
+        sold_at = Ticket._meta.get_field('sold_at')
+        self.assertEqual(indexes.missing_indexes([make_site()]), [(Ticket, 'sold_at', sold_at, ['kind'])])
+
+        site = admin.AdminSite(name='related_admin')
+        site.register(Event, EventAdmin)
+        self.assertEqual(indexes.missing_indexes([site]), [(Event, 'ticket__sold_at', sold_at, [])])
+
+    def test_check(self):
+        site = make_site()
+        errors = [error for error in checks.run_checks(tags=[checks.Tags.models])
+                  if error.id.startswith('daterange_filter')]
+        self.assertEqual([error.id for error in errors], ['daterange_filter.W001'])
+        self.assertEqual(errors[0].obj, Ticket._meta.get_field('sold_at'))
+        self.assertIn("'sold_at' is filtered", errors[0].msg)
+        all_sites.discard(site)
+        self.assertEqual(indexes.check_indexes(), [])
+
+    def test_composite_index(self):
+        missing = indexes.missing_indexes([make_site()])
+        self.assertEqual(indexes.get_operations(missing)['tests'][0].index.fields, ['sold_at'])
+        self.assertEqual(indexes.get_operations(missing, composite=True)['tests'][0].index.fields,
+                         ['kind', 'sold_at'])
+
+    def test_composite_index_with_the_co_filters(self):
+        index = models.Index(fields=['kind', 'sold_at'], name='tests_ticket_kind_sold_at')
+        with patch.object(Ticket._meta, 'indexes', [index]):
+            sold_at = Ticket._meta.get_field('sold_at')
+            # Not filtered by kind from the events.
+            self.assertEqual(indexes.missing_indexes([make_site()]), [(Event, 'ticket__sold_at', sold_at, [])])
+            self.assertFalse(indexes.is_indexed(Ticket._meta.get_field('sold_at')))
+            self.assertTrue(indexes.is_indexed(Ticket._meta.get_field('sold_at'), ['kind']))
+
+    def test_project_apps(self):
+        self.assertTrue(indexes.is_project_app(apps.get_app_config('tests')))
+        self.assertFalse(indexes.is_project_app(apps.get_app_config('auth')))
+
+    def test_command_skips_the_apps_outside_of_the_project(self):
+        class UserAdmin(admin.ModelAdmin):
+            list_filter = (('date_joined', DateTimeRangeFilter),)
+
+        site = make_site()
+        site.register(User, UserAdmin)
+        output = StringIO()
+        call_command('daterange_indexes', '--dry-run', stdout=output)
+        output = output.getvalue()
+        self.assertIn('Skipped auth, installed outside of the project', output)
+        self.assertNotIn('auth.user', output)
+        self.assertIn('to the Meta.indexes of tests.ticket.', output)
+
+        output = StringIO()
+        call_command('daterange_indexes', 'auth', '--dry-run', stdout=output)
+        self.assertIn('to the Meta.indexes of auth.user.', output.getvalue())
+
+    def test_command_dry_run(self):
+        site = make_site()
+        self.assertIn(Ticket, site._registry)
+        output = StringIO()
+        call_command('daterange_indexes', '--dry-run', '--composite', stdout=output)
+        output = output.getvalue()
+        self.assertIn('0001_daterange_indexes.py', output)
+        self.assertIn("migrations.AddIndex(", output)
+        self.assertIn("fields=['kind', 'sold_at']", output)
+        self.assertIn("to the Meta.indexes of tests.ticket.", output)
+
+
+class MigrationTest(TransactionTestCase):
+
+    def tearDown(self):
+        forget_sites()
+
+    def test_index_created_on_sqlite(self):
+        missing = indexes.missing_indexes([make_site()])
+        operation = indexes.get_operations(missing, composite=True)['tests'][0]
+        state = ProjectState.from_apps(Ticket._meta.apps)
+        new_state = state.clone()
+        operation.state_forwards('tests', new_state)
+
+        with connection.schema_editor() as editor:
+            operation.database_forwards('tests', editor, state, new_state)
+        try:
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(cursor, Ticket._meta.db_table)
+            self.assertEqual(constraints[operation.index.name]['columns'], ['kind', 'sold_at'])
+            self.assertTrue(constraints[operation.index.name]['index'])
+        finally:
+            with connection.schema_editor() as editor:
+                operation.database_backwards('tests', editor, new_state, state)
@@ -0,0 +1,61 @@
+import logging
+from datetime import date, datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from mock import Mock
+
+from daterange_filter import instrumentation
+from tests.models import Event
+
+
+class InstrumentationTest(TestCase):
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        for day in (1, 2, 3):
+            Event.objects.create(name='day %s' % day, day=date(2015, 1, day),
+                                 created_at=tz.localize(datetime(2015, 1, day, 12)))
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def get(self):
+        return self.client.get('/admin/tests/event/', {'drf__day__gte': '2015-01-02', 'drf__day__lte': '2015-01-03'})
+
+    def test_collects_every_phase(self):
+        with instrumentation.Collector() as collector:
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+
+        day = [measure for measure in collector.measures if measure.field_path == 'day']
+        self.assertEqual([measure.phase for measure in day],
+                         ['get_form', 'is_valid', 'queryset', 'facets', 'render'])
+        self.assertTrue(all(measure.model == 'tests.event' and measure.duration >= 0 for measure in day))
+
+        queryset = day[2]
+        self.assertIn('"tests_event"."day" >= 2015-01-02', queryset.data['sql'])
+        self.assertIn('"tests_event"."day" < 2015-01-04', queryset.data['sql'])
+        self.assertEqual(day[4].data, {'rows': 2, 'result_count': 2})
+
+    def test_nothing_sent_without_receivers(self):
+        collector = instrumentation.Collector().connect()
+        collector.disconnect()
+        self.get()
+        self.assertEqual(collector.measures, [])
+        self.assertFalse(instrumentation.is_enabled())
+
+    def test_statsd_adapter(self):
+        client = Mock()
+        with instrumentation.StatsdAdapter(client, prefix='admin'):
+            self.get()
+        self.assertIn('admin.tests.event.day.queryset', [call[0][0] for call in client.timing.call_args_list])
+        client.gauge.assert_any_call('admin.tests.event.day.rows', 2)
+        client.gauge.assert_any_call('admin.tests.event.day.result_count', 2)
+
+    def test_logging_adapter(self):
+        logger = logging.getLogger('daterange_filter.tests')
+        with self.assertLogs(logger, logging.DEBUG) as logs:
+            with instrumentation.LoggingAdapter(logger):
+                self.get()
+        self.assertTrue(any(line.startswith('DEBUG:daterange_filter.tests:tests.event.day render: ')
+                            for line in logs.output))
@@ -0,0 +1,128 @@
+from datetime import date, datetime
+
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+
+from daterange_filter import intervals
+from daterange_filter.filter import EMPTY_RANGE, DateRangeFilter, DateTimeRangeFilter
+from tests import BaseTest
+from tests.models import Event
+
+
+class MultiDateRangeFilter(DateRangeFilter):
+    multi_range = True
+
+
+class MultiDateTimeRangeFilter(DateTimeRangeFilter):
+    multi_range = True
+
+
+class AlgebraTest(BaseTest):
+
+    def test_normalize(self):
+        self.assertEqual(intervals.normalize([(5, 7), (1, 3), (3, 4), (2, 2), (6, 9)]), [(1, 4), (5, 9)])
+        self.assertEqual(intervals.normalize([(4, None), (None, 1), (7, 8)]), [(None, 1), (4, None)])
+        self.assertEqual(intervals.normalize([(None, 5), (2, None)]), [(None, None)])
+        self.assertEqual(intervals.normalize([]), [])
+
+    def test_union(self):
+        self.assertEqual(intervals.union([(1, 3)], [(2, 5), (8, 9)], [(9, 10)]), [(1, 5), (8, 10)])
+
+    def test_intersect(self):
+        self.assertEqual(intervals.intersect([(1, 5), (8, 12)], [(4, 9), (11, None)]), [(4, 5), (8, 9), (11, 12)])
+        self.assertEqual(intervals.intersect([(1, 5)], [(5, 9)]), [])
+        self.assertEqual(intervals.intersect(intervals.EVERYTHING, [(None, 3)]), [(None, 3)])
+
+    def test_complement(self):
+        self.assertEqual(intervals.complement([(1, 3), (5, 7)]), [(None, 1), (3, 5), (7, None)])
+        self.assertEqual(intervals.complement([(None, 3), (5, None)]), [(3, 5)])
+        self.assertEqual(intervals.complement([]), intervals.EVERYTHING)
+        self.assertEqual(intervals.complement(intervals.EVERYTHING), [])
+
+    def test_subtract(self):
+        self.assertEqual(intervals.subtract([(1, 10)], [(3, 4), (6, 8)]), [(1, 3), (4, 6), (8, 10)])
+        self.assertEqual(intervals.subtract([(1, 10)], [(None, 5), (9, None)]), [(5, 9)])
+        self.assertEqual(intervals.subtract([(1, 3)], [(0, 5)]), [])
+        self.assertEqual(intervals.subtract([(3, 1), (1, 2)], []), [(1, 2)])
+
+    def test_hull(self):
+        self.assertEqual(intervals.hull([(5, 7), (1, 3)]), (1, 7))
+        self.assertEqual(intervals.hull([]), None)
+
+    def test_to_q(self):
+        self.assertEqual(intervals.to_q('day', [(3, 5), (1, 3), (None, 0)]),
+                         Q(day__lt=0) | Q(day__gte=1, day__lt=5))
+        self.assertRaises(ValueError, intervals.to_q, 'day', [])
+
+
+class MultiRangeFilterTest(TestCase):
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        for day in range(1, 22):
+            Event.objects.create(name='day %s' % day, day=date(2015, 1, day),
+                                 created_at=tz.localize(datetime(2015, 1, day, 12)))
+
+    def make_filter(self, params, field_path='day', filter_class=MultiDateRangeFilter):
+        return filter_class(Event._meta.get_field(field_path), None, params, Event, None, field_path)
+
+    def days(self, filter_):
+        return [event.day.day for event in filter_.queryset(None, Event.objects.order_by('day'))]
+
+    def test_weeks_except_holidays(self):
+        filter_ = self.make_filter({'drf__day__include': '2015-01-01..2015-01-07,2015-01-08..2015-01-10,2015-01-15..2015-01-17',
+                                    'drf__day__exclude': '2015-01-02,2015-01-05..2015-01-06,2015-01-16..'})
+        self.assertEqual(self.days(filter_), [1, 3, 4, 7, 8, 9, 10, 15])
+        self.assertEqual(filter_.get_boundaries(), (date(2015, 1, 1), date(2015, 1, 16)))
+
+        sql = str(filter_.queryset(None, Event.objects.all()).query)
+        self.assertEqual(sql.count(' OR '), 3)
+        self.assertEqual(sql.count('"tests_event"."day" >='), 4)
+        self.assertNotIn('django_format_dtdelta', sql)
+
+    def test_single_interval_is_a_plain_range(self):
+        filter_ = self.make_filter({'drf__day__include': '2015-01-01..2015-01-05,2015-01-06..2015-01-07'})
+        self.assertEqual(filter_.get_filter_params(), {'day__gte': date(2015, 1, 1), 'day__lt': date(2015, 1, 8)})
+        self.assertNotIn(' OR ', str(filter_.queryset(None, Event.objects.all()).query))
+
+    def test_within_the_form_range(self):
+        filter_ = self.make_filter({'drf__day__gte': '2015-01-10', 'drf__day__exclude': '2015-01-12..2015-01-19'})
+        self.assertEqual(self.days(filter_), [10, 11, 20, 21])
+
+    def test_excluding_everything(self):
+        filter_ = self.make_filter({'drf__day__include': '2015-01-03', 'drf__day__exclude': '..2015-01-05'})
+        self.assertIs(filter_.get_boundaries(), EMPTY_RANGE)
+        self.assertEqual(self.days(filter_), [])
+
+    def test_invalid_intervals_dont_filter(self):
+        for value in ('2015-01-40', 'yesterday', '2015-01-01...2015-01-02'):
+            filter_ = self.make_filter({'drf__day__include': value})
+            self.assertEqual(filter_.get_boundaries(), None)
+            self.assertEqual(len(self.days(filter_)), 21)
+
+    def test_blank_items_are_skipped(self):
+        for value in ('2015-01-02,', ',2015-01-02', '2015-01-02, ,', ' , 2015-01-02'):
+            self.assertEqual(self.days(self.make_filter({'drf__day__include': value})), [2], value)
+            self.assertEqual(len(self.days(self.make_filter({'drf__day__exclude': value}))), 20, value)
+
+    def test_only_blank_items_dont_filter(self):
+        for value in (',', ' , ', ' ,, '):
+            for param in ('drf__day__include', 'drf__day__exclude'):
+                filter_ = self.make_filter({param: value})
+                self.assertEqual(filter_.get_boundaries(), None)
+                self.assertEqual(len(self.days(filter_)), 21)
+
+    def test_datetime_field(self):
+        filter_ = self.make_filter({'drf__created_at__include': '2015-01-01..2015-01-03,2015-01-10',
+                                    'drf__created_at__exclude': '2015-01-02'}, 'created_at', MultiDateTimeRangeFilter)
+        self.assertEqual([event.day.day for event in filter_.queryset(None, Event.objects.order_by('day'))],
+                         [1, 3, 10])
+
+    def test_disabled_by_default(self):
+        filter_ = DateRangeFilter(Event._meta.get_field('day'), None, {'drf__day__include': '2015-01-03'},
+                                  Event, None, 'day')
+        self.assertEqual(filter_.expected_parameters(), ['drf__day__gte', 'drf__day__lte'])
+        self.assertEqual(len(self.days(filter_)), 21)
+        self.assertEqual(self.make_filter({}).expected_parameters(),
+                         ['drf__day__gte', 'drf__day__lte', 'drf__day__include', 'drf__day__exclude'])
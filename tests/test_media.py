@@ -0,0 +1,104 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from django.utils import translation
+from mock import Mock, patch
+
+from daterange_filter import media
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from tests.models import Event
+
+
+class CachedDateRangeFilter(DateRangeFilter):
+    cache_fragment = True
+
+
+class EventAdmin(admin.ModelAdmin):
+    list_filter = ('name', ('day', CachedDateRangeFilter), ('created_at', DateTimeRangeFilter))
+
+
+site = admin.AdminSite(name='media_admin')
+site.register(Event, EventAdmin)
+
+urlpatterns = [
+    path('admin/', site.urls),
+]
+
+
+class RegistryTest(SimpleTestCase):
+
+    def test_claims_every_file_once(self):
+        registry = media.MediaRegistry()
+        first = registry.claim(forms.Media(css={'all': ['a.css']}, js=['a.js', 'b.js']))
+        second = registry.claim(forms.Media(css={'all': ['a.css', 'b.css'], 'print': ['a.css']}, js=['b.js', 'c.js']))
+
+        self.assertEqual(first._js, ['a.js', 'b.js'])
+        self.assertEqual(second._js, ['c.js'])
+        self.assertEqual(second._css, {'all': ['b.css'], 'print': ['a.css']})
+        self.assertEqual(str(registry.claim(forms.Media(js=['c.js']))), '')
+
+    def test_one_registry_per_request(self):
+        request_1, request_2 = Mock(), Mock()
+
+        self.assertIs(media.get_registry(request_1), media.get_registry(request_1))
+        self.assertIsNot(media.get_registry(request_1), media.get_registry(request_2))
+        self.assertNotEqual(str(media.claim(request_2, media.get_media())), '')
+
+    def test_without_request(self):
+        self.assertIsNone(media.get_registry(None))
+        self.assertEqual(str(media.claim(None, media.get_media())), str(media.get_media()))
+
+    def test_assets_are_versioned_by_content(self):
+        path = media.versioned('daterange_filter/filter.js')
+
+        self.assertRegex(path, r'^/static/daterange_filter/filter\.js\?v=[0-9a-f]{12}$')
+        with patch('daterange_filter.media._versions', {}), patch('daterange_filter.media.open', create=True) as open_:
+            open_.return_value.__enter__.return_value.read.return_value = b'changed'
+            self.assertNotEqual(media.versioned('daterange_filter/filter.js'), path)
+
+
+@override_settings(ROOT_URLCONF='tests.test_media')
+class ChangeListTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def test_assets_rendered_once(self):
+        response = self.client.get('/admin/tests/event/')
+        content = response.content.decode('utf-8')
+
+        self.assertNotIn('<style>', content)
+        self.assertNotIn('django.jQuery("#resetBtn")', content)
+        self.assertEqual(content.count('daterange_filter/filter.css?v='), 1)
+        self.assertEqual(content.count('daterange_filter/filter.js?v='), 1)
+        self.assertEqual(content.count('admin/js/calendar.js'), 1)
+
+    def test_form_fragment_cached_by_range_and_locale(self):
+        params = {'drf__day__gte': '2015-01-02', 'name': 'spam'}
+        self.client.get('/admin/tests/event/', params)
+
+        with patch('django.forms.BaseForm.as_p', autospec=True, side_effect=forms.BaseForm.as_p) as as_p:
+            self.client.get('/admin/tests/event/', params)
+            self.assertEqual(as_p.call_count, 1)  # Only the datetime filter.
+
+            self.client.get('/admin/tests/event/', dict(params, drf__day__gte='2015-01-03'))
+            self.assertEqual(as_p.call_count, 3)
+
+            self.client.get('/admin/tests/event/', dict(params, name='ham'))
+            self.assertEqual(as_p.call_count, 5)
+
+            with translation.override('pt-br'):
+                self.client.get('/admin/tests/event/', params, HTTP_ACCEPT_LANGUAGE='pt-br')
+            self.assertEqual(as_p.call_count, 7)
+
+    def test_cached_fragment_keeps_the_hidden_params(self):
+        params = {'drf__day__gte': '2015-01-02', 'name': 'spam'}
+        self.client.get('/admin/tests/event/', params)
+        response = self.client.get('/admin/tests/event/', params)
+
+        self.assertContains(response, '<input type="hidden" name="name" value="spam">', count=1)
+        self.assertContains(response, 'value="2015-01-02"')
@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib import admin
+from django.db import connection
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mock import Mock
+
+from daterange_filter.filter import DateRangeFilter
+from daterange_filter.pagination import RangePaginationMixin, KeysetPaginator, decode_cursor, encode_cursor
+from tests import BaseTest
+from tests.models import Event
+
+
+class KeysetDateRangeFilter(DateRangeFilter):
+    keyset_pagination = True
+
+
+class InexactKeysetDateRangeFilter(KeysetDateRangeFilter):
+    keyset_exact_count = False
+
+
+class EventAdmin(RangePaginationMixin, admin.ModelAdmin):
+    list_filter = (('created_at', KeysetDateRangeFilter), )
+    list_per_page = 2
+
+
+class InexactEventAdmin(EventAdmin):
+    list_filter = (('created_at', InexactKeysetDateRangeFilter), )
+
+
+class NullableEventAdmin(EventAdmin):
+    list_filter = (('updated_at', KeysetDateRangeFilter), )
+
+
+class SortableEventAdmin(EventAdmin):
+    list_display = ('name', 'created_at')
+
+
+class CursorTest(BaseTest):
+
+    def test_round_trip(self):
+        field = Event._meta.get_field('created_at')
+        value = datetime(2015, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor(value, 12), field, Event), (value, 12))
+
+    def test_null_value(self):
+        field = Event._meta.get_field('updated_at')
+        self.assertEqual(encode_cursor(None, 12), '|12')
+        self.assertEqual(decode_cursor('|12', field, Event), (None, 12))
+
+    def test_invalid_cursor(self):
+        field = Event._meta.get_field('day')
+        self.assertEqual(decode_cursor('', field, Event), None)
+        self.assertEqual(decode_cursor('2015-01-01', field, Event), None)
+        self.assertEqual(decode_cursor('|', field, Event), None)
+        self.assertEqual(decode_cursor('spam|1', field, Event), None)
+        self.assertEqual(decode_cursor('2015-01-01|ham', field, Event), None)
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+        # Two rows per timestamp, so the pk has to break the ties.
+        self.events = [Event.objects.create(day=date(2015, 1, 1), created_at=start + timedelta(hours=i // 2))
+                       for i in range(7)]
+        self.user = Mock()
+
+    def get_changelist(self, model_admin_class, params):
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        return model_admin_class(Event, admin.site).get_changelist_instance(request)
+
+    def walk(self, model_admin_class, params=None):
+        pages = []
+        if params is None:
+            params = {'drf__created_at__gte': '2014-12-31', 'drf__created_at__lte': '2015-01-02'}
+        for _ in range(len(self.events)):
+            cl = self.get_changelist(model_admin_class, params)
+            pages.append([event.pk for event in cl.result_list])
+            links = cl.filter_specs[0].choices(cl)[0]['keyset']
+            if 'next' not in links:
+                return pages, cl
+            params = QueryDict(links['next'][1:]).dict()
+        self.fail('The pages never end')
+
+    def test_walks_every_row_once_in_keyset_order(self):
+        pages, cl = self.walk(EventAdmin)
+
+        expected = [event.pk for event in sorted(self.events, key=lambda e: (e.created_at, e.pk), reverse=True)]
+        self.assertEqual(pages, [expected[0:2], expected[2:4], expected[4:6], expected[6:]])
+        self.assertEqual(cl.result_count, 7)
+
+    def test_pages_seek_instead_of_offset(self):
+        cursor = encode_cursor(self.events[4].created_at, self.events[4].pk)
+        with CaptureQueriesContext(connection) as queries:
+            cl = self.get_changelist(EventAdmin, {'drf__created_at__after': cursor})
+
+        self.assertIsInstance(cl.paginator, KeysetPaginator)
+        self.assertFalse([query for query in queries.captured_queries if 'OFFSET' in query['sql']])
+
+    def test_without_exact_count(self):
+        pages, cl = self.walk(InexactEventAdmin)
+
+        self.assertEqual(sum(pages, []), [event.pk for event in sorted(
+            self.events, key=lambda e: (e.created_at, e.pk), reverse=True)])
+        with self.assertNumQueries(1):
+            paginator = KeysetPaginator(Event.objects.all(), 2, 'created_at', exact_count=False)
+            paginator.count
+            paginator.page(1)
+
+    def test_first_page_link_drops_cursor(self):
+        cl = self.get_changelist(EventAdmin, {'drf__created_at__after': encode_cursor(self.events[4].created_at,
+                                                                                      self.events[4].pk)})
+        links = cl.filter_specs[0].choices(cl)[0]['keyset']
+        self.assertEqual(links['first'], '?')
+        self.assertEqual([event.pk for event in cl.result_list], [self.events[3].pk, self.events[2].pk])
+
+    def test_rows_without_value_come_last(self):
+        for event in self.events[:4]:
+            event.updated_at = event.created_at
+            event.save()
+        pages, cl = self.walk(NullableEventAdmin, {})
+
+        with_value = sorted(self.events[:4], key=lambda e: (e.updated_at, e.pk), reverse=True)
+        without = sorted(self.events[4:], key=lambda e: e.pk, reverse=True)
+        self.assertEqual(sum(pages, []), [event.pk for event in with_value + without])
+        self.assertEqual(len(pages), 4)
+
+    def test_page_ending_on_a_row_without_value(self):
+        pages, cl = self.walk(NullableEventAdmin, {})
+
+        self.assertEqual(sum(pages, []), sorted([event.pk for event in self.events], reverse=True))
+
+    def test_sorted_by_the_field(self):
+        pages, cl = self.walk(SortableEventAdmin, {'o': '2'})
+
+        self.assertIsInstance(cl.paginator, KeysetPaginator)
+        self.assertEqual(sum(pages, []), [event.pk for event in sorted(
+            self.events, key=lambda e: (e.created_at, e.pk))])
+
+    def test_sorted_by_another_column(self):
+        cl = self.get_changelist(SortableEventAdmin, {'o': '1'})
+
+        self.assertNotIsInstance(cl.paginator, KeysetPaginator)
+        self.assertEqual(cl.paginator.num_pages, 4)
+
+    def test_single_page_number(self):
+        cl = self.get_changelist(EventAdmin, {'p': '2'})
+
+        self.assertEqual(cl.paginator.num_pages, 1)
+        self.assertEqual([event.pk for event in cl.result_list], [self.events[6].pk, self.events[5].pk])
@@ -0,0 +1,285 @@
+import threading
+import time
+from datetime import date, datetime
+
+import pytz
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.query import QuerySet
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import path
+from django.utils import timezone, translation
+from mock import patch
+
+from daterange_filter import histogram
+from daterange_filter.deferred import RangeFacetsMixin
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from daterange_filter.pagination import RangePaginationMixin
+from daterange_filter.parallel import RangeParallelMixin, SideQueries, get_executor
+from tests.models import Event
+
+
+class FacetsDateRangeFilter(DateRangeFilter):
+    histogram = True
+    use_extent = True
+
+
+class FacetsDateTimeRangeFilter(DateTimeRangeFilter):
+    histogram = True
+    use_extent = True
+
+
+class DeferredDateRangeFilter(FacetsDateRangeFilter):
+    deferred_facets = True
+
+
+class EventAdmin(RangeParallelMixin, admin.ModelAdmin):
+    list_filter = (('day', FacetsDateRangeFilter), ('created_at', FacetsDateTimeRangeFilter))
+    side_queries_timeout = 0.5
+
+
+class DeferredEventAdmin(RangeParallelMixin, RangeFacetsMixin, admin.ModelAdmin):
+    list_filter = (('day', DeferredDateRangeFilter),)
+    side_queries_timeout = 0.5
+
+
+class KeysetDateRangeFilter(DateRangeFilter):
+    keyset_pagination = True
+
+
+class KeysetEventAdmin(RangeParallelMixin, RangePaginationMixin, admin.ModelAdmin):
+    list_filter = (('day', KeysetDateRangeFilter),)
+    show_full_result_count = False
+
+
+site = admin.AdminSite(name='parallel_admin')
+site.register(Event, EventAdmin)
+deferred_site = admin.AdminSite(name='parallel_deferred_admin')
+deferred_site.register(Event, DeferredEventAdmin)
+keyset_site = admin.AdminSite(name='parallel_keyset_admin')
+keyset_site.register(Event, KeysetEventAdmin)
+
+urlpatterns = [
+    path('admin/', site.urls),
+    path('deferred/', deferred_site.urls),
+    path('keyset/', keyset_site.urls),
+]
+
+
+class SideQueriesTest(SimpleTestCase):
+
+    def test_single_worker_runs_on_the_calling_thread(self):
+        queries = SideQueries()
+        queries.add('a', lambda: threading.current_thread())
+
+        self.assertEqual(queries.run(), {'a': threading.current_thread()})
+
+    def test_runs_concurrently(self):
+        queries = SideQueries(max_workers=3)
+        for key in 'abc':
+            queries.add(key, lambda key=key: time.sleep(0.2) or key)
+
+        started = time.time()
+        self.assertEqual(queries.run(), {'a': 'a', 'b': 'b', 'c': 'c'})
+        self.assertLess(time.time() - started, 0.5)
+
+    def test_bounded_pool(self):
+        lock = threading.Lock()
+        running = [0]
+        most = [0]
+
+        def query():
+            with lock:
+                running[0] += 1
+                most[0] = max(most[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        queries = SideQueries(max_workers=2)
+        for key in range(6):
+            queries.add(key, query)
+        self.assertEqual(queries.run(), dict((key, None) for key in range(6)))
+        self.assertEqual(most[0], 2)
+
+    def test_late_queries_share_a_bounded_pool(self):
+        before = set(threading.enumerate())
+        with patch('daterange_filter.parallel._executor', None):
+            with override_settings(DATE_RANGE_FILTER_SIDE_QUERIES_THREADS=2):
+                executor = get_executor()
+                self.assertIs(get_executor(), executor)
+                for _ in range(4):
+                    queries = SideQueries(max_workers=2, timeout=0.05)
+                    queries.add('slow', lambda: time.sleep(0.3))
+                    queries.add('slower', lambda: time.sleep(0.3))
+                    self.assertEqual(queries.run(), {'slow': None, 'slower': None})
+        threads = [thread for thread in threading.enumerate()
+                   if thread.name.startswith('daterange_filter') and thread not in before]
+        self.assertEqual(len(threads), 2)
+
+    def test_late_queries_are_unknown(self):
+        queries = SideQueries(max_workers=2, timeout=0.1)
+        queries.add('fast', lambda: 1)
+        queries.add('slow', lambda: time.sleep(0.5) or 2)
+
+        started = time.time()
+        self.assertEqual(queries.run(), {'fast': 1, 'slow': None})
+        self.assertLess(time.time() - started, 0.4)
+
+    def test_waited_queries(self):
+        queries = SideQueries(max_workers=2, timeout=0.05)
+        queries.add('slow', lambda: time.sleep(0.2) or 1, wait=True)
+        queries.add('slower', lambda: time.sleep(0.5) or 2)
+
+        self.assertEqual(queries.run(), {'slow': 1, 'slower': None})
+
+    def test_raises_errors(self):
+        queries = SideQueries(max_workers=2)
+        queries.add('a', lambda: 1)
+        queries.add('b', lambda: 1 // 0)
+
+        self.assertRaises(ZeroDivisionError, queries.run)
+
+    def test_workers_use_the_request_timezone_and_language(self):
+        queries = SideQueries(max_workers=2)
+        queries.add('tz', timezone.get_current_timezone_name)
+        queries.add('language', translation.get_language)
+
+        with timezone.override(pytz.timezone('Asia/Tokyo')), translation.override('pt-br'):
+            self.assertEqual(queries.run(), {'tz': 'Asia/Tokyo', 'language': 'pt-br'})
+
+    def test_workers_close_their_connections(self):
+        closed = []
+        queries = SideQueries(max_workers=2)
+        queries.add('a', lambda: 1)
+        queries.add('b', lambda: 2)
+
+        with patch('daterange_filter.parallel.connections.close_all',
+                   side_effect=lambda: closed.append(threading.current_thread())):
+            queries.run()
+        self.assertEqual(len(closed), 2)
+        self.assertNotIn(threading.current_thread(), closed)
+
+
+def slow_daily_counts(*args, **kwargs):
+    time.sleep(1)
+    # Ends on the shared pool after the test: kept out of the cache of the next ones.
+    raise RuntimeError('Too late')
+
+
+daily_counts = histogram.daily_counts
+
+
+@override_settings(ROOT_URLCONF='tests.test_parallel')
+class ChangeListTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        tz = timezone.get_current_timezone()
+        for day in (1, 2, 2, 3, 9):
+            Event.objects.create(name='day %s' % day, day=date(2015, 1, day),
+                                 created_at=tz.localize(datetime(2015, 1, day, 12)))
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.params = {'drf__day__gte': '2015-01-02', 'drf__day__lte': '2015-01-09'}
+
+    def test_side_queries_run_on_workers(self):
+        threads = []
+
+        def counts(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return daily_counts(*args, **kwargs)
+
+        with patch('daterange_filter.histogram.daily_counts', side_effect=counts):
+            response = self.client.get('/admin/tests/event/', self.params)
+
+        self.assertContains(response, '<ul class="daterange-histogram">', count=2)
+        self.assertContains(response, 'daterange-extent', count=2)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_one_batch_once_filtered(self):
+        batches = []
+        run = SideQueries.run
+
+        def record(queries):
+            batches.append(sorted((key if isinstance(key, str) else (key[0].field_path, key[1])
+                                   for key, function in queries.queries), key=str))
+            return run(queries)
+
+        with patch.object(SideQueries, 'run', autospec=True, side_effect=record):
+            response = self.client.get('/admin/tests/event/', self.params)
+
+        self.assertContains(response, '4 events')
+        self.assertEqual(batches, [
+            [('day', 'extent')],
+            [('created_at', 'extent'), ('created_at', 'histogram'), ('day', 'histogram'), 'pages'],
+        ])
+
+    def test_page_count_on_a_worker(self):
+        threads = []
+        count = QuerySet.count
+
+        def counts(queryset):
+            threads.append(threading.current_thread())
+            return count(queryset)
+
+        with patch.object(QuerySet, 'count', autospec=True, side_effect=counts):
+            response = self.client.get('/admin/tests/event/', self.params)
+
+        self.assertContains(response, '4 events')
+        # The page count, then the full count of the admin.
+        self.assertEqual(len(threads), 2)
+        self.assertNotEqual(threads[0], threading.current_thread())
+        self.assertEqual(threads[1], threading.current_thread())
+
+    def counted(self, url, delay=0):
+        threads = []
+        count = QuerySet.count
+
+        def counts(queryset):
+            threads.append(threading.current_thread())
+            time.sleep(delay)
+            return count(queryset)
+
+        with patch.object(QuerySet, 'count', autospec=True, side_effect=counts):
+            response = self.client.get(url, self.params)
+        return response, threads
+
+    def test_late_page_count_is_waited_for(self):
+        response, threads = self.counted('/admin/tests/event/', delay=0.6)
+
+        self.assertContains(response, '4 events')
+        # Not counted again after the timeout.
+        self.assertEqual(len(threads), 2)
+        self.assertNotEqual(threads[0], threading.current_thread())
+
+    def test_keyset_page_count_on_a_worker(self):
+        response, threads = self.counted('/keyset/tests/event/')
+
+        self.assertContains(response, '4 events')
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.current_thread())
+
+    def test_late_side_queries_are_unknown(self):
+        with patch('daterange_filter.histogram.daily_counts', side_effect=slow_daily_counts):
+            started = time.time()
+            response = self.client.get('/admin/tests/event/', self.params)
+
+        self.assertLess(time.time() - started, 1)
+        self.assertContains(response, 'Histogram unknown', count=2)
+        self.assertNotContains(response, '<ul class="daterange-histogram">')
+        self.assertContains(response, 'Data from', count=2)
+
+    def test_deferred_facets(self):
+        response = self.client.get('/deferred/tests/event/facets/day/', self.params)
+
+        self.assertEqual(response.json()['count'], {'value': 4, 'estimated': False})
+        self.assertEqual(len(response.json()['histogram']), 3)
+
+        cache.clear()
+        with patch('daterange_filter.histogram.daily_counts', side_effect=slow_daily_counts):
+            response = self.client.get('/deferred/tests/event/facets/day/', self.params)
+        self.assertEqual(response.json()['histogram'], {'unknown': True})
+        self.assertEqual(response.json()['count'], {'value': 4, 'estimated': False})
+        self.assertIn('Histogram unknown', response.json()['html'])
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from django import forms
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone, translation
+from mock import patch
+
+from daterange_filter import parsing
+
+LANGUAGES = ('en', 'en-gb', 'de', 'fr', 'nl', 'ja', 'pt-br')
+
+DATES = (
+    '2015-01-05', '2015-1-5', ' 2015-01-05 ', '2015-02-29', '2016-02-29', '2015-13-01', '2015-00-10',
+    '0000-01-01', '9999-12-31', '15-01-05', '01/05/2015', '1/5/15', '05/01/2015', '05.01.2015', '5.1.15',
+    '05-01-2015', '2015/01/05', '2015.01.05', 'Jan 5 2015', 'jan 5, 2015', '5 January 2015', 'January 5, 2015',
+    '2015-01-05 12:00', '2015-01-05T00:00', '20150105', '', ' ', 'today', '٢٠١٥-01-05',
+    '2015-01-05\n', '2015-01-5x',
+)
+
+DATETIMES = DATES + (
+    '2015-01-05 12:30:45', '2015-01-05 12:30', '2015-01-05 12:30:45.123456', '2015-01-05 24:00',
+    '2015-01-05 23:60', '2015-01-05  12:30', '2015-01-05 1:2:3', '01/05/2015 12:30', '05.01.2015 12:30:45',
+    '2015-01-05 12:30:45 ', '2015-01-05 12:30:60', '2015-01-05 12:30:45.1234567',
+)
+
+
+def clean(field, value):
+    try:
+        return field.clean(value)
+    except forms.ValidationError as error:
+        return ('invalid', error.code)
+
+
+class DifferentialTest(SimpleTestCase):
+    '''
+    The parsing fields accept and reject the same values as Django's.
+    '''
+
+    def assertSameAsDjango(self, django_field, field, values):
+        for language in LANGUAGES:
+            with translation.override(language):
+                for value in values:
+                    self.assertEqual(clean(field, value), clean(django_field, value), (language, value))
+
+    def test_dates(self):
+        self.assertSameAsDjango(forms.DateField(localize=True, required=False),
+                                parsing.DateField(localize=True, required=False), DATES)
+
+    @override_settings(USE_L10N=True)
+    def test_localized_dates(self):
+        self.test_dates()
+
+    def test_datetimes(self):
+        self.assertSameAsDjango(forms.DateTimeField(localize=True, required=False),
+                                parsing.DateTimeField(localize=True, required=False), DATETIMES)
+
+    @override_settings(USE_L10N=True)
+    def test_localized_datetimes(self):
+        self.test_datetimes()
+
+    def test_custom_formats(self):
+        formats = ['%d/%m/%Y', '%Y-%m-%d', '%b %Y %d']
+        self.assertSameAsDjango(forms.DateField(input_formats=formats), parsing.DateField(input_formats=formats),
+                                DATES + ('Jan 2015 05', '05/01/2015'))
+
+    def test_required(self):
+        self.assertEqual(clean(parsing.DateField(), ''), clean(forms.DateField(), ''))
+
+
+class ParseTest(SimpleTestCase):
+
+    def test_iso_values_skip_strptime(self):
+        with patch('daterange_filter.parsing.datetime') as mock:
+            mock.datetime.side_effect = datetime
+            parsing.parse('2015-01-05 12:30:45', ['%Y-%m-%d %H:%M:%S'])
+        self.assertFalse(mock.datetime.strptime.called)
+
+    def test_formats_compiled_once_per_language(self):
+        parsing._compiled.clear()
+        for language in ('en', 'en', 'de'):
+            with translation.override(language):
+                parsing.parse('05.01.2015', ['%d/%m/%Y', '%d.%m.%Y'])
+        self.assertEqual(sorted(key[0] for key in parsing._compiled), ['de', 'en'])
+
+    def test_without_time_re(self):
+        parsing._compiled.clear()
+        with patch('daterange_filter.parsing._time_res', {}), patch('daterange_filter.parsing._strptime', object()):
+            self.assertEqual(parsing.get_parsers(['%d.%m.%Y']), (('%d.%m.%Y', None), ))
+            self.assertEqual(parsing.parse('05.01.2015', ['%d/%m/%Y', '%d.%m.%Y']), datetime(2015, 1, 5))
+            self.assertEqual(parsing.parse('05.01.2015', ['%d/%m/%Y']), None)
+        parsing._compiled.clear()
+
+    def test_strptime_cache_left_alone(self):
+        import _strptime
+        parsing._compiled.clear()
+        with patch('daterange_filter.parsing._time_res', {}), patch.object(_strptime, '_TimeRE_cache', None):
+            regex = parsing.get_parsers(['%d.%m.%Y'])[0][1]
+        self.assertTrue(regex.match('05.01.2015'))
+        parsing._compiled.clear()
+
+    def test_non_matching_formats_skipped(self):
+        self.assertEqual(parsing.parse('05.01.2015', ['%d/%m/%Y', '%d.%m.%Y']), datetime(2015, 1, 5))
+        self.assertEqual(parsing.parse('05.01.2015', ['%d/%m/%Y']), None)
+
+    def test_datetime_field_is_timezone_aware(self):
+        value = parsing.DateTimeField().clean('2015-01-05 12:30')
+        self.assertEqual(value, timezone.make_aware(datetime(2015, 1, 5, 12, 30)))
@@ -0,0 +1,103 @@
+from datetime import date, datetime
+
+from django.test import TestCase
+from django.utils import timezone
+from mock import Mock, patch
+
+from daterange_filter import presets
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from tests import BaseTest
+from tests.models import Event
+
+
+class PresetDateRangeFilter(DateRangeFilter):
+    presets = presets.DEFAULT_PRESETS
+
+
+class PresetDateTimeRangeFilter(DateTimeRangeFilter):
+    presets = presets.DEFAULT_PRESETS
+
+
+class ResolveTest(BaseTest):
+    today = date(2016, 3, 31)
+
+    def assertResolves(self, token, first, last):
+        self.assertEqual(presets.resolve(token, self.today), (first, last))
+
+    def test_days(self):
+        self.assertResolves('today', date(2016, 3, 31), date(2016, 3, 31))
+        self.assertResolves('yesterday', date(2016, 3, 30), date(2016, 3, 30))
+        self.assertResolves('last_7_days', date(2016, 3, 25), date(2016, 3, 31))
+        self.assertResolves('previous_day', date(2016, 3, 30), date(2016, 3, 30))
+
+    def test_weeks(self):
+        self.assertResolves('last_2_weeks', date(2016, 3, 18), date(2016, 3, 31))
+        self.assertResolves('this_week', date(2016, 3, 28), date(2016, 3, 31))
+        self.assertResolves('previous_week', date(2016, 3, 21), date(2016, 3, 27))
+
+    def test_months(self):
+        self.assertResolves('last_1_months', date(2016, 3, 1), date(2016, 3, 31))
+        self.assertResolves('this_month', date(2016, 3, 1), date(2016, 3, 31))
+        self.assertResolves('previous_month', date(2016, 2, 1), date(2016, 2, 29))
+        self.assertEqual(presets.resolve('previous_month', date(2016, 1, 15)), (date(2015, 12, 1), date(2015, 12, 31)))
+
+    def test_years(self):
+        self.assertResolves('this_year', date(2016, 1, 1), date(2016, 3, 31))
+        self.assertResolves('previous_year', date(2015, 1, 1), date(2015, 12, 31))
+
+    def test_invalid_tokens(self):
+        for token in ('', None, 'tomorrow', 'last_0_days', 'last_days', 'this_day', 'last_7_day'):
+            self.assertEqual(presets.resolve(token, self.today), None)
+
+
+class PresetFilterTest(TestCase):
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        for day in (1, 2, 8, 9):
+            Event.objects.create(day=date(2015, 1, day), created_at=tz.localize(datetime(2015, 1, day, 12)))
+
+    def make_filter(self, params, field_path='day', filter_class=PresetDateRangeFilter):
+        return filter_class(Event._meta.get_field(field_path), None, params, Event, None, field_path)
+
+    @patch('daterange_filter.presets.timezone.localdate', return_value=date(2015, 1, 9))
+    def test_preset_ranges(self, localdate):
+        filter_ = self.make_filter({'drf__day__range': 'last_7_days'})
+        self.assertEqual(filter_.get_filter_params(), {'day__gte': date(2015, 1, 3), 'day__lt': date(2015, 1, 10)})
+        self.assertEqual(filter_.queryset(None, Event.objects.all()).count(), 2)
+
+        filter_ = self.make_filter({'drf__created_at__range': 'previous_week'}, 'created_at',
+                                   PresetDateTimeRangeFilter)
+        self.assertEqual(filter_.queryset(None, Event.objects.all()).count(), 2)
+
+    def test_resolved_ranges_are_shared_and_move_with_time(self):
+        with patch('daterange_filter.presets.timezone.localdate', return_value=date(2015, 1, 9)):
+            first = self.make_filter({'drf__day__range': 'this_month'}).queryset(None, Event.objects.all())
+            second = self.make_filter({'drf__day__gte': '2015-01-01',
+                                       'drf__day__lte': '2015-01-09'}).queryset(None, Event.objects.all())
+        with patch('daterange_filter.presets.timezone.localdate', return_value=date(2015, 1, 10)):
+            later = self.make_filter({'drf__day__range': 'this_month'}).queryset(None, Event.objects.all())
+
+        self.assertEqual(str(first.query), str(second.query))
+        self.assertNotEqual(str(first.query), str(later.query))
+
+    def test_invalid_token_ignores_the_filter(self):
+        queryset = Event.objects.all()
+        self.assertIs(self.make_filter({'drf__day__range': 'spam'}).queryset(None, queryset), queryset)
+
+    def test_quick_links(self):
+        cl = Mock()
+        cl.params = {'drf__day__range': 'today', 'name': 'spam'}
+        cl.get_query_string.side_effect = lambda new_params, remove: (sorted(new_params.items()), sorted(remove))
+
+        choice = self.make_filter({'drf__day__range': 'today'}).choices(cl)[0]
+
+        self.assertEqual(choice['get_query'], {'name': 'spam'})
+        self.assertEqual([(preset['token'], preset['selected']) for preset in choice['presets']],
+                         [(token, token == 'today') for token, label in presets.DEFAULT_PRESETS])
+        self.assertEqual(choice['presets'][2]['query_string'],
+                         ([('drf__day__range', 'last_7_days')], ['drf__day__gte', 'drf__day__lte', 'p']))
+
+    def test_presets_are_opt_in(self):
+        filter_ = DateRangeFilter(Event._meta.get_field('day'), None, {}, Event, None, 'day')
+        self.assertEqual(filter_.expected_parameters(), ['drf__day__gte', 'drf__day__lte'])
@@ -0,0 +1,130 @@
+from datetime import datetime, date, timedelta
+
+from django.db import models
+from django.test import TestCase
+from django.utils import timezone
+
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter
+from daterange_filter.ranges import compile_range, next_boundary, start_of_day
+from tests import BaseTest
+from tests.models import Event
+
+
+class StartOfDayTest(BaseTest):
+
+    def test_regular_day(self):
+        with timezone.override('Europe/Riga'):
+            value = start_of_day(date(2015, 6, 1))
+        self.assertEqual(value, timezone.make_aware(datetime(2015, 6, 1), timezone.pytz.timezone('Europe/Riga')))
+
+    def test_midnight_skipped_by_dst(self):
+        # Brazil moved the clocks from 00:00 to 01:00 on 2018-11-04.
+        with timezone.override('America/Sao_Paulo'):
+            value = start_of_day(date(2018, 11, 4))
+        self.assertEqual(value, datetime(2018, 11, 4, 3, tzinfo=timezone.utc))
+
+    def test_dst_days_keep_their_real_length(self):
+        with timezone.override('Europe/Riga'):
+            start = start_of_day(date(2015, 3, 29))
+            end = start_of_day(date(2015, 3, 30))
+        self.assertEqual(end - start, timedelta(hours=23))
+
+
+class NextBoundaryTest(BaseTest):
+
+    def test_date(self):
+        self.assertEqual(next_boundary(date(2014, 12, 31)), date(2015, 1, 1))
+
+    def test_datetime_with_seconds(self):
+        self.assertEqual(next_boundary(datetime(2014, 1, 1, 10, 0, 59)), datetime(2014, 1, 1, 10, 1))
+
+    def test_datetime_with_microseconds(self):
+        self.assertEqual(next_boundary(datetime(2014, 1, 1, 10, 0, 0, 5)), datetime(2014, 1, 1, 10, 0, 0, 6))
+
+
+class CompileRangeTest(BaseTest):
+
+    def test_date_field(self):
+        lookups = compile_range(models.DateField(), 'day', date(2014, 1, 1), date(2014, 1, 31))
+        self.assertEqual(lookups, {'day__gte': date(2014, 1, 1), 'day__lt': date(2014, 2, 1)})
+
+    def test_missing_boundaries(self):
+        self.assertEqual(compile_range(models.DateField(), 'day'), {})
+        self.assertEqual(compile_range(models.DateField(), 'day', upto=date(2014, 1, 1)),
+                         {'day__lt': date(2014, 1, 2)})
+
+    def test_dates_on_datetime_field_become_local_midnights(self):
+        with timezone.override('Europe/Riga'):
+            lookups = compile_range(models.DateTimeField(), 'event__created_at', date(2014, 1, 1), date(2014, 1, 1))
+        tz = timezone.pytz.timezone('Europe/Riga')
+        self.assertEqual(lookups, {
+            'event__created_at__gte': tz.localize(datetime(2014, 1, 1)),
+            'event__created_at__lt': tz.localize(datetime(2014, 1, 2)),
+        })
+
+    def test_naive_datetimes_are_made_aware(self):
+        lookups = compile_range(models.DateTimeField(), 'created_at', datetime(2014, 1, 1, 10))
+        self.assertTrue(timezone.is_aware(lookups['created_at__gte']))
+
+    def test_datetimes_on_date_field_use_local_date(self):
+        value = timezone.make_aware(datetime(2014, 1, 1, 23, 30), timezone.utc)
+        with timezone.override('Europe/Riga'):
+            lookups = compile_range(models.DateField(), 'day', value, value)
+        self.assertEqual(lookups, {'day__gte': date(2014, 1, 2), 'day__lt': date(2014, 1, 3)})
+
+
+class RangeQueryTest(TestCase):
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        for day in range(1, 6):
+            for hour in (0, 12, 23):
+                Event.objects.create(day=date(2015, 1, day),
+                                     created_at=tz.localize(datetime(2015, 1, day, hour, 59, 59)))
+
+    def make_filter(self, filter_class, field_name, params):
+        field = Event._meta.get_field(field_name)
+        return filter_class(field, None, params, Event, None, field_name)
+
+    def test_date_filter_on_date_field(self):
+        filter_ = self.make_filter(DateRangeFilter, 'day', {'drf__day__gte': '2015-01-02', 'drf__day__lte': '2015-01-03'})
+        self.assertEqual(filter_.queryset(None, Event.objects.all()).count(), 6)
+
+    def test_date_filter_on_datetime_field(self):
+        filter_ = self.make_filter(DateRangeFilter, 'created_at',
+                                   {'drf__created_at__gte': '2015-01-02', 'drf__created_at__lte': '2015-01-03'})
+        self.assertEqual(filter_.queryset(None, Event.objects.all()).count(), 6)
+
+    def test_datetime_filter_includes_the_last_second(self):
+        filter_ = self.make_filter(DateTimeRangeFilter, 'created_at', {
+            'drf__created_at__gte_0': '2015-01-02', 'drf__created_at__gte_1': '00:00:00',
+            'drf__created_at__lte_0': '2015-01-02', 'drf__created_at__lte_1': '12:59:59',
+        })
+        self.assertEqual(filter_.queryset(None, Event.objects.all()).count(), 2)
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertIn('USING', plan)
+        self.assertIn('INDEX', plan)
+        self.assertNotIn('SCAN', plan.replace('SCAN TABLE', 'SCAN'))
+
+    def test_date_range_uses_index(self):
+        filter_ = self.make_filter(DateRangeFilter, 'day', {'drf__day__gte': '2015-01-02', 'drf__day__lte': '2015-01-03'})
+        self.assertUsesIndex(filter_.queryset(None, Event.objects.all()))
+
+    def test_date_range_on_datetime_uses_index(self):
+        filter_ = self.make_filter(DateRangeFilter, 'created_at',
+                                   {'drf__created_at__gte': '2015-01-02', 'drf__created_at__lte': '2015-01-03'})
+        self.assertUsesIndex(filter_.queryset(None, Event.objects.all()))
+
+    def test_datetime_range_uses_index(self):
+        filter_ = self.make_filter(DateTimeRangeFilter, 'created_at', {
+            'drf__created_at__gte_0': '2015-01-02', 'drf__created_at__gte_1': '00:00:00',
+            'drf__created_at__lte_0': '2015-01-03', 'drf__created_at__lte_1': '00:00:00',
+        })
+        self.assertUsesIndex(filter_.queryset(None, Event.objects.all()))
+
+    def test_date_cast_does_not_use_index(self):
+        # Sanity check of assertUsesIndex: a __date lookup casts the column.
+        queryset = Event.objects.filter(created_at__date__gte=date(2015, 1, 2))
+        self.assertRaises(AssertionError, self.assertUsesIndex, queryset)
@@ -0,0 +1,144 @@
+from datetime import date, datetime
+
+import pytz
+from django.contrib import admin
+from django.contrib.admin.sites import all_sites
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mock import Mock, patch
+
+from daterange_filter import resultcache
+from daterange_filter.filter import DateRangeFilter
+from daterange_filter.pagination import RangePaginationMixin
+from daterange_filter.resultcache import CachedPaginator, ResultCache
+from tests.models import Event
+
+
+class CachedDateRangeFilter(DateRangeFilter):
+    result_cache = ResultCache()
+
+
+class EventAdmin(RangePaginationMixin, admin.ModelAdmin):
+    list_filter = ('name', ('day', CachedDateRangeFilter))
+    list_per_page = 2
+    show_full_result_count = False
+
+
+class ResultCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tz = timezone.get_current_timezone()
+        self.events = [Event.objects.create(name='day %s' % day, day=date(2015, 1, day),
+                                            created_at=tz.localize(datetime(2015, 1, day, 12)))
+                       for day in (1, 2, 3, 10, 11)]
+        self.params = {'drf__day__gte': '2015-01-01', 'drf__day__lte': '2015-01-10'}
+
+    def days(self, params):
+        request = RequestFactory().get('/', params)
+        request.user = Mock()
+        cl = EventAdmin(Event, admin.site).get_changelist_instance(request)
+        self.assertIsInstance(cl.paginator, CachedPaginator)
+        return cl.result_count, sorted(event.day.day for event in cl.result_list)
+
+    def test_hits_skip_the_count_and_the_page(self):
+        self.assertEqual(self.days(self.params), (4, [3, 10]))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.days(self.params), (4, [3, 10]))
+
+        # Only the rows of the page, by primary key, within the range.
+        self.assertEqual(len(queries.captured_queries), 1)
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('"tests_event"."day" >=', sql)
+        self.assertIn('"tests_event"."id" IN (%s, %s)' % (self.events[3].pk, self.events[2].pk), sql)
+
+    def test_pages_and_filters_are_part_of_the_key(self):
+        self.days(self.params)
+        self.assertEqual(self.days(dict(self.params, p='1')), (4, [1, 2]))
+        self.assertEqual(self.days(dict(self.params, name='day 2')), (1, [2]))
+
+    def test_range_query_stays_a_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.days(self.params)
+
+        self.assertFalse([query for query in queries.captured_queries
+                          if '"day" >=' in query['sql'] and ' IN (' in query['sql'] and 'LIMIT' in query['sql']])
+
+    def test_saving_a_row_invalidates(self):
+        self.days(self.params)
+        Event.objects.create(day=date(2015, 1, 1), created_at=timezone.now())
+        self.assertEqual(self.days(self.params)[0], 5)
+
+        self.events[3].delete()
+        self.assertEqual(self.days(self.params), (4, [1, 3]))
+
+    def test_saves_out_of_the_range_keep_the_entries(self):
+        self.days(self.params)
+        event = Event.objects.create(day=date(2015, 1, 20), created_at=timezone.now())
+        Event.objects.create(day=date(2015, 1, 21), created_at=timezone.now()).delete()
+        event.name = 'moved'
+        event.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.days(self.params), (4, [3, 10]))
+        self.assertEqual(len(queries.captured_queries), 1)
+
+        self.assertEqual(self.days({'drf__day__gte': '2015-01-10'}), (3, [11, 20]))
+
+    def test_rows_moved_out_of_the_range(self):
+        self.days(self.params)
+        self.events[3].day = date(2015, 1, 20)
+        self.events[3].save()
+
+        self.assertEqual(self.days(self.params), (3, [2, 3]))
+
+    def test_saves_of_other_processes(self):
+        self.days(self.params)
+        # What the signals of another process leave in the shared cache.
+        with patch('daterange_filter.resultcache.uuid.uuid4', return_value=Mock(hex='other')):
+            resultcache.bump(Event, Event._meta.get_field('day'), [date(2015, 1, 1), date(2015, 1, 20)])
+        Event.objects.filter(pk=self.events[0].pk).update(day=date(2015, 1, 20))
+
+        self.assertEqual(self.days(self.params), (3, [3, 10]))
+
+    def test_evicted_versions_are_never_reused(self):
+        self.days(self.params)
+        cache.delete(resultcache.version_key(Event, Event._meta.get_field('day'), date(2015, 1, 1)))
+        Event.objects.filter(pk=self.events[0].pk).update(day=date(2015, 1, 20))
+
+        self.assertEqual(self.days(self.params), (3, [3, 10]))
+
+    def test_version_keys(self):
+        day = Event._meta.get_field('day')
+        request = RequestFactory().get('/', self.params)
+        filter_ = CachedDateRangeFilter(day, request, dict(self.params), Event, None, 'day')
+        self.assertEqual(ResultCache().get_version_keys(filter_),
+                         [resultcache.version_key(Event, day, date(2015, 1, value)) for value in range(1, 12)])
+
+        filter_ = CachedDateRangeFilter(day, request, {'drf__day__gte': '2015-01-01'}, Event, None, 'day')
+        self.assertEqual(ResultCache().get_version_keys(filter_), [resultcache.version_key(Event)])
+        filter_ = CachedDateRangeFilter(day, request, dict(self.params), Event, None, 'day')
+        self.assertEqual(ResultCache(max_days=10).get_version_keys(filter_), [resultcache.version_key(Event)])
+
+    def test_days_of_datetimes_are_utc(self):
+        tz = pytz.timezone('America/Argentina/Buenos_Aires')
+        self.assertEqual(resultcache.get_days(tz.localize(datetime(2015, 1, 1, 22)),
+                                              tz.localize(datetime(2015, 1, 2, 0)), 31),
+                         [date(2015, 1, 2)])
+        self.assertEqual(resultcache.to_day(Event._meta.get_field('created_at'), tz.localize(datetime(2015, 1, 1, 22))),
+                         date(2015, 1, 2))
+
+    def test_built_filters_are_tracked(self):
+        with patch('daterange_filter.resultcache._tracked', {}):
+            CachedDateRangeFilter(Event._meta.get_field('day'), RequestFactory().get('/'), {}, Event, None, 'day')
+            self.assertEqual(resultcache._tracked, {Event: {Event._meta.get_field('day')}})
+
+    def test_track_registered(self):
+        site = admin.AdminSite(name='resultcache_admin')
+        site.register(Event, EventAdmin)
+        self.addCleanup(all_sites.discard, site)
+        with patch('daterange_filter.resultcache._tracked', {}):
+            resultcache.track_registered([site])
+            self.assertEqual(resultcache._tracked, {Event: {Event._meta.get_field('day')}})
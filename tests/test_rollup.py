@@ -0,0 +1,112 @@
+from datetime import date, datetime
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from mock import Mock, patch
+from io import StringIO
+
+from daterange_filter import rollup
+from daterange_filter.counts import EstimatedCount, rollup_estimate
+from daterange_filter.filter import DateRangeFilter, DateTimeRangeFilter, registered_fields
+from daterange_filter.rollup.models import DailyCount
+from tests.models import Event
+
+
+class RollupDateRangeFilter(DateRangeFilter):
+    histogram = True
+    use_rollup = True
+    count_strategy = EstimatedCount(exact_below=0, sources=[rollup_estimate])
+
+
+class EventAdmin(admin.ModelAdmin):
+    list_filter = ('name', ('day', RollupDateRangeFilter), ('created_at', DateTimeRangeFilter))
+
+
+class RollupTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tz = timezone.get_current_timezone()
+        for day, hours in ((1, (1, 23)), (2, (12,)), (20, (5, 6, 7))):
+            for hour in hours:
+                Event.objects.create(day=date(2015, 1, day), created_at=tz.localize(datetime(2015, 1, day, hour)))
+        self.site = admin.AdminSite()
+        self.site.register(Event, EventAdmin)
+
+    def test_registered_fields(self):
+        self.assertEqual(registered_fields(self.site), [(Event, 'day'), (Event, 'created_at')])
+
+    def test_full_build(self):
+        self.assertEqual(rollup.refresh(Event, 'created_at'), 3)
+        self.assertEqual(rollup.daily_counts(Event, 'created_at'), [
+            (date(2015, 1, 1), 2), (date(2015, 1, 2), 1), (date(2015, 1, 20), 3)])
+        self.assertEqual(rollup.total(Event, 'created_at', date(2015, 1, 2), None), 4)
+        self.assertEqual(rollup.total(Event, 'day'), None)
+
+    def test_incremental_refresh_only_touches_recent_days(self):
+        rollup.refresh(Event, 'day')
+        DailyCount.objects.filter(day=date(2015, 1, 1)).update(count=100)
+        Event.objects.create(day=date(2015, 1, 20), created_at=timezone.now())
+
+        self.assertEqual(rollup.refresh(Event, 'day', since=date(2015, 1, 2)), 2)
+        self.assertEqual(rollup.daily_counts(Event, 'day'), [
+            (date(2015, 1, 1), 100), (date(2015, 1, 2), 1), (date(2015, 1, 20), 4)])
+
+    def test_command(self):
+        out = StringIO()
+        with patch('daterange_filter.filter.admin.site', self.site):
+            call_command('daterange_rollup', '--full', '--model', 'tests.Event', stdout=out)
+        self.assertEqual(out.getvalue(), 'tests.event.day: 3 days\ntests.event.created_at: 3 days\n')
+
+        with patch('daterange_filter.filter.admin.site', self.site):
+            with patch('daterange_filter.rollup.timezone.localdate', return_value=date(2015, 1, 21)):
+                call_command('daterange_rollup', '--days', '2', stdout=out)
+        self.assertEqual(DailyCount.objects.count(), 6)
+
+    def test_incremental_refresh_needs_a_full_build(self):
+        self.assertRaises(ValueError, rollup.refresh, Event, 'day', since=date(2015, 1, 20))
+        self.assertFalse(rollup.is_built(Event, 'day'))
+
+        with patch('daterange_filter.filter.admin.site', self.site):
+            with self.assertRaisesRegex(CommandError, 'tests.event.day, tests.event.created_at'):
+                call_command('daterange_rollup', stdout=StringIO())
+        self.assertEqual(DailyCount.objects.count(), 0)
+
+    def test_not_installed(self):
+        rollup.refresh(Event, 'day')
+        with self.modify_settings(INSTALLED_APPS={'remove': 'daterange_filter.rollup'}):
+            self.assertFalse(rollup.is_built(Event, 'day'))
+            self.assertEqual(rollup.total(Event, 'day'), None)
+
+    def get_changelist(self, params):
+        request = RequestFactory().get('/', params)
+        request.user = Mock()
+        return EventAdmin(Event, self.site).get_changelist_instance(request)
+
+    def test_filter_reads_the_rollup(self):
+        rollup.refresh(Event, 'day')
+        DailyCount.objects.filter(day=date(2015, 1, 2)).update(count=10)
+
+        cl = self.get_changelist({'drf__day__gte': '2015-01-02', 'drf__day__lte': '2015-01-31'})
+        spec = cl.filter_specs[1]
+        self.assertEqual(spec.count(cl.queryset), 13)
+        choice = spec.choices(cl)[0]
+        self.assertEqual([(bar['start'], bar['count']) for bar in choice['histogram']],
+                         [(date(2015, 1, 2), 10), (date(2015, 1, 20), 3)])
+        self.assertEqual(choice['count'], {'value': 13, 'estimated': True})
+
+    def test_filter_ignores_the_rollup_with_other_filters(self):
+        rollup.refresh(Event, 'day')
+        DailyCount.objects.filter(day=date(2015, 1, 2)).update(count=10)
+
+        cl = self.get_changelist({'drf__day__gte': '2015-01-02', 'name': ''})
+        spec = cl.filter_specs[1]
+        self.assertEqual(spec.choices(cl)[0]['histogram'][0]['count'], 10)
+
+        cl = self.get_changelist({'drf__day__gte': '2015-01-02', 'name': 'spam'})
+        spec = cl.filter_specs[1]
+        self.assertEqual(spec.choices(cl)[0]['histogram'], [])
+        self.assertEqual(spec.count(cl.queryset), 0)
@@ -0,0 +1,103 @@
+import threading
+from datetime import date, datetime
+
+from django.contrib import admin
+from django.db import connections
+from django.test import RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mock import Mock
+
+from daterange_filter.filter import DateRangeFilter
+from daterange_filter.shards import RangeShardsMixin, Shard, ShardMap, get_sort_key
+from tests.models import Event
+
+SHARDS = ShardMap([
+    Shard('default', None, date(2015, 1, 1)),
+    Shard('shard_1', date(2015, 1, 1), date(2015, 2, 1)),
+    Shard('shard_2', date(2015, 2, 1), None),
+])
+
+
+class ShardedDateRangeFilter(DateRangeFilter):
+    shards = SHARDS
+
+
+class EventAdmin(RangeShardsMixin, admin.ModelAdmin):
+    list_filter = (('day', ShardedDateRangeFilter),)
+    ordering = ('-day',)
+    list_per_page = 2
+
+
+class ShardMapTest(TransactionTestCase):
+    databases = {'default', 'shard_1', 'shard_2'}
+
+    def setUp(self):
+        tz = timezone.get_current_timezone()
+        for day in (date(2014, 12, 30), date(2015, 1, 10), date(2015, 1, 20), date(2015, 1, 31),
+                    date(2015, 2, 1), date(2015, 2, 5), date(2015, 3, 1)):
+            Event.objects.using(SHARDS.alias_for(day)).create(
+                name=day.isoformat(), day=day, created_at=tz.localize(datetime(day.year, day.month, day.day)))
+
+    def test_alias_for(self):
+        self.assertEqual(SHARDS.alias_for(date(2014, 1, 1)), 'default')
+        self.assertEqual(SHARDS.alias_for(date(2015, 1, 31)), 'shard_1')
+        self.assertEqual(SHARDS.alias_for(date(2015, 2, 1)), 'shard_2')
+
+    def test_prune(self):
+        self.assertEqual(SHARDS.prune(date(2015, 1, 5), date(2015, 1, 10)), ['shard_1'])
+        self.assertEqual(SHARDS.prune(date(2015, 1, 5), date(2015, 2, 1)), ['shard_1'])
+        self.assertEqual(SHARDS.prune(date(2015, 1, 5), date(2015, 2, 2)), ['shard_1', 'shard_2'])
+        self.assertEqual(SHARDS.prune(None, date(2015, 1, 2)), ['default', 'shard_1'])
+        self.assertEqual(SHARDS.prune(), ['default', 'shard_1', 'shard_2'])
+
+    def test_queries_run_on_threads(self):
+        idents = SHARDS.run(lambda queryset: (queryset.db, threading.get_ident()), Event.objects.all(),
+                            ['shard_1', 'shard_2'])
+        self.assertEqual([alias for alias, ident in idents], ['shard_1', 'shard_2'])
+        self.assertNotIn(threading.get_ident(), [ident for alias, ident in idents])
+
+    def test_count_and_merge(self):
+        queryset = Event.objects.filter(day__gte=date(2015, 1, 15)).order_by('-day', '-pk')
+        aliases = SHARDS.prune(date(2015, 1, 15))
+        self.assertEqual(SHARDS.count(queryset, aliases), 5)
+        self.assertEqual([event.name for event in SHARDS.merge(queryset, aliases, 3)],
+                         ['2015-03-01', '2015-02-05', '2015-02-01'])
+        self.assertEqual([event.name for event in SHARDS.merge(queryset.order_by('day'), aliases)],
+                         ['2015-01-20', '2015-01-31', '2015-02-01', '2015-02-05', '2015-03-01'])
+
+    def test_sort_key(self):
+        key = get_sort_key(Event.objects.order_by('name', '-day'))
+        rows = [Event(name='b', day=date(2015, 1, 1)), Event(name='a', day=date(2015, 1, 1)),
+                Event(name='b', day=date(2015, 1, 2)), Event(name=None, day=date(2015, 1, 3))]
+        self.assertEqual([(row.name, row.day.day) for row in sorted(rows, key=key)],
+                         [(None, 3), ('a', 1), ('b', 2), ('b', 1)])
+
+    def get_changelist(self, params):
+        request = RequestFactory().get('/', params)
+        request.user = Mock()
+        return EventAdmin(Event, admin.site).get_changelist_instance(request)
+
+    def test_changelist_reads_the_overlapping_shards(self):
+        with CaptureQueriesContext(connections['default']) as queries:
+            changelist = self.get_changelist({'drf__day__gte': '2015-01-15', 'drf__day__lte': '2015-02-28'})
+            rows = [event.name for event in changelist.result_list]
+        self.assertEqual(changelist.result_count, 4)
+        self.assertEqual(rows, ['2015-02-05', '2015-02-01'])
+        self.assertEqual(changelist.paginator.aliases, ['shard_1', 'shard_2'])
+        # The full count is summed over every alias, on the threads.
+        self.assertEqual(changelist.full_result_count, 7)
+        self.assertFalse([query for query in queries.captured_queries if 'tests_event' in query['sql']])
+
+        changelist = self.get_changelist({'drf__day__gte': '2015-01-15', 'drf__day__lte': '2015-02-28', 'p': '1'})
+        self.assertEqual([event.name for event in changelist.result_list], ['2015-01-31', '2015-01-20'])
+
+    def test_changelist_on_a_single_page(self):
+        changelist = self.get_changelist({'drf__day__gte': '2014-12-01', 'drf__day__lte': '2015-01-15'})
+        self.assertEqual(changelist.result_count, 2)
+        self.assertEqual([event.name for event in changelist.result_list], ['2015-01-10', '2014-12-30'])
+
+    def test_empty_range(self):
+        changelist = self.get_changelist({'drf__day__gte': '2015-02-10', 'drf__day__lte': '2015-02-01'})
+        self.assertEqual(changelist.paginator.aliases, [])
+        self.assertEqual(changelist.result_count, 0)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from tests.admin import site
+
+urlpatterns = [
+    path('admin/', site.urls),
+]